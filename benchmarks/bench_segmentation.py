@@ -0,0 +1,136 @@
+"""
+문장 분리 방식(fast, kss)의 처리 속도와 분리 결과의 일치도를 긴 합성 통화로 비교합니다.
+
+    python -m benchmarks.bench_segmentation --durations 10,60,180 --output segmentation.json
+    python -m benchmarks.bench_segmentation --baseline segmentation.json --tolerance 0.2
+
+일치도는 기준 방식(--reference, 기본 kss)과 문장 경계 위치(공백을 뺀 글자 수 기준)가 얼마나 겹치는지를 F1로 나타냅니다.
+"""
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run_benchmarks import build_components, compare, measure, summarize, uncached
+from benchmarks.synthetic import generate_call
+
+SPEAKERS = ('Agent', 'Customer')
+
+
+def sentence_boundaries(sentences):
+    """
+    문장 목록의 경계를 화자 텍스트 처음부터 센 글자 수(공백 제외)의 집합으로 바꿉니다.
+    """
+    boundaries = set()
+    position = 0
+    for sentence in sentences:
+        position += len(''.join(sentence.split()))
+        boundaries.add(position)
+    return boundaries
+
+
+def boundary_agreement(sentences, reference):
+    boundaries, reference_boundaries = sentence_boundaries(sentences), sentence_boundaries(reference)
+    if not boundaries and not reference_boundaries:
+        return 1.0
+    return 2 * len(boundaries & reference_boundaries) / (len(boundaries) + len(reference_boundaries))
+
+
+def split_all(segmenter, transcript):
+    """
+    지표 계산과 같이 상담사 문장은 토큰까지, 고객 문장은 문장만 분리합니다.
+    """
+    return {
+        'Agent': segmenter.split(transcript, 'Agent')[0],
+        'Customer': segmenter.split(transcript, 'Customer', with_tokens=False)[0],
+    }
+
+
+def benchmark_segmentation(pipeline, segmenters, minutes, repeat, seed, reference):
+    duration = minutes * 60
+    speaker_turns, word_segments = generate_call(duration, seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transcript = pipeline._postprocess_transcript(pipeline._merge_results(speaker_turns, word_segments))
+
+    results, splits = {}, {}
+    for name, segmenter in segmenters.items():
+        timings = measure(split_all, lambda setup=uncached(transcript), segmenter=segmenter: (segmenter, *setup()),
+                          repeat)
+        summary = summarize(timings, len(transcript))
+        splits[name] = split_all(segmenter, transcript)
+        summary['sentences'] = sum(len(sentences) for sentences in splits[name].values())
+        summary['segments_per_second'] = len(transcript) / summary['median'] if summary['median'] > 0 else None
+        results[f"segmentation.{name}/{minutes:g}m"] = summary
+
+    agreement = {}
+    if reference in splits:
+        for name, split in splits.items():
+            if name != reference:
+                agreement[f"{name}/{minutes:g}m"] = {
+                    speaker.lower(): boundary_agreement(split[speaker], splits[reference][speaker])
+                    for speaker in SPEAKERS
+                }
+    return results, agreement
+
+
+@click.command()
+@click.option('--durations', default='10,60', show_default=True, help='합성 통화 길이 목록(분, 쉼표로 구분)')
+@click.option('--backends', default='fast,kss', show_default=True, help='비교할 문장 분리 방식 (쉼표로 구분)')
+@click.option('--reference', default='kss', show_default=True, help='일치도 계산의 기준 방식')
+@click.option('--repeat', default=3, show_default=True, type=int, help='반복 측정 횟수 (중앙값 기준)')
+@click.option('--seed', default=0, show_default=True, type=int, help='합성 데이터 난수 시드')
+@click.option('--output', type=click.Path(dir_okay=False), help='측정 결과를 저장할 JSON 파일')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='비교할 기준 결과 JSON 파일')
+@click.option('--tolerance', default=0.2, show_default=True, type=float, help='허용할 상대 시간 증가율')
+@click.option('--min-delta', default=0.005, show_default=True, type=float, help='저하로 판단할 최소 절대 시간 증가(초)')
+def main(durations, backends, reference, repeat, seed, output, baseline, tolerance, min_delta):
+    from src.segmentation import create_segmenter
+
+    pipeline, calculator = build_components()
+    segmenters = {
+        name: create_segmenter({'backend': name}, calculator.kiwi)
+        for name in [value.strip() for value in backends.split(',') if value.strip()]
+    }
+    results, agreement = {}, {}
+    for minutes in [float(value) for value in durations.split(',') if value.strip()]:
+        print(f"합성 통화 {minutes:g}분 문장 분리 측정 중...", file=sys.stderr)
+        call_results, call_agreement = benchmark_segmentation(pipeline, segmenters, minutes, repeat, seed, reference)
+        results.update(call_results)
+        agreement.update(call_agreement)
+
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+            'reference': reference,
+        },
+        'results': results,
+        'agreement': agreement,
+    }
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            report['comparison'] = compare(results, json.load(f)['results'], tolerance, min_delta)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    print(text)
+
+    regressions = [name for name, item in report.get('comparison', {}).items() if item['regression']]
+    if regressions:
+        print(f"[경고] 기준 대비 느려진 문장 분리 방식: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+새 프로세스에서 모듈 임포트, 분석기 초기화, 첫 결과까지 걸리는 시간(콜드 스타트)을 측정합니다.
+
+    python -m benchmarks.bench_startup --output startup.json
+    python -m benchmarks.bench_startup --baseline startup.json
+    python -m benchmarks.bench_startup --audio sample.wav   # 모델을 포함한 전체 파이프라인의 첫 결과 시간
+
+측정마다 새 파이썬 프로세스를 띄우므로 이미 가져온 모듈이나 로드된 모델이 결과에 섞이지 않습니다.
+감성사전/Kiwi 사용자 사전 캐시가 없는 경우(cold)와 이미 만들어진 경우(warm)를 나누어 측정합니다.
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.run_benchmarks import summarize, compare
+
+RESULT_PREFIX = "BENCH_STARTUP_RESULT "
+
+
+def run_child(mode, cache_dir, audio):
+    """
+    자식 프로세스에서 실행됩니다. 단계별 경과 시간(초)을 기록한 딕셔너리를 반환합니다.
+    """
+    phases = {}
+    start_time = time.perf_counter()
+
+    def mark(name):
+        phases[name] = time.perf_counter() - start_time
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == 'pipeline':
+            from src.pipeline import VoiceAnalysisPipeline
+            mark('import')
+            pipeline = VoiceAnalysisPipeline()
+            mark('init')
+            try:
+                pipeline.run(audio)
+            finally:
+                pipeline.close()
+            mark('first_result')
+            return phases
+
+        from src.metrics_calculator import MetricsCalculator
+        from src.utils import load_keyword_config, KEYWORDS_PATH
+        from benchmarks.run_benchmarks import StubLLMEvaluator
+        from benchmarks.synthetic import generate_call
+        mark('import')
+        MetricsCalculator.llm_evaluator = StubLLMEvaluator()
+        calculator = MetricsCalculator(
+            load_keyword_config(),
+            keyword_path=KEYWORDS_PATH,
+            kiwi_dict_cache=os.path.join(cache_dir, 'kiwi'),
+            lexicon_cache=os.path.join(cache_dir, 'lexicon')
+        )
+        mark('init')
+
+        speaker_turns, word_segments = generate_call(60, seed=0)
+        transcript = [
+            {'text': word['text'], 'speaker': 'Agent' if index % 2 == 0 else 'Customer',
+             'start_time': word['start'], 'end_time': word['end']}
+            for index, word in enumerate(word_segments)
+        ]
+        calculator.calculate_all_metrics(transcript, speaker_turns, 60, 'startup')
+        mark('first_result')
+    return phases
+
+
+def spawn(mode, cache_dir, audio=None):
+    """
+    새 프로세스에서 run_child()를 실행하고 (프로세스 전체 경과 시간, 단계별 경과 시간)을 반환합니다.
+    """
+    command = [sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode, '--cache-dir', cache_dir]
+    if audio:
+        command += ['--audio', os.path.abspath(audio)]
+    start_time = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(f"측정 프로세스가 실패했습니다:\n{completed.stderr[-2000:]}")
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return wall, json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError("측정 프로세스가 결과를 출력하지 않았습니다.")
+
+
+def collect(label, runs):
+    results = {f"startup.{label}.process": summarize([wall for wall, _ in runs], 1)}
+    for phase in runs[0][1]:
+        results[f"startup.{label}.{phase}"] = summarize([phases[phase] for _, phases in runs], 1)
+    return results
+
+
+@click.command()
+@click.option('--repeat', default=3, show_default=True, type=int, help='측정 횟수 (중앙값 기준)')
+@click.option('--audio', type=click.Path(exists=True, dir_okay=False), help='전체 파이프라인 첫 결과 시간을 잴 음성 파일')
+@click.option('--output', type=click.Path(dir_okay=False), help='측정 결과를 저장할 JSON 파일')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='비교할 기준 결과 JSON 파일')
+@click.option('--tolerance', default=0.2, show_default=True, type=float, help='허용할 상대 시간 증가율')
+@click.option('--min-delta', default=0.05, show_default=True, type=float, help='저하로 판단할 최소 절대 시간 증가(초)')
+@click.option('--child', type=click.Choice(['metrics', 'pipeline']), hidden=True)
+@click.option('--cache-dir', hidden=True)
+def main(repeat, audio, output, baseline, tolerance, min_delta, child, cache_dir):
+    if child:
+        print(RESULT_PREFIX + json.dumps(run_child(child, cache_dir, audio)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cold_runs = []
+        for attempt in range(repeat):
+            # 매번 빈 캐시 디렉터리를 써서 감성사전과 사용자 사전 파일을 새로 만드는 경우를 잽니다.
+            cold_runs.append(spawn('metrics', os.path.join(temp_dir, f"cold-{attempt}")))
+        results.update(collect('metrics_cold', cold_runs))
+
+        warm_cache = os.path.join(temp_dir, "warm")
+        spawn('metrics', warm_cache)
+        results.update(collect('metrics_warm', [spawn('metrics', warm_cache) for _ in range(repeat)]))
+
+    if audio:
+        print("전체 파이프라인 콜드 스타트 측정 중...", file=sys.stderr)
+        results.update(collect('pipeline', [spawn('pipeline', '.cache', audio) for _ in range(repeat)]))
+
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            report['comparison'] = compare(results, json.load(f)['results'], tolerance, min_delta)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    print(text)
+
+    regressions = [name for name, item in report.get('comparison', {}).items() if item['regression']]
+    if regressions:
+        print(f"[경고] 기준 대비 느려진 단계: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+로컬 감정 점수의 정확도와 LLM으로 넘기는 비율(escalation rate)을 임계값별로 비교합니다.
+
+    python -m benchmarks.eval_sentiment labeled.jsonl --thresholds 0.4,0.5,0.6,0.7,0.8
+
+입력은 한 줄에 {"text": "...", "label": -1 | 0 | 1} 하나씩인 JSONL 파일입니다. (LLM 판정 결과를 정답으로 써도 됩니다)
+임계값마다 로컬에서 끝나는 문장의 정확도와, LLM으로 넘긴 문장은 맞는다고 가정했을 때의 전체 정확도를 보고합니다.
+"""
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run_benchmarks import build_components
+
+
+def load_labeled(path):
+    texts, labels = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                texts.append(item['text'])
+                labels.append(int(item['label']))
+    return texts, labels
+
+
+def evaluate(local_scores, labels, threshold):
+    kept = [(score, label) for (score, confidence), label in zip(local_scores, labels) if confidence >= threshold]
+    correct = sum(score == label for score, label in kept)
+    escalated = len(labels) - len(kept)
+    return {
+        'threshold': threshold,
+        'escalation_rate': escalated / len(labels) if labels else 0,
+        'local_accuracy': correct / len(kept) if kept else None,
+        'accuracy_if_llm_correct': (correct + escalated) / len(labels) if labels else None,
+        'local_confusion': {f"{label}->{score}": count for (score, label), count in sorted(Counter(kept).items())},
+    }
+
+
+@click.command()
+@click.argument('labeled', type=click.Path(exists=True, dir_okay=False))
+@click.option('--thresholds', default='0.4,0.5,0.6,0.7,0.8', show_default=True, help='비교할 escalation_threshold 목록')
+@click.option('--output', type=click.Path(dir_okay=False), help='결과를 저장할 JSON 파일')
+def main(labeled, thresholds, output):
+    _, calculator = build_components()
+    texts, labels = load_labeled(labeled)
+    local_scores = calculator.sentiment_scorer.score(texts)
+    report = {
+        'sentences': len(texts),
+        'label_counts': {str(label): count for label, count in sorted(Counter(labels).items())},
+        'results': [evaluate(local_scores, labels, float(value)) for value in thresholds.split(',') if value.strip()],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
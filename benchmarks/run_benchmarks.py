@@ -0,0 +1,261 @@
+"""
+합성 통화로 파이프라인 단계별 처리 시간을 측정하고, 저장된 기준 결과와 비교합니다.
+
+    python -m benchmarks.run_benchmarks --durations 1,10,60,180 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+
+LLM 평가는 즉시 응답하는 가짜 평가기로 대체되므로 API 키와 네트워크가 필요 없습니다.
+"""
+import contextlib
+import io
+import itertools
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import click
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import generate_call, write_synthetic_audio
+
+
+class StubLLMEvaluator:
+    """
+    calculate_all_metrics()가 기대하는 인터페이스만 갖춘, 즉시 결과를 돌려주는 LLM 평가기입니다.
+    """
+    available = True
+    cache = None
+
+    def submit_session(self, transcript, customer_sentences, include_suggestions=True):
+        from src.llm_evaluator import new_usage_stats
+        future = Future()
+        future.set_result({
+            'conversation_analysis': {"mid_category": "기타", "result_label": "만족", "profane": 0},
+            'suggestions': 1.0 if include_suggestions else 0.0,
+            'customer_sentiment_scores': [0] * len(customer_sentences),
+            'usage': new_usage_stats(),
+        })
+        return future
+
+    def cache_stats(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def measure(function, setup=None, repeat=3):
+    """
+    function(*setup())을 repeat번 실행하여 실행 시간(초) 목록을 반환합니다. setup 시간은 측정하지 않습니다.
+    단계 함수가 출력하는 진행 메시지는 버립니다.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - start_time)
+    return timings
+
+
+def summarize(timings, items):
+    return {
+        'median': statistics.median(timings),
+        'first': timings[0],
+        'min': min(timings),
+        'max': max(timings),
+        'repeat': len(timings),
+        'items': items,
+    }
+
+
+def build_components():
+    """
+    모델을 로드하지 않고 측정 대상 객체(파이프라인, 지표 계산기)를 만듭니다.
+    """
+    from src.pipeline import VoiceAnalysisPipeline
+    from src.metrics_calculator import MetricsCalculator
+    from src.utils import load_model_config, load_keyword_config, KEYWORDS_PATH
+
+    model_config = load_model_config()
+    MetricsCalculator.llm_evaluator = StubLLMEvaluator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculator = MetricsCalculator(
+            load_keyword_config(),
+            keyword_path=KEYWORDS_PATH,
+            kiwi_num_workers=model_config.get('kiwi', {}).get('num_workers'),
+            segmentation_config=model_config.get('segmentation'),
+            sentiment_config=model_config.get('sentiment')
+        )
+    # _merge_results()와 _postprocess_transcript()는 모델 상태를 쓰지 않으므로 초기화 없이 호출합니다.
+    pipeline = VoiceAnalysisPipeline.__new__(VoiceAnalysisPipeline)
+    return pipeline, calculator
+
+
+def uncached(transcript):
+    """
+    kss(pecab)는 같은 문장의 분석 결과를 내부에 캐시하므로, 반복 측정마다 구간 끝에 다른 토큰을 붙인 사본을 만듭니다.
+    쉼 경계 위치는 앞 구간들에 붙인 토큰 길이만큼 옮겨 그대로 유지합니다.
+    """
+    from src.transcript import SegmentTable, pack_texts
+
+    texts = transcript.texts()
+    pauses = transcript.pauses
+    if pauses is not None:
+        pause_segments = np.searchsorted(transcript.offsets, pauses, side='right') - 1
+    counter = itertools.count()
+
+    def setup():
+        tag = f"측정{next(counter)}"
+        shifted = None if pauses is None else pauses + (len(tag) + 1) * pause_segments
+        return (SegmentTable(
+            transcript.starts, transcript.ends, transcript.speakers, transcript.labels,
+            *pack_texts(f"{text} {tag}" for text in texts), pauses=shifted
+        ),)
+    return setup
+
+
+def benchmark_call(pipeline, calculator, minutes, repeat, seed):
+    """
+    길이가 minutes분인 합성 통화 하나에 대해 단계별 처리 시간을 측정합니다.
+    """
+    duration = minutes * 60
+    from src.transcript import TurnTable, WordTable
+
+    speaker_turns, word_segments = generate_call(duration, seed=seed)
+    # 파이프라인과 같이 화자 분리와 STT 결과는 표로 바꾼 뒤 넘깁니다. (표는 결과 종합/후처리에서 바뀌지 않습니다)
+    speaker_turns = TurnTable.from_dicts(speaker_turns)
+    word_segments = WordTable.from_dicts(word_segments)
+    results = {}
+
+    def record(stage, timings, items):
+        results[f"{stage}/{minutes:g}m"] = summarize(timings, items)
+
+    record('merge', measure(pipeline._merge_results, lambda: (speaker_turns, word_segments), repeat),
+           len(word_segments))
+    with contextlib.redirect_stdout(io.StringIO()):
+        merged = pipeline._merge_results(speaker_turns, word_segments)
+    record('postprocess', measure(pipeline._postprocess_transcript, lambda: (merged,), repeat), len(merged))
+    with contextlib.redirect_stdout(io.StringIO()):
+        transcript = pipeline._postprocess_transcript(merged)
+
+    # 대화 흐름 지표 (구간별 시계열 포함)
+    record('metrics.flow',
+           measure(calculator._calculate_flow_metrics, lambda: (transcript, speaker_turns, duration), repeat),
+           len(transcript))
+
+    # 문장 분리, 형태소 분석, 키워드/형태소 기반 지표
+    record('metrics.extract_agent_data',
+           measure(calculator._extract_agent_data, uncached(transcript), repeat), len(transcript))
+    record('metrics.split_customer_sentences',
+           measure(calculator._split_customer_sentences, uncached(transcript), repeat), len(transcript))
+    customer_sentences, customer_sentence_tokens = calculator._split_customer_sentences(transcript)
+    record('metrics.local_sentiment',
+           measure(calculator._score_local_sentiment, lambda: (customer_sentences, customer_sentence_tokens), repeat),
+           len(customer_sentences))
+    _, agent_sentences, _ = calculator._extract_agent_data(transcript)
+    record('metrics.analyze_sentences',
+           measure(calculator._analyze_sentences, lambda: (agent_sentences,), repeat), len(agent_sentences))
+    record('metrics.keyword_match',
+           measure(lambda sentences: [calculator.keyword_matcher.match(sent) for sent in sentences],
+                   lambda: (agent_sentences,), repeat), len(agent_sentences))
+    sentence_tokens = calculator._analyze_sentences(agent_sentences)
+    sentence_hits = [calculator.keyword_matcher.match(sent) for sent in agent_sentences]
+    record('metrics.count_token_features',
+           measure(calculator._count_token_features,
+                   lambda: (agent_sentences, sentence_tokens, sentence_hits), repeat), len(agent_sentences))
+
+    record('metrics.calculate_all_metrics',
+           measure(calculator.calculate_all_metrics,
+                   lambda setup=uncached(transcript): (*setup(), speaker_turns, duration, 'benchmark'), repeat),
+           len(transcript))
+    return results
+
+
+def benchmark_audio(seconds, repeat, seed):
+    """
+    짧은 합성 WAV 파일의 디코딩 시간을 측정합니다.
+    """
+    from src.audio import decode_audio
+
+    speaker_turns, _ = generate_call(seconds, seed=seed)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_path = write_synthetic_audio(Path(temp_dir) / 'synthetic.wav', speaker_turns, seconds, seed=seed)
+        timings = measure(decode_audio, lambda: (str(audio_path),), repeat)
+    return {f"audio.decode/{seconds:g}s": summarize(timings, int(seconds * 16000))}
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    기준 결과와 중앙값을 비교하여 항목별 비율과 성능 저하 여부를 반환합니다.
+    상대 변화가 tolerance를 넘고 절대 변화도 min_delta초를 넘을 때만 저하로 판단하여 아주 짧은 단계의 잡음을 거릅니다.
+    """
+    comparisons = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current['median'] / previous['median'] if previous['median'] > 0 else float('inf')
+        delta = current['median'] - previous['median']
+        comparisons[name] = {
+            'baseline': previous['median'],
+            'current': current['median'],
+            'ratio': ratio,
+            'regression': ratio > 1 + tolerance and delta > min_delta,
+        }
+    return comparisons
+
+
+@click.command()
+@click.option('--durations', default='1,10,60', show_default=True, help='합성 통화 길이 목록(분, 쉼표로 구분). 예: 1,10,60,180')
+@click.option('--repeat', default=3, show_default=True, type=int, help='단계별 반복 측정 횟수 (중앙값 기준)')
+@click.option('--audio-seconds', default=60.0, show_default=True, type=float, help='디코딩 측정용 합성 음성 길이(초), 0이면 건너뜀')
+@click.option('--seed', default=0, show_default=True, type=int, help='합성 데이터 난수 시드')
+@click.option('--output', type=click.Path(dir_okay=False), help='측정 결과를 저장할 JSON 파일')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='비교할 기준 결과 JSON 파일')
+@click.option('--tolerance', default=0.2, show_default=True, type=float, help='허용할 상대 시간 증가율')
+@click.option('--min-delta', default=0.005, show_default=True, type=float, help='저하로 판단할 최소 절대 시간 증가(초)')
+def main(durations, repeat, audio_seconds, seed, output, baseline, tolerance, min_delta):
+    pipeline, calculator = build_components()
+    results = {}
+    for minutes in [float(value) for value in durations.split(',') if value.strip()]:
+        print(f"합성 통화 {minutes:g}분 측정 중...", file=sys.stderr)
+        results.update(benchmark_call(pipeline, calculator, minutes, repeat, seed))
+    if audio_seconds > 0:
+        results.update(benchmark_audio(audio_seconds, repeat, seed))
+
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            report['comparison'] = compare(results, json.load(f)['results'], tolerance, min_delta)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    print(text)
+
+    regressions = [name for name, item in report.get('comparison', {}).items() if item['regression']]
+    if regressions:
+        print(f"[경고] 기준 대비 느려진 단계: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
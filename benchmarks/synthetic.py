@@ -0,0 +1,86 @@
+import random
+import wave
+import numpy as np
+
+# 합성 통화에 쓰는 문장들 (키워드 사전의 완곡/공감/사과 표현이 고르게 섞이도록 구성)
+AGENT_SENTENCES = [
+    "안녕하세요 고객님 무엇을 도와드릴까요",
+    "실례지만 성함을 말씀해 주시겠어요",
+    "많이 불편하셨겠어요 정말 죄송합니다",
+    "잠시만 기다려 주시면 확인해 드리겠습니다",
+    "혹시 주문하신 상품 번호를 알 수 있을까요",
+    "그러셨군요 걱정이 많으셨겠네요",
+    "번거로우시겠지만 다시 한번 확인 부탁드립니다",
+    "환불은 영업일 기준 삼일 안에 처리됩니다",
+    "양해 부탁드립니다 최대한 빨리 처리하겠습니다",
+    "다른 문의 사항은 없으신가요",
+    "이용해 주셔서 감사합니다 좋은 하루 보내세요",
+]
+CUSTOMER_SENTENCES = [
+    "주문한 상품이 아직 도착하지 않았어요",
+    "배송이 너무 늦어서 정말 답답합니다",
+    "환불은 언제 받을 수 있나요",
+    "네 알겠습니다 감사합니다",
+    "지난번에도 똑같은 문제가 있었어요",
+    "제품이 파손되어서 왔는데 교환 가능한가요",
+    "빨리 해결해 주셨으면 좋겠어요",
+    "아 그렇군요 이해했습니다",
+]
+SPEAKERS = ('SPEAKER_00', 'SPEAKER_01')
+WORDS_PER_SECOND = 2.5
+
+
+def generate_call(duration_seconds, seed=0):
+    """
+    지정한 길이의 합성 통화를 만듭니다. (화자 구간 목록, 단어 구간 목록)을 반환합니다.
+    상담사(SPEAKER_00)와 고객(SPEAKER_01)이 번갈아 말하며, 일부 구간은 겹치거나 사이에 침묵이 있습니다.
+    """
+    rng = random.Random(seed)
+    speaker_turns = []
+    word_segments = []
+    current_time = 0.5
+    turn_index = 0
+    while current_time < duration_seconds:
+        speaker = SPEAKERS[turn_index % 2]
+        sentences = AGENT_SENTENCES if speaker == SPEAKERS[0] else CUSTOMER_SENTENCES
+        words = []
+        for _ in range(rng.randint(1, 3)):
+            words.extend(rng.choice(sentences).split())
+
+        turn_start = current_time
+        word_time = turn_start
+        for word in words:
+            word_duration = rng.uniform(0.6, 1.0) / WORDS_PER_SECOND
+            word_segments.append({'start': word_time, 'end': word_time + word_duration, 'text': word})
+            word_time += word_duration + rng.uniform(0.0, 0.15)
+        turn_end = min(word_time, duration_seconds)
+        speaker_turns.append({'start': turn_start, 'end': turn_end, 'speaker': speaker})
+
+        # 다음 화자는 조금 겹치거나(끼어들기), 바로 이어지거나, 잠시 침묵 뒤에 말합니다.
+        current_time = turn_end + rng.choice((-0.3, 0.2, 0.5, 1.0, 2.5))
+        turn_index += 1
+
+    word_segments = [word for word in word_segments if word['end'] <= duration_seconds]
+    return speaker_turns, word_segments
+
+
+def write_synthetic_audio(path, speaker_turns, duration_seconds, sample_rate=16000, seed=0):
+    """
+    화자 구간마다 화자별 음높이의 톤과 약한 잡음을 넣은 16bit 모노 WAV 파일을 만듭니다.
+    디코딩 같은 오디오 단계의 성능 측정용이며 음성 인식 결과는 의미가 없습니다.
+    """
+    rng = np.random.default_rng(seed)
+    waveform = (rng.standard_normal(int(duration_seconds * sample_rate)) * 0.005).astype(np.float32)
+    for turn in speaker_turns:
+        start, end = int(turn['start'] * sample_rate), int(turn['end'] * sample_rate)
+        frequency = 180.0 if turn['speaker'] == SPEAKERS[0] else 240.0
+        t = np.arange(end - start) / sample_rate
+        waveform[start:end] += 0.3 * np.sin(2 * np.pi * frequency * t).astype(np.float32)
+
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
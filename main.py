@@ -1,30 +1,47 @@
 import click
 import json
 import logging
-from src.pipeline import VoiceAnalysisPipeline
 
 # WARNING 레벨 이상의 로그만 출력하도록 설정
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger('Kss').setLevel(logging.ERROR) # Kss 로그는 에러만 출력
 
 @click.command()
-@click.option('--audio', required=True, type=click.Path(exists=True), help='분석할 음성 파일의 경로')
-def main(audio):
+@click.option('--audio', type=click.Path(exists=True), help='분석할 음성 파일의 경로')
+@click.option('--input-dir', type=click.Path(exists=True, file_okay=False), help='일괄 분석할 음성 파일이 들어 있는 디렉터리')
+@click.option('--manifest', type=click.Path(exists=True, dir_okay=False), help='일괄 분석할 파일 목록 (경로 목록 또는 JSONL)')
+@click.option('--output', default='results.jsonl', show_default=True, type=click.Path(), help='일괄 분석 결과를 기록할 JSONL 파일')
+@click.option('--workers', default=1, show_default=True, type=int, help='일괄 분석 작업 프로세스 수')
+@click.option('--resume/--no-resume', default=True, show_default=True, help='이미 결과 파일에 기록된 세션은 건너뜁니다')
+def main(audio, input_dir, manifest, output, workers, resume):
     """
     음성 파일을 입력받아 전체 분석 과정을 총괄하는 메인 파이프라인 클래스
     """
+    if sum(bool(option) for option in (audio, input_dir, manifest)) != 1:
+        raise click.UsageError("--audio, --input-dir, --manifest 중 하나만 지정해야 합니다.")
+
+    if input_dir or manifest:
+        from src.batch import collect_jobs, run_batch
+        jobs = collect_jobs(input_dir=input_dir, manifest=manifest)
+        summary = run_batch(jobs, output, num_workers=workers, resume=resume)
+        print(f"배치 분석 종료: {json.dumps(summary, ensure_ascii=False)}")
+        return
+
+    from src.pipeline import VoiceAnalysisPipeline
     print(f"분석 파일: {audio}")
     pipeline = VoiceAnalysisPipeline()
-    
+
     try:
         results = pipeline.run(audio)
-        
+
         print("\n---  최종 분석 결과 ---")
         print(json.dumps(results, indent=2, ensure_ascii=False))
         print("-----------------------\n")
-        
+
     except Exception as e:
         print(f"{type(e).__name__}: {e} 발생")
+    finally:
+        pipeline.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,6 @@
 from cog import BasePredictor, Input, Path
-import tempfile
-import requests
 from src.pipeline import VoiceAnalysisPipeline
+from src.ingest import AudioIngestor
 
 class Predictor(BasePredictor):
     def setup(self):
@@ -11,6 +10,8 @@ class Predictor(BasePredictor):
         """
         print("Initializing analysis pipeline...")
         self.pipeline = VoiceAnalysisPipeline()
+        # 다운로드 연결(keep-alive)은 요청마다 새로 만들지 않고 재사용합니다.
+        self.ingestor = AudioIngestor.from_config(self.pipeline.model_config.get('ingest'))
         print("Pipeline initialization complete.")
 
     def predict(
@@ -22,28 +23,14 @@ class Predictor(BasePredictor):
         """
         print(f"Starting analysis for audio URL: {audio}")
 
-        # --- 파일 다운로드 로직 추가 ---
-        try:
-            # stream=True로 대용량 파일도 처리 가능하게, timeout을 300초(5분)로 넉넉하게 설정
-            with requests.get(audio, stream=True, timeout=300) as r:
-                r.raise_for_status() # HTTP 오류가 있으면 예외 발생
-                
-                # 다운로드한 오디오를 저장할 임시 파일 생성
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio_file:
-                    for chunk in r.iter_content(chunk_size=8192): 
-                        temp_audio_file.write(chunk)
-                    
-                    local_audio_path = temp_audio_file.name
-            
-            print(f"Audio downloaded to temporary path: {local_audio_path}")
-
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to download audio file: {e}")
-            raise Exception(f"오디오 파일 다운로드 실패: {e}")
-        # -----------------------------
-
-        # 이제 원격 URL 대신, 로컬에 저장된 임시 파일 경로로 파이프라인 실행
-        results = self.pipeline.run(local_audio_path)
+        # 다운로드하면서 동시에 디코딩하고, 임시 파일은 분석이 끝나면 항상 지웁니다.
+        # 스트리밍 STT 모드는 파일을 구간 단위로 직접 디코딩하므로 미리 디코딩하지 않습니다.
+        decode = self.pipeline.stt_config['mode'] != 'streaming'
+        with self.ingestor.open(audio, decode=decode) as ingested:
+            print(f"Audio ingested. (path: {ingested.path})")
+            results = self.pipeline.run(
+                ingested.path, waveform=ingested.waveform, fingerprint=ingested.fingerprint
+            )
         
         print("Analysis finished.")
-        return results
\ No newline at end of file
+        return results
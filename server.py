@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from src.utils import load_model_config
+
+# WARNING 레벨 이상의 로그만 출력하도록 설정
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger('Kss').setLevel(logging.ERROR) # Kss 로그는 에러만 출력
+
+DEFAULT_SERVER_CONFIG = {
+    'max_concurrent_requests': 4,  # 동시에 분석할 요청 수 (STT 배치 큐를 채우려면 2 이상)
+    'max_queued_requests': 32,     # 분석을 기다릴 수 있는 최대 요청 수, 넘으면 503
+}
+
+
+class RequestQueue:
+    """
+    동시에 분석하는 요청 수를 제한하고, 기다리는 요청 수가 한도를 넘으면 바로 거절합니다.
+    """
+
+    def __init__(self, max_concurrent_requests, max_queued_requests):
+        self.max_queued_requests = max_queued_requests
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.waiting = 0
+        self.running = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.waiting >= self.max_queued_requests:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="분석 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def to_prometheus(self, prefix="feple"):
+        lines = []
+        for name, kind, value, description in (
+            ('requests_waiting', 'gauge', self.waiting, "분석을 기다리는 요청 수"),
+            ('requests_running', 'gauge', self.running, "분석 중인 요청 수"),
+            ('requests_rejected_total', 'counter', self.rejected, "대기열이 가득 차 거절한 요청 수"),
+        ):
+            lines += [f"# HELP {prefix}_{name} {description}", f"# TYPE {prefix}_{name} {kind}", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    from src.pipeline import VoiceAnalysisPipeline
+    server_config = {**DEFAULT_SERVER_CONFIG, **(load_model_config().get('server') or {})}
+    app.state.pipeline = await run_in_threadpool(
+        VoiceAnalysisPipeline, max_concurrent_runs=server_config['max_concurrent_requests']
+    )
+    app.state.request_queue = RequestQueue(**server_config)
+    try:
+        yield
+    finally:
+        await run_in_threadpool(app.state.pipeline.close)
+
+
+app = FastAPI(title="feple-ai", lifespan=lifespan)
+
+
+@app.post("/analyze/")
+async def analyze(file: UploadFile = File(...)):
+    """
+    업로드한 음성 파일을 분석합니다. 여러 요청이 동시에 들어오면 각 요청의 STT 구간이 배치 큐에서 함께 인식됩니다.
+    """
+    async with app.state.request_queue.slot():
+        suffix = Path(file.filename or '').suffix or '.wav'
+        fd, audio_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while chunk := await file.read(1 << 20):
+                    f.write(chunk)
+            return await run_in_threadpool(app.state.pipeline.run, audio_path)
+        finally:
+            os.unlink(audio_path)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    pipeline = app.state.pipeline
+    text = pipeline.instrumentation.registry.to_prometheus() + app.state.request_queue.to_prometheus()
+    if pipeline.stt_batcher is not None:
+        text += pipeline.stt_batcher.to_prometheus()
+    return text
+
+
+@app.get("/health")
+async def health():
+    """
+    화자 분리 작업 프로세스가 살아 있고 ping에 응답하는지 확인합니다. 응답하지 않으면 503을 반환합니다.
+    """
+    healthy = await run_in_threadpool(app.state.pipeline.diarization_worker.health_check, 5)
+    body = {"status": "ok" if healthy else "unhealthy", "diarization_worker": healthy}
+    return body if healthy else JSONResponse(body, status_code=503)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def fingerprint_file(path, chunk_size=1 << 20):
+    """
+    음성 파일 내용의 SHA-256 해시를 반환합니다. 파일 이름이 달라도 내용이 같으면 같은 지문이 됩니다.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_key(config):
+    """
+    단계 설정 딕셔너리를 짧은 해시 문자열로 바꿉니다.
+    """
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ArtifactStore:
+    """
+    파이프라인 단계별 결과(화자 구간, 단어 구간, 종합/후처리 대본)를 음성 지문과 단계 설정 기준으로 저장합니다.
+    각 결과는 <root>/<지문 앞 2자리>/<지문>/<단계>-<설정 해시>.json.gz 파일 하나로 보관됩니다.
+    ttl_days가 지난 결과는 지우고, 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 결과부터 지웁니다.
+    (파일 수정 시각을 마지막 사용 시각으로 쓰며, 불러올 때마다 갱신합니다)
+    """
+
+    def __init__(self, root=".artifacts", max_bytes=2 * 1024 ** 3, ttl_days=7, prune_interval=32):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl_days = ttl_days
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._saves_since_prune = 0
+        self.prune()
+
+    @classmethod
+    def from_config(cls, artifact_config):
+        artifact_config = dict(artifact_config or {})
+        if not artifact_config.pop('enabled', False):
+            return None
+        return cls(artifact_config.pop('dir', '.artifacts'), **artifact_config)
+
+    def _path(self, fingerprint, stage, config):
+        return self.root / fingerprint[:2] / fingerprint / f"{stage}-{config_key(config)}.json.gz"
+
+    def load(self, fingerprint, stage, config):
+        """
+        저장된 단계 결과를 반환합니다. 없거나 손상되었으면 None을 반환합니다.
+        """
+        path = self._path(fingerprint, stage, config)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)['data']
+        except FileNotFoundError:
+            # 정리 과정에서 방금 지워진 결과입니다.
+            return None
+        except (OSError, EOFError, ValueError, KeyError):
+            print(f"[경고] 손상된 단계 결과를 무시합니다: {path}")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def save(self, fingerprint, stage, config, data):
+        path = self._path(fingerprint, stage, config)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체하여, 중간에 중단되어도 불완전한 파일이 남지 않도록 합니다.
+        # 같은 결과를 여러 스레드/프로세스가 동시에 저장할 수 있으므로 임시 파일 이름은 mkstemp로 겹치지 않게 만듭니다.
+        fd, temp_path = tempfile.mkstemp(prefix=f"{path.name}.", suffix='.tmp', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                json.dump({'stage': stage, 'config': config, 'data': data}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._saves_since_prune += 1
+            due = self._saves_since_prune >= self.prune_interval
+            if due:
+                self._saves_since_prune = 0
+        # 디렉터리를 훑는 비용을 나누기 위해 일정 횟수의 저장마다 한 번씩 정리합니다.
+        if due:
+            self.prune()
+
+    def prune(self):
+        """
+        보관 기간이 지난 결과와, 크기 한도를 넘는 만큼의 가장 오래 사용되지 않은 결과를 지웁니다.
+        """
+        if not self.root.exists():
+            return
+        now = time.time()
+        expire_before = now - self.ttl_days * 86400 if self.ttl_days is not None else None
+        entries = []
+        for path in self.root.glob('*/*/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # 중단된 저장이 남긴 임시 파일은 하루가 지나면 지웁니다.
+            stale_temp = path.suffix == '.tmp' and stat.st_mtime < now - 86400
+            if stale_temp or (expire_before is not None and stat.st_mtime < expire_before):
+                self._remove(path)
+            elif path.suffix != '.tmp':
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+        # 비어 있는 지문 디렉터리를 지웁니다. 다른 스레드가 방금 만든 디렉터리는 저장 중일 수 있으므로 남겨 둡니다.
+        for directory in self.root.glob('*/*'):
+            try:
+                if directory.stat().st_mtime < now - 3600:
+                    directory.rmdir()
+                    directory.parent.rmdir()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from src.llm_evaluator import (
+    SENTIMENT_BATCH_TOKEN_BUDGET, CONVERSATION_TOKEN_BUDGET, SUMMARY_CHUNK_TOKEN_BUDGET, response_text,
+    conversation_lines, needs_summary, default_session_analysis,
+    build_session_analysis_request, parse_session_analysis,
+    build_segment_summary_request, parse_segment_summary, summary_lines,
+    build_sentiment_request, parse_sentiment,
+    chunk_sentences, build_sentiment_batch_request, parse_sentiment_batch, cached_response,
+    new_usage_stats, record_usage
+)
+from src.llm_cache import LLMResponseCache
+
+
+def retryable_errors():
+    """
+    재시도할 만한 일시적 오류 목록입니다. openai는 가져오는 데 시간이 걸리므로 클라이언트를 만들 때 가져옵니다.
+    """
+    import openai
+    return (
+        asyncio.TimeoutError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+class AsyncLLMEvaluator:
+    """
+    AsyncOpenAI 기반의 비동기 LLM 평가기입니다.
+    전용 이벤트 루프 스레드에서 한 세션의 모든 LLM 요청(대화 분석과 문제 해결력 통합 평가, 감정 분석)을
+    세마포어로 동시 실행 수를 제한하며 병렬로 실행합니다. 요청마다 제한 시간과 지터가 있는 지수 백오프 재시도를 적용합니다.
+    토큰 예산을 넘는 긴 통화는 구간 요약을 병렬로 만든 뒤(map) 요약으로 최종 평가합니다(reduce).
+    """
+
+    def __init__(self, max_concurrency=8, timeout=30, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 sentiment_batch_tokens=SENTIMENT_BATCH_TOKEN_BUDGET, conversation_token_budget=CONVERSATION_TOKEN_BUDGET,
+                 summary_chunk_tokens=SUMMARY_CHUNK_TOKEN_BUDGET, base_url=None, cache=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sentiment_batch_tokens = sentiment_batch_tokens
+        self.conversation_token_budget = conversation_token_budget
+        self.summary_chunk_tokens = summary_chunk_tokens
+        self.cache = cache
+
+        load_dotenv()
+        self._api_key = os.getenv("OPENAI_API_KEY")
+        # base_url이 없으면 OpenAI 클라이언트가 OPENAI_BASE_URL 환경 변수를 사용합니다. (로컬 호환 서버 테스트용)
+        self._base_url = base_url
+        if not self._api_key:
+            print("[경고] OPENAI_API_KEY가 설정되지 않았습니다. LLM 기반 평가는 건너뜁니다.")
+
+        self.client = None
+        self._semaphore = None
+        self._retryable_errors = ()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-evaluator-loop", daemon=True)
+        self._thread.start()
+        if self._api_key:
+            asyncio.run_coroutine_threadsafe(self._init_client(), self._loop).result()
+
+    @classmethod
+    def from_config(cls, llm_config):
+        llm_config = dict(llm_config or {})
+        cache = LLMResponseCache.from_config(llm_config.pop('cache', None))
+        return cls(cache=cache, **llm_config)
+
+    async def _init_client(self):
+        # 클라이언트와 세마포어는 이벤트 루프 스레드 안에서 만들어 같은 루프에 묶이도록 합니다.
+        # 재시도는 아래 _complete()에서 직접 처리하므로 클라이언트 자체 재시도는 끕니다.
+        import openai
+        self._retryable_errors = retryable_errors()
+        self.client = openai.AsyncOpenAI(
+            api_key=self._api_key, base_url=self._base_url, timeout=self.timeout, max_retries=0
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _complete(self, request, parse, usage):
+        """
+        캐시된 응답이 있으면 재사용하고, 없으면 재시도를 포함해 API를 호출합니다. 파싱에 성공한 응답만 캐시에 저장합니다.
+        호출 수, 토큰, 캐시 적중 수는 요청한 세션의 usage(new_usage_stats())에만 기록합니다.
+        캐시는 SQLite 디스크 I/O를 하므로 이벤트 루프를 막지 않도록 기본 스레드 풀에서 조회하고 저장합니다.
+        """
+        loop = asyncio.get_running_loop()
+        key, result = await loop.run_in_executor(
+            None, cached_response, self.cache, request, parse, usage['cache']
+        )
+        if result is not None:
+            return result
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    start_time = time.perf_counter()
+                    response = await asyncio.wait_for(self.client.responses.create(**request), timeout=self.timeout)
+                record_usage(usage, response, time.perf_counter() - start_time)
+                text = response_text(response)
+                result = parse(text)
+                if key is not None:
+                    await loop.run_in_executor(None, self.cache.set, key, text, usage['cache'])
+                return result
+            except self._retryable_errors:
+                if attempt == self.max_retries:
+                    usage['failures'] += 1
+                    raise
+                usage['retries'] += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+    async def get_session_analysis(self, transcript, include_suggestions, usage):
+        """
+        대화 분석(주제, 결과, 비속어)과 문제 해결 제안 점수를 한 번의 요청으로 평가합니다.
+        대화가 토큰 예산을 넘으면 구간 요약 요청을 동시에 보내고, 요약을 모아 평가합니다.
+        """
+        if not self.client:
+            return default_session_analysis()
+        try:
+            lines = conversation_lines(transcript)
+            profane = 0
+            level = 0
+            while needs_summary(lines, self.conversation_token_budget, level):
+                chunks = chunk_sentences(lines, self.summary_chunk_tokens)
+                summaries = await asyncio.gather(*(
+                    self._complete(
+                        build_segment_summary_request([line for _, line in chunk], part, len(chunks), level > 0),
+                        parse_segment_summary, usage
+                    )
+                    for part, chunk in enumerate(chunks, start=1)
+                ))
+                # 비속어는 원문을 본 구간 요약의 판단도 함께 반영합니다.
+                profane = max([profane] + [summary['profane'] for summary in summaries])
+                lines = summary_lines(summaries)
+                level += 1
+            result = await self._complete(
+                build_session_analysis_request("\n".join(lines), include_suggestions, level > 0),
+                lambda text: parse_session_analysis(text, include_suggestions), usage
+            )
+        except Exception as e:
+            print(f"[LLM 대화분석 오류] API 호출 또는 JSON 파싱에 실패했습니다: {e}")
+            return default_session_analysis()
+        if profane:
+            result['conversation_analysis']['profane'] = 1
+        return result
+
+    async def get_sentiment_score(self, text, usage):
+        if not self.client:
+            return 0
+        try:
+            return await self._complete(build_sentiment_request(text), parse_sentiment, usage)
+        except Exception as e:
+            print(f"[LLM 감정분석 오류] API 호출에 실패했습니다: {e}")
+            return 0
+
+    async def _get_sentiment_chunk_scores(self, chunk, usage):
+        try:
+            chunk_scores = await self._complete(
+                build_sentiment_batch_request(chunk),
+                lambda text: parse_sentiment_batch(text, len(chunk)), usage
+            )
+        except Exception as e:
+            print(f"[LLM 감정분석 오류] 배치 요청 또는 JSON 파싱에 실패했습니다: {e}")
+            chunk_scores = {}
+        # 배치 응답에서 빠진 문장만 한 문장씩 다시 요청합니다.
+        missing = [(number, sentence) for number, (_, sentence) in enumerate(chunk, start=1) if number not in chunk_scores]
+        fallback_scores = await asyncio.gather(*(self.get_sentiment_score(sentence, usage) for _, sentence in missing))
+        for (number, _), score in zip(missing, fallback_scores):
+            chunk_scores[number] = score
+        return chunk_scores
+
+    async def get_sentiment_scores(self, sentences, usage):
+        if not self.client:
+            return [0] * len(sentences)
+        chunks = chunk_sentences(sentences, self.sentiment_batch_tokens)
+        chunk_results = await asyncio.gather(*(self._get_sentiment_chunk_scores(chunk, usage) for chunk in chunks))
+        scores = [0] * len(sentences)
+        for chunk, chunk_scores in zip(chunks, chunk_results):
+            for number, (index, _) in enumerate(chunk, start=1):
+                scores[index] = chunk_scores[number]
+        return scores
+
+    async def evaluate_session(self, transcript, customer_sentences, include_suggestions=True):
+        """
+        한 세션에 필요한 모든 LLM 평가를 동시에 실행합니다.
+        결과의 usage에는 이 세션의 요청만 센 호출 수, 토큰, 캐시 적중 수가 담깁니다.
+        (여러 세션이 동시에 실행되는 서버에서도 다른 세션의 호출이 섞이지 않습니다)
+        """
+        usage = new_usage_stats()
+        session_analysis, sentiment_scores = await asyncio.gather(
+            self.get_session_analysis(transcript, include_suggestions, usage),
+            self.get_sentiment_scores(customer_sentences, usage),
+        )
+        return {**session_analysis, 'customer_sentiment_scores': sentiment_scores, 'usage': usage}
+
+    def submit_session(self, transcript, customer_sentences, include_suggestions=True):
+        """
+        세션 평가를 백그라운드 이벤트 루프에 맡기고 concurrent.futures.Future를 즉시 반환합니다.
+        호출한 쪽은 다른 지표를 계산한 뒤 future.result()로 결과를 받습니다.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.evaluate_session(transcript, customer_sentences, include_suggestions), self._loop
+        )
+
+    @property
+    def available(self):
+        """
+        API 키가 있어 실제로 LLM을 호출할 수 있는지 여부입니다.
+        """
+        return self.client is not None
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else None
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+        if self.client is not None:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+            self.client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
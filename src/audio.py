@@ -0,0 +1,323 @@
+import os
+import sys
+import tempfile
+import numpy as np
+from multiprocessing import shared_memory
+
+SAMPLE_RATE = 16000
+
+
+def decode_audio(audio_path, sr=SAMPLE_RATE):
+    """
+    음성 파일을 한 번만 디코딩하여 16kHz 모노 float32 배열로 반환합니다.
+    """
+    import librosa
+    waveform, _ = librosa.load(audio_path, sr=sr, mono=True)
+    return np.ascontiguousarray(waveform, dtype=np.float32)
+
+
+def _attach_untracked(name):
+    """
+    공유 메모리에 resource_tracker 등록 없이 연결합니다. 공유 메모리의 정리(unlink)는 생성한 프로세스가 맡습니다.
+    Python 3.13 미만에서는 연결만 해도 resource_tracker에 등록되는데, 연결한 쪽에서 unregister하면
+    spawn 자식이 부모와 같은 tracker를 쓰므로 생성한 쪽의 등록까지 지워져 unlink 시 KeyError가 출력됩니다.
+    그래서 연결하는 동안만 등록을 건너뜁니다. (연결은 단일 스레드인 작업 프로세스에서만 합니다)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedWaveform:
+    """
+    디코딩된 파형을 공유 메모리에 올려, 화자 분리 작업 프로세스와 STT가 복사 없이 같은 버퍼를 읽도록 합니다.
+    작업 프로세스에는 handle(공유 메모리 이름, 길이, 샘플링 레이트)만 전달됩니다.
+    """
+
+    def __init__(self, waveform, sample_rate=SAMPLE_RATE):
+        waveform = np.asarray(waveform, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.length = len(waveform)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(waveform.nbytes, 1))
+        self._array = np.ndarray((self.length,), dtype=np.float32, buffer=self._shm.buf)
+        self._array[:] = waveform
+
+    @property
+    def array(self):
+        return self._array
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    @property
+    def handle(self):
+        return {'name': self._shm.name, 'length': self.length, 'sample_rate': self.sample_rate}
+
+    @staticmethod
+    def attach(handle):
+        """
+        다른 프로세스에서 handle로 공유 메모리에 연결합니다. (공유 메모리 객체, 파형 배열)을 반환합니다.
+        """
+        shm = _attach_untracked(handle['name'])
+        array = np.ndarray((handle['length'],), dtype=np.float32, buffer=shm.buf)
+        return shm, array
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # 외부에서 아직 배열을 참조하고 있으면 매핑은 참조가 사라질 때 해제됩니다.
+            pass
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def stream_audio(audio_path, block_seconds=5, sr=SAMPLE_RATE, channels=1):
+    """
+    ffmpeg로 음성 파일을 16kHz float32 블록 단위로 디코딩하여 차례로 반환합니다.
+    파일 전체를 메모리에 올리지 않으므로 녹음 길이와 관계없이 메모리 사용량이 일정합니다.
+    channels가 1이면 모노 1차원 배열을, 2 이상이면 (샘플 수, 채널 수) 배열을 반환합니다.
+    """
+    import subprocess
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', str(audio_path),
+        '-f', 'f32le', '-ac', str(channels), '-ar', str(sr), '-'
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    block_bytes = int(block_seconds * sr) * channels * 4
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                finished = True
+                break
+            block = np.frombuffer(data, dtype=np.float32)
+            yield block if channels == 1 else block.reshape(-1, channels)
+    finally:
+        process.stdout.close()
+        if not finished:
+            process.kill()
+        stderr = process.stderr.read().decode('utf-8', errors='replace')
+        process.stderr.close()
+        if process.wait() != 0 and finished:
+            raise RuntimeError(f"ffmpeg 디코딩에 실패했습니다: {stderr.strip()}")
+
+
+class PipeDecoder:
+    """
+    ffmpeg의 표준 입력으로 음성 파일 바이트를 조금씩 넣으면서 동시에 16kHz 모노 float32로 디코딩합니다.
+    다운로드와 디코딩을 겹치기 위해 사용하며, 출력은 별도 스레드가 읽어 모아 둡니다.
+    moov가 파일 끝에 있는 m4a처럼 파이프로 디코딩할 수 없는 형식이면 finish()가 RuntimeError를 발생시킵니다.
+    """
+
+    def __init__(self, sr=SAMPLE_RATE):
+        import subprocess
+        import threading
+        self.failed = False
+        self._buffer = bytearray()
+        self._stderr = b''
+        self._process = subprocess.Popen(
+            ['ffmpeg', '-v', 'error', '-i', 'pipe:0', '-f', 'f32le', '-ac', '1', '-ar', str(sr), 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        self._reader = threading.Thread(target=self._read_output, name="ffmpeg-pipe-reader", daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        for data in iter(lambda: self._process.stdout.read(1 << 16), b''):
+            self._buffer += data
+        self._stderr = self._process.stderr.read()
+
+    def feed(self, data):
+        if self.failed:
+            return
+        try:
+            self._process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            # ffmpeg가 먼저 종료되었습니다. 원인은 finish()에서 알려 줍니다.
+            self.failed = True
+
+    def finish(self):
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            self.failed = True
+        self._reader.join()
+        if self._process.wait() != 0 or self.failed:
+            stderr = self._stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg 파이프 디코딩에 실패했습니다: {stderr}")
+        return np.frombuffer(self._buffer, dtype=np.float32)
+
+    def abort(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        for stream in (self._process.stdin, self._process.stdout, self._process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self._process.wait()
+
+
+def decode_bytes(data, sr=SAMPLE_RATE):
+    """
+    메모리에 있는 음성 파일 바이트를 임시 파일 없이 디코딩합니다.
+    """
+    decoder = PipeDecoder(sr)
+    try:
+        decoder.feed(bytes(data))
+        return decoder.finish()
+    except Exception:
+        decoder.abort()
+        raise
+
+
+class SpooledWaveform:
+    """
+    스트리밍 모드에서 ffmpeg로 블록 단위 디코딩한 16kHz 파형을 임시 파일(float32)에 한 번 기록합니다.
+    기록하는 동안 메모리에는 한 블록만 올라가고, 화자 분리 작업 프로세스와 STT는 파일을 메모리 매핑(np.memmap)으로 읽습니다.
+    읽은 페이지는 운영체제가 필요할 때 회수할 수 있는 페이지 캐시로만 남으므로, 녹음 길이는 디스크 사용량(초당 64KB)에만 영향을 줍니다.
+    작업 프로세스에는 handle(파일 경로, 길이, 샘플링 레이트)만 전달됩니다.
+    """
+
+    def __init__(self, audio_path, block_seconds=5, sample_rate=SAMPLE_RATE, dir=None):
+        self.sample_rate = sample_rate
+        self.length = 0
+        fd, self.path = tempfile.mkstemp(suffix='.f32', dir=dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for block in stream_audio(audio_path, block_seconds, sample_rate):
+                    f.write(block.tobytes())
+                    self.length += len(block)
+        except BaseException:
+            os.remove(self.path)
+            raise
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    @property
+    def handle(self):
+        return {'path': self.path, 'length': self.length, 'sample_rate': self.sample_rate}
+
+    @staticmethod
+    def attach(handle):
+        """
+        다른 프로세스에서 handle로 파형 파일을 메모리 매핑합니다.
+        쓰기 시 복사(copy-on-write) 모드로 열어 torch.from_numpy()가 읽기 전용 경고 없이 복사하지 않고 감쌀 수 있게 합니다.
+        """
+        if not handle['length']:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(handle['path'], dtype=np.float32, mode='c', shape=(handle['length'],))
+
+    def blocks(self, block_seconds=5):
+        """
+        파형 파일을 block_seconds 단위 배열로 차례로 반환합니다. (stream_audio와 같은 형식)
+        """
+        if not self.length:
+            return
+        waveform = np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.length,))
+        block = int(block_seconds * self.sample_rate)
+        for start in range(0, self.length, block):
+            yield np.array(waveform[start:start + block])
+
+    def close(self):
+        if self.path is None:
+            return
+        # Linux에서는 작업 프로세스가 아직 매핑 중이어도 매핑이 풀릴 때 디스크 공간이 반환됩니다.
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def probe_duration(audio_path):
+    """
+    음성 파일 전체를 디코딩하지 않고 길이(초)를 구합니다.
+    """
+    import librosa
+    return librosa.get_duration(path=str(audio_path))
+
+
+def find_silence_cut(waveform, target, search, sr=SAMPLE_RATE):
+    """
+    target 직전 search 샘플 구간에서 말소리가 없는 지점을 찾아 자를 위치(샘플 인덱스)를 반환합니다.
+    Silero VAD로 찾은 가장 긴 무음 구간의 가운데를 고르고, 무음이 없으면 에너지가 가장 낮은 프레임을 고릅니다.
+    """
+    from faster_whisper.vad import get_speech_timestamps
+
+    start = max(0, target - search)
+    region = waveform[start:target]
+    speech_chunks = get_speech_timestamps(region, sampling_rate=sr)
+    if not speech_chunks:
+        return target
+
+    gaps = []
+    previous_end = 0
+    for chunk in speech_chunks:
+        gaps.append((chunk['start'] - previous_end, previous_end, chunk['start']))
+        previous_end = chunk['end']
+    gaps.append((len(region) - previous_end, previous_end, len(region)))
+    width, gap_start, gap_end = max(gaps)
+    if width > 0:
+        return start + (gap_start + gap_end) // 2
+
+    frame = int(0.03 * sr)
+    n_frames = len(region) // frame
+    if n_frames == 0:
+        return target
+    energy = (region[:n_frames * frame].reshape(n_frames, frame) ** 2).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def speech_chunks(waveform, max_seconds=30, sr=SAMPLE_RATE):
+    """
+    Silero VAD로 찾은 말소리 구간을 max_seconds를 넘지 않도록 이어 붙여 [(시작, 끝) 샘플 인덱스] 목록으로 반환합니다.
+    Whisper는 30초 창 단위로 인식하므로, 배치 인식에 넣을 구간을 만들 때 사용합니다.
+    max_seconds보다 긴 말소리 구간은 그 길이마다 잘라서 나눕니다.
+    """
+    from faster_whisper.vad import get_speech_timestamps
+
+    max_samples = int(max_seconds * sr)
+    chunks = []
+    chunk_start = chunk_end = None
+    for speech in get_speech_timestamps(waveform, sampling_rate=sr):
+        start, end = speech['start'], speech['end']
+        if chunk_start is not None and end - chunk_start <= max_samples:
+            chunk_end = end
+            continue
+        if chunk_start is not None:
+            chunks.append((chunk_start, chunk_end))
+        while end - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        chunk_start, chunk_end = start, end
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
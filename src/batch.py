@@ -0,0 +1,151 @@
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from pathlib import Path
+
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.flac', '.ogg', '.aac', '.webm'}
+
+
+def collect_jobs(input_dir=None, manifest=None):
+    """
+    디렉터리 또는 매니페스트 파일에서 분석할 작업 목록을 만듭니다.
+    매니페스트는 한 줄에 파일 경로 하나를 적은 텍스트 파일이거나, {"id": ..., "audio": ...} 형식의 JSONL 파일입니다.
+    상대 경로는 매니페스트 파일의 위치를 기준으로 해석합니다.
+    """
+    jobs = []
+    if input_dir:
+        root = Path(input_dir)
+        for path in sorted(root.rglob('*')):
+            if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS:
+                jobs.append({'id': str(path.relative_to(root)), 'audio': str(path)})
+    if manifest:
+        manifest_path = Path(manifest)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('{'):
+                    entry = json.loads(line)
+                    audio = entry['audio']
+                    job_id = str(entry.get('id', audio))
+                else:
+                    audio = line
+                    job_id = line
+                audio_path = Path(audio)
+                if not audio_path.is_absolute():
+                    audio_path = manifest_path.parent / audio_path
+                jobs.append({'id': job_id, 'audio': str(audio_path)})
+    return jobs
+
+
+def load_completed_ids(output_path):
+    """
+    이미 결과 파일에 성공적으로 기록된 작업 ID를 읽어옵니다. 중간에 끊긴 마지막 줄은 무시합니다.
+    """
+    completed = set()
+    path = Path(output_path)
+    if not path.exists():
+        return completed
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('status') == 'ok':
+                completed.add(record['id'])
+    return completed
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, 2)
+        return f.read(1) == b'\n'
+
+
+def batch_worker_loop(job_queue, result_queue):
+    """
+    배치 작업 프로세스의 본체입니다. 파이프라인을 한 번만 초기화하고 큐에서 받은 파일을 차례로 분석합니다.
+    """
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('Kss').setLevel(logging.ERROR)
+    from src.pipeline import VoiceAnalysisPipeline
+
+    pipeline = VoiceAnalysisPipeline()
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            start_time = time.time()
+            try:
+                results = pipeline.run(job['audio'])
+                record = {'id': job['id'], 'audio': job['audio'], 'status': 'ok', 'result': results}
+            except Exception as e:
+                record = {'id': job['id'], 'audio': job['audio'], 'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+            record['elapsed'] = round(time.time() - start_time, 2)
+            result_queue.put(record)
+    finally:
+        pipeline.close()
+
+
+def run_batch(jobs, output_path, num_workers=1, resume=True, queue_size=None):
+    """
+    여러 작업 프로세스로 음성 파일들을 병렬 분석하고, 끝나는 순서대로 결과를 JSONL 파일에 기록합니다.
+    resume=True이면 결과 파일에 이미 성공으로 기록된 작업은 건너뜁니다.
+    """
+    completed = load_completed_ids(output_path) if resume else set()
+    pending_jobs = [job for job in jobs if job['id'] not in completed]
+    summary = {'total': len(jobs), 'skipped': len(jobs) - len(pending_jobs), 'ok': 0, 'error': 0}
+    print(f"배치 분석: 전체 {summary['total']}건, 건너뜀 {summary['skipped']}건, 처리 대상 {len(pending_jobs)}건")
+    if not pending_jobs:
+        return summary
+
+    num_workers = max(1, min(num_workers, len(pending_jobs)))
+    queue_size = queue_size or num_workers * 2
+    ctx = multiprocessing.get_context('spawn')
+    job_queue = ctx.Queue(maxsize=queue_size)
+    result_queue = ctx.Queue(maxsize=queue_size)
+
+    # 작업 프로세스가 각자 화자 분리 작업 프로세스를 띄우므로 daemon으로 만들지 않습니다.
+    workers = [ctx.Process(target=batch_worker_loop, args=(job_queue, result_queue)) for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    def feed_jobs():
+        for job in pending_jobs:
+            job_queue.put(job)
+        for _ in workers:
+            job_queue.put(None)
+
+    feeder = threading.Thread(target=feed_jobs, daemon=True)
+    feeder.start()
+
+    received = 0
+    mode = 'a' if resume else 'w'
+    with open(output_path, mode, encoding='utf-8') as out:
+        if mode == 'a' and out.tell() > 0 and not _ends_with_newline(output_path):
+            out.write('\n')
+        while received < len(pending_jobs):
+            try:
+                record = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    print("[경고] 모든 작업 프로세스가 종료되어 배치를 중단합니다.")
+                    break
+                continue
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            received += 1
+            summary[record['status']] += 1
+            print(f"[{received}/{len(pending_jobs)}] {record['id']} - {record['status']} ({record['elapsed']}s)")
+
+    for worker in workers:
+        worker.join(timeout=30)
+        if worker.is_alive():
+            worker.terminate()
+    return summary
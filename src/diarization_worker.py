@@ -0,0 +1,450 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+import multiprocessing
+
+DEFAULT_DIARIZATION_CONFIG = {
+    'embed_model': 'xvec',
+    'cluster_method': 'sc',
+    'window': 0.7,
+    'period': 0.35,
+    'num_speakers': 2,
+    'startup_timeout': 600,
+    'job_timeout': 3600,
+    'max_restarts': 3,
+    'workers': None,
+}
+
+
+def _segments_to_turns(segments):
+    return [
+        {'start': seg['start'], 'end': seg['end'], 'speaker': f"SPEAKER_{seg['label']:02d}"}
+        for seg in segments
+    ]
+
+
+def _diarize_waveform(diarizer, waveform, fs, num_speakers):
+    """
+    16kHz 파형 배열로 화자 분리를 수행합니다.
+    Diarizer.diarize()는 파일 경로만 받아 음성을 다시 디코딩하므로, 파일 로드 이후 단계를 그대로 호출합니다.
+    VAD와 임베딩은 파형을 구간 단위로 잘라 읽으므로, 메모리 매핑된 파형은 필요한 부분만 읽힙니다.
+    """
+    import torch
+
+    signal = torch.from_numpy(waveform).unsqueeze(0)
+    speech_ts = diarizer.vad(signal[0])
+    if len(speech_ts) < 1:
+        raise ValueError("음성 구간을 찾지 못했습니다.")
+    embeds, segments = diarizer.recording_embeds(signal, fs, speech_ts)
+    cluster_labels = diarizer.cluster(embeds, n_clusters=num_speakers, threshold=None, enhance_sim=True)
+    cleaned_segments = diarizer.join_segments(cluster_labels, segments)
+    cleaned_segments = diarizer.make_output_seconds(cleaned_segments, fs)
+    return diarizer.join_samespeaker_segments(cleaned_segments, silence_tolerance=0.2)
+
+
+def _diarize_shared_waveform(diarizer, handle, num_speakers):
+    """
+    공유 메모리의 16kHz 파형으로 화자 분리를 수행합니다.
+    """
+    from src.audio import SharedWaveform
+
+    shm, waveform = SharedWaveform.attach(handle)
+    try:
+        return _diarize_waveform(diarizer, waveform, handle['sample_rate'], num_speakers)
+    finally:
+        del waveform
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _diarize_spooled_waveform(diarizer, handle, num_speakers):
+    """
+    스트리밍 모드에서 임시 파일에 기록한 16kHz 파형을 메모리 매핑으로 읽어 화자 분리를 수행합니다.
+    """
+    from src.audio import SpooledWaveform
+
+    waveform = SpooledWaveform.attach(handle)
+    try:
+        return _diarize_waveform(diarizer, waveform, handle['sample_rate'], num_speakers)
+    finally:
+        del waveform
+
+
+def diarization_worker_loop(job_queue, result_queue, config):
+    """
+    상주 화자 분리 프로세스의 본체입니다.
+    Diarizer(x-vector 모델)를 한 번만 생성한 뒤, 작업 큐에서 요청을 받아 처리합니다.
+    """
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        from simple_diarizer.diarizer import Diarizer
+        diarizer = Diarizer(
+            embed_model=config['embed_model'],
+            cluster_method=config['cluster_method'],
+            window=config['window'],
+            period=config['period']
+        )
+    except Exception as e:
+        result_queue.put(('init_error', None, e))
+        return
+    result_queue.put(('ready', None, None))
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        job_id, kind, payload = job
+        if kind == 'ping':
+            result_queue.put(('pong', job_id, None))
+            continue
+        try:
+            print("[1/4] 화자 분리 (simple_diarizer)")
+            start_time = time.time()
+            if kind == 'diarize_shared':
+                segments = _diarize_shared_waveform(diarizer, payload, config['num_speakers'])
+            elif kind == 'diarize_spooled':
+                segments = _diarize_spooled_waveform(diarizer, payload, config['num_speakers'])
+            else:
+                segments = diarizer.diarize(payload, num_speakers=config['num_speakers'])
+            result_queue.put(('ok', job_id, {
+                'turns': _segments_to_turns(segments),
+                'elapsed': time.time() - start_time
+            }))
+        except Exception as e:
+            result_queue.put(('error', job_id, e))
+
+
+class DiarizationWorker:
+    """
+    화자 분리 모델을 메모리에 올려 둔 채 계속 살아 있는 작업 프로세스 하나를 관리합니다.
+    작업은 큐로 전달되고, 프로세스가 비정상 종료되면 자동으로 재시작한 뒤 진행 중이던 작업을 다시 보냅니다.
+    여러 요청 스레드가 동시에 종료를 발견해도 재시작은 한 번만 일어나도록, 재시작마다 세대(generation)를 올리고
+    발견한 세대가 현재 세대와 같을 때만 재시작합니다.
+    처리 중인 작업이 job_timeout보다 오래 끝나지 않으면 프로세스가 멈춘 것으로 보고, 그 작업을 실패로 처리한 뒤
+    프로세스를 종료하고 재시작하여 뒤에 줄 선 작업을 새 프로세스로 다시 보냅니다.
+    """
+
+    def __init__(self, config=None):
+        self.config = {**DEFAULT_DIARIZATION_CONFIG, **(config or {})}
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._job_queue = None
+        self._result_queue = None
+        self._job_ids = itertools.count()
+        self._pending = {}
+        self._results = {}
+        self._discarded = set()
+        self._lock = threading.Lock()
+        # 결과 큐는 한 스레드씩 읽되, 읽으며 기다리는 동안 작업 상태 잠금(_lock)은 잡지 않아 다른 스레드의 작업 제출을 막지 않습니다.
+        self._read_lock = threading.Lock()
+        # 프로세스 시작/재시작은 모델 로딩을 기다리므로 작업 상태 잠금(_lock)과 별도의 잠금으로 한 번에 하나만 진행합니다.
+        self._restart_lock = threading.RLock()
+        self._generation = 0
+        self._restarts = 0
+        # 작업 프로세스가 마지막으로 진행을 보인 시각입니다. (결과 도착, 재시작 완료, 대기 작업이 없을 때의 제출)
+        # 대기 작업이 있는데 이 시각부터 job_timeout이 지나면 처리 중인 작업이 멈춘 것으로 봅니다.
+        self._last_progress = time.time()
+
+    def start(self, wait=True):
+        """
+        작업 프로세스를 띄웁니다. wait=False이면 모델 로딩을 기다리지 않고 바로 돌아오므로,
+        그동안 다른 초기화를 진행한 뒤 wait_until_ready()로 준비 완료를 확인해야 합니다.
+        """
+        with self._restart_lock:
+            self._start_process()
+        if wait:
+            self.wait_until_ready()
+
+    def _start_process(self):
+        self._job_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=diarization_worker_loop,
+            args=(self._job_queue, self._result_queue, self.config),
+            daemon=True
+        )
+        self._process.start()
+        # 새 프로세스가 살아 있는 상태에서 세대를 올려, 그 사이에 종료를 발견한 스레드가 다시 재시작하지 않게 합니다.
+        self._generation += 1
+
+    def wait_until_ready(self):
+        status, _, payload = self._read_result(self.config['startup_timeout'])
+        if status == 'init_error':
+            self._process.join()
+            raise payload
+        if status != 'ready':
+            raise RuntimeError(f"화자 분리 작업 프로세스 초기화 응답이 올바르지 않습니다: {status}")
+        print(f"화자 분리 작업 프로세스 준비 완료. (PID: {self._process.pid})")
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def health_check(self, timeout=10):
+        """
+        작업 프로세스가 살아 있고 ping에 응답하는지 확인합니다.
+        처리 중인 작업이 있으면 ping이 그 뒤에서 기다리게 되므로 ping 대신 작업이 job_timeout 안에 진행 중인지 확인하고,
+        멈춰 있으면 프로세스를 재시작한 뒤 False를 반환합니다.
+        """
+        if not self.is_alive():
+            return False
+        with self._lock:
+            busy = bool(self._pending)
+            generation = self._generation
+        if busy:
+            if self._stalled():
+                self._abort_stalled(generation)
+                return False
+            return True
+        try:
+            job_id = self._submit('ping', None)
+            self.result(job_id, timeout=timeout)
+            return True
+        except (TimeoutError, RuntimeError):
+            return False
+
+    def restart(self, generation=None):
+        """
+        작업 프로세스를 다시 띄우고, 재시작 이전에 보냈던 작업을 새 프로세스에 다시 전달합니다.
+        generation이 주어지면 그 세대의 프로세스가 아직 현재 프로세스일 때만 재시작합니다.
+        (다른 스레드가 이미 재시작했다면 새 프로세스와 그 작업을 건드리지 않습니다)
+        """
+        with self._restart_lock:
+            if generation is not None and generation != self._generation:
+                return
+            print("[경고] 화자 분리 작업 프로세스를 재시작합니다.")
+            # 다른 스레드가 result()에서 새 프로세스의 준비 완료 응답을 가져가지 않도록, 새 큐를 만들기 전부터 결과 큐 읽기를 잠급니다.
+            with self._read_lock:
+                self.close()
+                self._start_process()
+                self.wait_until_ready()
+            with self._lock:
+                self._last_progress = time.time()
+                pending = sorted(self._pending.items())
+            for job_id, (kind, payload) in pending:
+                self._job_queue.put((job_id, kind, payload))
+
+    def _stalled(self):
+        with self._lock:
+            return bool(self._pending) and time.time() - self._last_progress > self.config['job_timeout']
+
+    def _abort_stalled(self, generation):
+        """
+        job_timeout보다 오래 끝나지 않는 작업(가장 먼저 보낸 대기 작업)을 시간 초과로 실패 처리하고,
+        그 작업에 멈춘 작업 프로세스를 종료한 뒤 재시작하여 나머지 대기 작업을 다시 보냅니다.
+        """
+        with self._restart_lock:
+            if generation != self._generation or not self._stalled():
+                return
+            with self._lock:
+                job_id = min(self._pending)
+                self._pending.pop(job_id)
+                if job_id in self._discarded:
+                    self._discarded.discard(job_id)
+                else:
+                    self._results[job_id] = ('error', TimeoutError(
+                        f"화자 분리 작업이 {self.config['job_timeout']}초 안에 끝나지 않아 작업 프로세스를 재시작합니다."
+                    ))
+            print("[경고] 화자 분리 작업이 멈춰 작업 프로세스를 종료합니다.")
+            if self._process is not None and self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self.restart(generation)
+
+    def _recover(self, generation):
+        """
+        종료된 작업 프로세스를 재시작합니다. 연속 재시작 횟수가 max_restarts에 이르면, 프로세스를 계속 죽이는 것으로 보이는
+        가장 먼저 보낸(처리 중이던) 작업을 실패로 처리하고 나머지 작업으로 다시 시작합니다.
+        """
+        with self._restart_lock:
+            if generation != self._generation:
+                return
+            with self._lock:
+                if self._restarts >= self.config['max_restarts'] and self._pending:
+                    job_id = min(self._pending)
+                    self._pending.pop(job_id)
+                    self._results[job_id] = (
+                        'error', RuntimeError("화자 분리 작업 프로세스가 반복적으로 비정상 종료되었습니다.")
+                    )
+                    self._restarts = 0
+                self._restarts += 1
+            self.restart(generation)
+
+    def submit(self, audio_path):
+        """
+        화자 분리 작업을 보내고 작업 ID를 즉시 반환합니다.
+        """
+        return self._submit('diarize', audio_path)
+
+    def submit_shared(self, handle):
+        """
+        공유 메모리에 올라간 파형(SharedWaveform.handle)으로 화자 분리 작업을 보냅니다.
+        """
+        return self._submit('diarize_shared', handle)
+
+    def submit_spooled(self, handle):
+        """
+        임시 파일에 기록된 파형(SpooledWaveform.handle)으로 화자 분리 작업을 보냅니다.
+        """
+        return self._submit('diarize_spooled', handle)
+
+    def _submit(self, kind, payload):
+        with self._restart_lock:
+            if self._process is None:
+                self.start()
+            job_id = next(self._job_ids)
+            with self._lock:
+                if not self._pending:
+                    self._last_progress = time.time()
+                self._pending[job_id] = (kind, payload)
+            # 프로세스가 죽어 있으면 큐에 넣은 작업은 result()에서 재시작할 때 다시 전달됩니다.
+            self._job_queue.put((job_id, kind, payload))
+        return job_id
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def result(self, job_id, timeout=None):
+        """
+        작업 결과를 기다려 반환합니다. 화자 분리 작업의 결과는 {'turns': 화자 구간 목록, 'elapsed': 작업 프로세스 내 소요 시간} 입니다.
+        작업 중 발생한 예외는 그대로 다시 발생시킵니다.
+        기다리는 동안 처리 중인 작업이 job_timeout을 넘기면(이 작업이 아니어도) 작업 프로세스를 종료하고 재시작합니다.
+        """
+        timeout = timeout or self.config['job_timeout']
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                if job_id in self._results:
+                    status, payload = self._results.pop(job_id)
+                    self._pending.pop(job_id, None)
+                    self._restarts = 0
+                    if status == 'error':
+                        raise payload
+                    return payload
+
+                generation = self._generation
+                restart_needed = not self.is_alive()
+                result_queue = self._result_queue
+
+            if not restart_needed:
+                with self._read_lock:
+                    try:
+                        status, finished_id, payload = result_queue.get(timeout=0.5)
+                    except (queue.Empty, OSError, ValueError):
+                        finished_id = None
+                if finished_id is not None:
+                    with self._lock:
+                        self._last_progress = time.time()
+                        if finished_id in self._discarded:
+                            self._discarded.discard(finished_id)
+                        else:
+                            self._results[finished_id] = (status, payload)
+            else:
+                self._recover(generation)
+            if self._stalled():
+                self._abort_stalled(generation)
+                continue
+            if time.time() > deadline:
+                self.discard(job_id)
+                raise TimeoutError(f"화자 분리 작업이 {timeout}초 안에 끝나지 않았습니다.")
+
+    def discard(self, job_id):
+        """
+        더 이상 결과가 필요 없는 작업을 표시합니다. 이후 도착하는 결과는 버려집니다.
+        """
+        with self._lock:
+            self._pending.pop(job_id, None)
+            if self._results.pop(job_id, None) is None:
+                self._discarded.add(job_id)
+
+    def diarize(self, audio_path, timeout=None):
+        return self.result(self.submit(audio_path), timeout=timeout)['turns']
+
+    def _read_result(self, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                return self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("화자 분리 작업 프로세스가 초기화 중 종료되었습니다.")
+        raise TimeoutError(f"화자 분리 작업 프로세스가 {timeout}초 안에 준비되지 않았습니다.")
+
+    def close(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._job_queue.put(None)
+            except (OSError, ValueError):
+                pass
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+        self._process = None
+
+
+class DiarizationWorkerPool:
+    """
+    상주 화자 분리 작업 프로세스 여러 개를 관리합니다. 작업 프로세스는 한 번에 한 건씩 처리하므로,
+    서버처럼 여러 요청을 동시에 분석할 때는 동시 요청 수만큼 작업 프로세스를 두어 화자 분리가 줄 서지 않게 합니다.
+    작업은 대기 중인 작업이 가장 적은 프로세스로 보내고, 작업 ID는 (프로세스 번호, 프로세스 내 작업 ID)입니다.
+    """
+
+    def __init__(self, config=None, size=1):
+        self.config = {**DEFAULT_DIARIZATION_CONFIG, **(config or {})}
+        size = self.config['workers'] or size
+        self.workers = [DiarizationWorker(self.config) for _ in range(max(1, int(size)))]
+        # 동시에 들어온 작업이 같은 프로세스로 몰리지 않도록, 고르기와 보내기를 한 번에 합니다.
+        self._dispatch_lock = threading.Lock()
+
+    def start(self, wait=True):
+        # 모든 프로세스의 모델 로딩이 동시에 진행되도록 먼저 모두 띄운 뒤 기다립니다.
+        for worker in self.workers:
+            worker.start(wait=False)
+        if wait:
+            self.wait_until_ready()
+
+    def wait_until_ready(self):
+        for worker in self.workers:
+            worker.wait_until_ready()
+
+    def is_alive(self):
+        return all(worker.is_alive() for worker in self.workers)
+
+    def health_check(self, timeout=10):
+        return all(worker.health_check(timeout=timeout) for worker in self.workers)
+
+    def _dispatch(self, kind, payload):
+        with self._dispatch_lock:
+            index = min(range(len(self.workers)), key=lambda i: self.workers[i].pending_count())
+            return index, self.workers[index]._submit(kind, payload)
+
+    def submit(self, audio_path):
+        return self._dispatch('diarize', audio_path)
+
+    def submit_shared(self, handle):
+        return self._dispatch('diarize_shared', handle)
+
+    def submit_spooled(self, handle):
+        return self._dispatch('diarize_spooled', handle)
+
+    def result(self, job_id, timeout=None):
+        index, worker_job_id = job_id
+        return self.workers[index].result(worker_job_id, timeout=timeout)
+
+    def discard(self, job_id):
+        index, worker_job_id = job_id
+        self.workers[index].discard(worker_job_id)
+
+    def diarize(self, audio_path, timeout=None):
+        return self.result(self.submit(audio_path), timeout=timeout)['turns']
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
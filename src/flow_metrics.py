@@ -0,0 +1,110 @@
+import numpy as np
+
+from src.transcript import SegmentTable, TurnTable
+
+DEFAULT_FLOW_CONFIG = {
+    'window_seconds': 30,  # 구간별 시계열(timeline)의 구간 길이(초), 0이나 None이면 시계열을 만들지 않음
+}
+
+
+def coverage(starts, ends):
+    """
+    구간들을 시각 순의 경계점(times)과 각 경계점부터 다음 경계점까지 겹쳐 있는 구간 수(counts)로 바꿉니다.
+    counts[k]는 [times[k], times[k + 1]) 동안의 값이며 마지막 경계점 이후는 0입니다.
+    """
+    times = np.concatenate((starts, ends))
+    deltas = np.concatenate((np.ones(len(starts), dtype=np.int32), np.full(len(ends), -1, dtype=np.int32)))
+    order = np.argsort(times, kind='stable')
+    return times[order], np.cumsum(deltas[order])
+
+
+def cumulative_area(times, values, points):
+    """
+    경계점마다 값이 바뀌는 계단 함수(values)를 처음부터 각 지점(points)까지 적분한 값을 반환합니다.
+    적분값은 경계점 사이에서 선형이므로 경계점에서의 누적값을 보간하면 정확한 값이 됩니다.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if not len(times):
+        return np.zeros(points.shape)
+    area = np.concatenate(([0.0], np.cumsum(values[:-1] * np.diff(times))))
+    return np.interp(points, times, area)
+
+
+def _window_sums(times, values, edges):
+    return np.diff(cumulative_area(times, values, edges))
+
+
+def compute_flow_metrics(transcript, speaker_turns, total_duration, window_seconds=30):
+    """
+    대화 흐름 지표를 한 번에 계산합니다.
+
+    - avg_response_latency: 고객 구간 바로 다음 상담사 구간까지의 평균 간격(양수만)
+    - interruption_count: 상담사 구간이 바로 앞 고객 구간이 끝나기 전에 시작한 횟수
+    - silence_ratio: 화자 분리 구간의 합집합(겹친 발화는 한 번만)을 뺀 나머지 시간의 비율
+    - overlap_ratio: 두 구간 이상이 겹친 시간의 비율
+    - talk_ratio: 상담사 발화 시간 대비 고객 발화 시간
+    - timeline: window_seconds 구간마다의 talk_ratio, silence_ratio, avg_response_latency, interruption_count
+      (구간 시작 시각 목록과 지표별 값 목록으로 이루어진 열 형식이며, 응답/끼어들기는 상담사 구간 시작 시각 기준)
+    """
+    transcript = SegmentTable.from_data(transcript)
+    speaker_turns = TurnTable.from_data(speaker_turns)
+
+    durations = transcript.ends - transcript.starts
+    is_agent = transcript.speakers == transcript.speaker_id('Agent')
+    is_customer = transcript.speakers == transcript.speaker_id('Customer')
+
+    # 고객 -> 상담사로 넘어가는 위치의 응답 간격과 끼어들기
+    switches = is_customer[:-1] & is_agent[1:]
+    response_starts = transcript.starts[1:][switches]
+    gaps = response_starts - transcript.ends[:-1][switches]
+    responded = gaps > 0
+    interrupted = response_starts < transcript.ends[:-1][switches]
+
+    # 화자 분리 구간의 겹침 수로 발화 합집합과 겹친 발화를 구합니다. (통화 길이 밖은 제외)
+    turn_times, turn_counts = coverage(speaker_turns.starts, speaker_turns.ends)
+    speech_time, overlap_time = 0.0, 0.0
+    if total_duration > 0:
+        bounds = [0.0, total_duration]
+        speech_time = float(_window_sums(turn_times, turn_counts >= 1, bounds)[0])
+        overlap_time = float(_window_sums(turn_times, turn_counts >= 2, bounds)[0])
+    silence_time = total_duration - speech_time
+
+    agent_talk_time = float(durations[is_agent].sum())
+    customer_talk_time = float(durations[is_customer].sum())
+
+    metrics = {
+        "avg_response_latency": float(gaps[responded].mean()) if responded.any() else 0,
+        "interruption_count": int(np.count_nonzero(interrupted)),
+        "silence_ratio": silence_time / total_duration if total_duration > 0 and silence_time > 0 else 0,
+        "overlap_ratio": overlap_time / total_duration if total_duration > 0 else 0,
+        "talk_ratio": customer_talk_time / agent_talk_time if agent_talk_time else 0,
+    }
+    if not window_seconds or total_duration <= 0:
+        return metrics
+
+    edges = np.append(np.arange(0.0, total_duration, window_seconds), total_duration)
+    window_lengths = np.diff(edges)
+    speech = _window_sums(turn_times, turn_counts >= 1, edges)
+    agent_talk = _window_sums(*coverage(transcript.starts[is_agent], transcript.ends[is_agent]), edges)
+    customer_talk = _window_sums(*coverage(transcript.starts[is_customer], transcript.ends[is_customer]), edges)
+
+    n_windows = len(window_lengths)
+    response_windows = np.clip(np.searchsorted(edges, response_starts, side='right') - 1, 0, n_windows - 1)
+    latency_sums = np.bincount(response_windows[responded], weights=gaps[responded], minlength=n_windows)
+    latency_counts = np.bincount(response_windows[responded], minlength=n_windows)
+    interruptions = np.bincount(response_windows[interrupted], minlength=n_windows)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        talk_ratio = np.where(agent_talk > 0, customer_talk / agent_talk, 0.0)
+        silence_ratio = np.where(window_lengths > 0, np.clip(1 - speech / window_lengths, 0.0, 1.0), 0.0)
+        latency = np.where(latency_counts > 0, latency_sums / latency_counts, 0.0)
+
+    metrics["timeline"] = {
+        "window_seconds": window_seconds,
+        "start": edges[:-1].tolist(),
+        "talk_ratio": talk_ratio.tolist(),
+        "silence_ratio": silence_ratio.tolist(),
+        "avg_response_latency": latency.tolist(),
+        "interruption_count": interruptions.tolist(),
+    }
+    return metrics
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+from src.audio import PipeDecoder, decode_audio, decode_bytes
+
+DEFAULT_INGEST_CONFIG = {
+    'temp_dir': None,                    # 다운로드 임시 파일 디렉터리 (None이면 시스템 임시 디렉터리)
+    'max_temp_bytes': 2 * 1024 ** 3,     # 동시에 진행 중인 다운로드 전체의 임시 디스크 예산
+    'pool_size': 8,                      # 호스트별로 유지할 keep-alive 연결 수
+    'timeout': 300,
+    'max_retries': 3,
+    'chunk_bytes': 1 << 20,
+}
+
+
+class IngestError(RuntimeError):
+    pass
+
+
+class IngestedAudio:
+    """
+    분석에 넘길 입력입니다. path는 디스크의 음성 파일 경로(메모리 입력이면 None),
+    waveform은 미리 디코딩된 16kHz 모노 파형(디코딩하지 않았으면 None), fingerprint는 내용의 SHA-256입니다.
+    """
+
+    def __init__(self, path=None, waveform=None, fingerprint=None):
+        self.path = path
+        self.waveform = waveform
+        self.fingerprint = fingerprint
+
+
+class AudioIngestor:
+    """
+    URL, 로컬 경로, 메모리 바이트를 분석 입력으로 바꿉니다.
+    URL은 keep-alive 연결을 재사용하는 requests.Session으로 내려받으면서, 받은 조각을 곧바로 ffmpeg에 넣어
+    다운로드와 디코딩을 겹칩니다. 내려받은 파일은 임시 디스크 예산 안에서만 보관하고 사용이 끝나면 항상 지웁니다.
+    로컬 경로와 메모리 바이트는 임시 파일을 만들지 않습니다.
+    """
+
+    def __init__(self, temp_dir=None, max_temp_bytes=2 * 1024 ** 3, pool_size=8, timeout=300, max_retries=3,
+                 chunk_bytes=1 << 20):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.temp_dir = temp_dir
+        self.max_temp_bytes = max_temp_bytes
+        self.timeout = timeout
+        self.chunk_bytes = chunk_bytes
+        self._temp_bytes = 0
+        self._lock = threading.Lock()
+
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_config(cls, ingest_config):
+        return cls(**{**DEFAULT_INGEST_CONFIG, **(ingest_config or {})})
+
+    def _reserve(self, size):
+        with self._lock:
+            if self._temp_bytes + size > self.max_temp_bytes:
+                raise IngestError(
+                    f"임시 디스크 예산({self.max_temp_bytes} bytes)을 넘어 다운로드를 중단합니다. "
+                    f"(사용 중: {self._temp_bytes} bytes)"
+                )
+            self._temp_bytes += size
+
+    def _release(self, size):
+        with self._lock:
+            self._temp_bytes -= size
+
+    def temp_bytes_in_use(self):
+        with self._lock:
+            return self._temp_bytes
+
+    @contextmanager
+    def open(self, source, decode=True):
+        """
+        source를 IngestedAudio로 바꿔 with 블록 안에서만 유효하게 제공합니다.
+        decode=True이면 파형을 미리 디코딩해 두고, False이면(스트리밍 STT 모드) 경로만 준비합니다.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = bytes(source)
+            yield IngestedAudio(
+                waveform=decode_bytes(data) if decode else None,
+                fingerprint=hashlib.sha256(data).hexdigest()
+            )
+            return
+
+        source = str(source)
+        parsed = urlparse(source)
+        if parsed.scheme in ('http', 'https'):
+            with self._download(source, decode) as ingested:
+                yield ingested
+            return
+
+        path = parsed.path if parsed.scheme == 'file' else source
+        if not os.path.exists(path):
+            raise IngestError(f"음성 파일을 찾을 수 없습니다: {source}")
+        yield IngestedAudio(path=path)
+
+    @contextmanager
+    def _download(self, url, decode):
+        import requests
+
+        suffix = Path(urlparse(url).path).suffix or '.wav'
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=self.temp_dir)
+        reserved = 0
+        decoder = PipeDecoder() if decode else None
+        digest = hashlib.sha256()
+        try:
+            try:
+                with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    expected = int(response.headers.get('Content-Length') or 0)
+                    if expected:
+                        # 크기를 알면 처음부터 예산을 확보해, 중간까지 받은 뒤 실패하는 일을 줄입니다.
+                        self._reserve(expected)
+                        reserved = expected
+                    with os.fdopen(fd, 'wb') as f:
+                        fd = None
+                        written = 0
+                        for chunk in response.iter_content(chunk_size=self.chunk_bytes):
+                            written += len(chunk)
+                            if written > reserved:
+                                self._reserve(written - reserved)
+                                reserved = written
+                            f.write(chunk)
+                            digest.update(chunk)
+                            if decoder is not None:
+                                decoder.feed(chunk)
+            except requests.exceptions.RequestException as e:
+                raise IngestError(f"오디오 파일 다운로드 실패: {e}") from e
+
+            waveform = None
+            if decoder is not None:
+                try:
+                    waveform = decoder.finish()
+                except RuntimeError as e:
+                    # 파이프로 디코딩할 수 없는 형식은 내려받은 파일에서 다시 디코딩합니다.
+                    print(f"[경고] 다운로드 중 디코딩에 실패하여 파일에서 다시 디코딩합니다: {e}")
+                    waveform = decode_audio(temp_path)
+                decoder = None
+            yield IngestedAudio(path=temp_path, waveform=waveform, fingerprint=digest.hexdigest())
+        finally:
+            if decoder is not None:
+                decoder.abort()
+            if fd is not None:
+                os.close(fd)
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            self._release(reserved)
+
+    def close(self):
+        self.session.close()
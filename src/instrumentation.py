@@ -0,0 +1,382 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_PREFIX = "feple"
+
+
+def peak_rss_bytes():
+    """
+    프로세스 시작 이후 최대 상주 메모리(RSS)를 바이트 단위로 반환합니다. 확인할 수 없으면 None을 반환합니다.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위로 보고합니다.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes():
+    """
+    현재 상주 메모리(RSS)를 바이트 단위로 반환합니다. /proc가 없는 환경에서는 None을 반환합니다.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _cuda():
+    """
+    torch가 이미 로드되어 있고 CUDA를 쓸 수 있을 때만 torch.cuda를 반환합니다. 계측 때문에 torch를 새로 로드하지 않습니다.
+    """
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return None
+    try:
+        return torch.cuda if torch.cuda.is_available() else None
+    except RuntimeError:
+        return None
+
+
+class MemorySampler:
+    """
+    실행 중인 단계들이 있는 동안 현재 RSS와 CUDA 장치 메모리 사용량(전체 - 여유, mem_get_info)을 주기적으로 측정하여
+    단계마다 실행 중에 관측한 최댓값을 기록합니다.
+    getrusage의 ru_maxrss는 프로세스 시작 이후의 최댓값이라 가장 무거운 단계 이후의 모든 단계가 같은 값을 보고하므로,
+    단계별 값은 단계 실행 중에 측정한 현재 RSS로 구합니다.
+    torch.cuda.max_memory_allocated()는 torch 할당자만 세므로 CTranslate2(faster-whisper)가 쓰는 메모리를 놓치고,
+    reset_peak_memory_stats()는 프로세스 전체 카운터를 초기화하므로 동시에 실행 중인 다른 세션의 값을 망가뜨립니다.
+    RSS는 프로세스 전체, CUDA는 장치 전체 사용량이므로 동시에 실행 중인 다른 세션(과 같은 GPU를 쓰는 다른 프로세스)의 사용량도 포함됩니다.
+    측정 주기(interval)보다 짧게 튀는 값은 놓칠 수 있습니다.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self._frames = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cuda_used_bytes(cuda):
+        try:
+            free_bytes, total_bytes = cuda.mem_get_info()
+        except RuntimeError:
+            return None
+        return total_bytes - free_bytes
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        with self._lock:
+            frames = list(self._frames.values())
+        cuda_used = {}
+        for frame in frames:
+            cuda = frame['cuda']
+            if cuda is not None and id(cuda) not in cuda_used:
+                cuda_used[id(cuda)] = self._cuda_used_bytes(cuda)
+        with self._lock:
+            for frame in frames:
+                if rss is not None:
+                    frame['rss_peak'] = max(frame['rss_peak'] or 0, rss)
+                used = cuda_used.get(id(frame['cuda']))
+                if used is not None:
+                    frame['cuda_peak'] = max(frame['cuda_peak'] or 0, used)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._frames:
+                    self._thread = None
+                    return
+            self._sample()
+            time.sleep(self.interval)
+
+    def add(self, frame):
+        with self._lock:
+            self._frames[id(frame)] = frame
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+                self._thread.start()
+        self._sample()
+
+    def remove(self, frame):
+        # 마지막 표본은 상위 단계에도 반영되도록 단계를 빼기 전에 측정합니다.
+        self._sample()
+        with self._lock:
+            self._frames.pop(id(frame), None)
+
+
+_memory_sampler = MemorySampler()
+
+
+class StageRecorder:
+    """
+    분석 한 건(run 호출)의 단계별 소요 시간(초), 메모리 사용량, 처리 건수를 숫자 그대로 기록합니다.
+    단계는 중첩될 수 있으며, RSS와 CUDA 최대 사용량은 실행 중인 모든 단계에 함께 반영되므로 상위 단계는 하위 단계의 값을 포함합니다.
+    """
+
+    def __init__(self, session_id=None, profiler=None):
+        self.session_id = session_id
+        self.profiler = profiler
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        with 블록의 실행 시간, 블록 실행 중에 관측한 최대 RSS와 CUDA 장치 메모리 사용량, 시작과 끝의 RSS 차이를 기록합니다.
+        같은 이름의 단계가 여러 번 실행되면 시간은 더해지고 메모리는 최댓값을 유지합니다.
+        """
+        cuda = _cuda()
+        frame = {'cuda': cuda, 'rss_peak': None, 'cuda_peak': None}
+        _memory_sampler.add(frame)
+        rss_before = current_rss_bytes()
+        start_time = time.perf_counter()
+        profile = self.profiler.start(name) if self.profiler is not None else None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                self.profiler.stop(profile, self.session_id, name)
+            seconds = time.perf_counter() - start_time
+            rss_after = current_rss_bytes()
+            _memory_sampler.remove(frame)
+            entry = {'seconds': seconds, 'rss_peak_bytes': frame['rss_peak']}
+            if rss_before is not None and rss_after is not None:
+                entry['rss_delta_bytes'] = rss_after - rss_before
+            if cuda is not None:
+                entry['cuda_peak_bytes'] = frame['cuda_peak']
+            self._merge_stage(name, entry)
+
+    def record_time(self, name, seconds):
+        """
+        다른 프로세스나 스레드에서 측정한 시간(예: 화자 분리 작업 프로세스)을 단계 시간으로 기록합니다.
+        """
+        self._merge_stage(name, {'seconds': seconds})
+
+    def _merge_stage(self, name, entry):
+        with self._lock:
+            previous = self.stages.get(name)
+            if previous is None:
+                self.stages[name] = dict(entry, calls=1)
+                return
+            previous['seconds'] += entry['seconds']
+            previous['calls'] += 1
+            for key in ('rss_peak_bytes', 'cuda_peak_bytes'):
+                if entry.get(key) is not None:
+                    previous[key] = max(previous.get(key) or 0, entry[key])
+            if 'rss_delta_bytes' in entry:
+                previous['rss_delta_bytes'] = previous.get('rss_delta_bytes', 0) + entry['rss_delta_bytes']
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_counts(self, counts, prefix=''):
+        for name, value in counts.items():
+            self.count(f"{prefix}{name}", value)
+
+    def durations(self):
+        return {name: entry['seconds'] for name, entry in self.stages.items()}
+
+    def report(self):
+        return {
+            'session_id': self.session_id,
+            'pid': os.getpid(),
+            'stages': {name: dict(entry) for name, entry in self.stages.items()},
+            'counters': dict(self.counters),
+            # 프로세스 시작 이후의 최대 RSS입니다. (이 세션만의 값이 아닙니다)
+            'process_rss_peak_bytes': peak_rss_bytes(),
+        }
+
+
+class StageProfiler:
+    """
+    운영 환경에서 선택한 단계만 cProfile로 프로파일링하여 <dir>/<세션 ID>-<단계>.prof 파일로 저장합니다.
+    저장된 파일은 `python -m pstats` 또는 snakeviz로 볼 수 있습니다.
+    cProfile은 한 번에 하나만 활성화할 수 있으므로, 이미 프로파일링 중인 단계 안의 하위 단계는 건너뜁니다.
+    py-spy처럼 외부에서 붙는 샘플링 프로파일러는 계측 결과의 pid로 대상 프로세스를 찾으면 됩니다.
+    """
+
+    def __init__(self, output_dir, stages=None):
+        self.output_dir = Path(output_dir)
+        self.stages = set(stages) if stages else None
+        self._active = False
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        if self.stages is not None and name not in self.stages:
+            return None
+        with self._lock:
+            if self._active:
+                return None
+            self._active = True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 프로파일러(예: 디버거)가 이미 활성화되어 있습니다.
+            with self._lock:
+                self._active = False
+            return None
+        return profile
+
+    def stop(self, profile, session_id, name):
+        profile.disable()
+        with self._lock:
+            self._active = False
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.output_dir / f"{session_id or os.getpid()}-{name.replace('/', '_')}.prof"))
+
+
+class MetricsRegistry:
+    """
+    프로세스가 처리한 모든 세션의 계측 결과를 누적하여 Prometheus 텍스트 형식으로 내보냅니다.
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.stage_cuda_peak = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, recorder):
+        with self._lock:
+            self.sessions += 1
+            for name, entry in recorder.stages.items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + entry['seconds']
+                self.stage_calls[name] = self.stage_calls.get(name, 0) + entry['calls']
+                if entry.get('cuda_peak_bytes') is not None:
+                    self.stage_cuda_peak[name] = max(self.stage_cuda_peak.get(name, 0), entry['cuda_peak_bytes'])
+            for name, value in recorder.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @staticmethod
+    def _label(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {METRIC_PREFIX}_sessions_total 분석이 끝난 세션 수",
+            f"# TYPE {METRIC_PREFIX}_sessions_total counter",
+        ]
+        with self._lock:
+            lines.append(f"{METRIC_PREFIX}_sessions_total {self.sessions}")
+            lines += [
+                f"# HELP {METRIC_PREFIX}_stage_seconds 단계별 누적 소요 시간(초)",
+                f"# TYPE {METRIC_PREFIX}_stage_seconds summary",
+            ]
+            for name in sorted(self.stage_seconds):
+                label = self._label(name)
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{label}"}} {self.stage_seconds[name]}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{label}"}} {self.stage_calls[name]}')
+            lines += [
+                f"# HELP {METRIC_PREFIX}_stage_cuda_peak_bytes 단계 실행 중 CUDA 장치 메모리 최대 사용량(바이트)",
+                f"# TYPE {METRIC_PREFIX}_stage_cuda_peak_bytes gauge",
+            ]
+            for name in sorted(self.stage_cuda_peak):
+                lines.append(
+                    f'{METRIC_PREFIX}_stage_cuda_peak_bytes{{stage="{self._label(name)}"}} {self.stage_cuda_peak[name]}'
+                )
+            lines += [
+                f"# HELP {METRIC_PREFIX}_items_total 처리한 단어, 화자 구간, 문장, LLM 호출/토큰 등의 누적 건수",
+                f"# TYPE {METRIC_PREFIX}_items_total counter",
+            ]
+            for name in sorted(self.counters):
+                lines.append(f'{METRIC_PREFIX}_items_total{{item="{self._label(name)}"}} {self.counters[name]}')
+        peak = peak_rss_bytes()
+        if peak is not None:
+            lines += [
+                f"# HELP {METRIC_PREFIX}_rss_peak_bytes 프로세스 최대 상주 메모리(바이트)",
+                f"# TYPE {METRIC_PREFIX}_rss_peak_bytes gauge",
+                f"{METRIC_PREFIX}_rss_peak_bytes {peak}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def start_prometheus_server(registry, port, host="0.0.0.0"):
+    """
+    /metrics 경로로 registry 내용을 제공하는 HTTP 서버를 데몬 스레드에서 시작합니다.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="prometheus-metrics", daemon=True).start()
+    return server
+
+
+class Instrumentation:
+    """
+    세션마다 StageRecorder를 만들고, 끝난 세션의 결과를 설정된 곳(JSON Lines 파일, Prometheus 파일/엔드포인트)으로 내보냅니다.
+    """
+
+    def __init__(self, log_file=None, prometheus_file=None, prometheus_port=None, profile_dir=None,
+                 profile_stages=None):
+        self.log_file = log_file
+        self.prometheus_file = prometheus_file
+        self.registry = MetricsRegistry()
+        # 설정을 바꾸지 않고도 운영 중인 서버에서 프로파일을 켤 수 있도록 환경 변수를 우선합니다.
+        profile_dir = os.getenv("FEPLE_PROFILE_DIR") or profile_dir
+        self.profiler = StageProfiler(profile_dir, profile_stages) if profile_dir else None
+        self.server = start_prometheus_server(self.registry, int(prometheus_port)) if prometheus_port else None
+
+    @classmethod
+    def from_config(cls, instrumentation_config):
+        return cls(**(instrumentation_config or {}))
+
+    def new_recorder(self, session_id):
+        return StageRecorder(session_id, profiler=self.profiler)
+
+    def publish(self, recorder):
+        """
+        끝난 세션의 계측 결과를 누적하고 파일로 내보냅니다. 내보내기 실패는 분석 결과에 영향을 주지 않습니다.
+        """
+        self.registry.observe(recorder)
+        try:
+            if self.log_file:
+                Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(dict(recorder.report(), timestamp=time.time()), ensure_ascii=False) + "\n")
+            if self.prometheus_file:
+                path = Path(self.prometheus_file)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # node_exporter textfile collector가 쓰다 만 파일을 읽지 않도록 임시 파일을 쓴 뒤 교체합니다.
+                temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                temp_path.write_text(self.registry.to_prometheus(), encoding='utf-8')
+                os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[경고] 계측 결과를 내보내지 못했습니다: {e}")
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
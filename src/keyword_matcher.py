@@ -0,0 +1,98 @@
+import os
+import re
+from src.utils import load_keyword_config
+
+# 완곡 표현(쿠션어 이외) 정규식 패턴
+EUPHONIOUS_PATTERNS = [
+    r'인 것 같습니다', r'ㄹ 것 같습니다', r'일 듯합니다', r'ㄹ지도 모릅니다',
+    r'하기는 어렵습니다', r'ㄹ 수 있을까요\??', r'해 주시겠어요\??',
+    r'드릴까요\??', r'해드릴까요\??', r'부탁드립니다'
+]
+
+# keywords.yaml 중 문장 내 부분 문자열로 찾는 카테고리
+LITERAL_CATEGORIES = ('cushion', 'empathy_patterns')
+
+
+class KeywordMatcher:
+    """
+    keywords.yaml의 문자열 키워드를 하나의 정규식으로, 완곡 표현을 또 하나의 정규식으로 컴파일하여
+    문장당 두 번의 스캔으로 문장에 등장하는 모든 카테고리를 찾습니다.
+    source_path를 지정하면 파일이 바뀌었을 때 reload_if_changed()로 다시 컴파일합니다.
+    """
+
+    def __init__(self, keywords, source_path=None):
+        self.source_path = source_path
+        self._mtime = self._source_mtime()
+        self.keywords, self._compiled = keywords or {}, self._compile(keywords)
+
+    def _source_mtime(self):
+        if self.source_path is None:
+            return None
+        try:
+            return os.stat(self.source_path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _compile(keywords):
+        """
+        (문자열 키워드 정규식, 그룹별 카테고리, 완곡 표현 정규식, 전체 카테고리)를 만들어 반환합니다.
+        완곡 표현은 문자열 키워드와 같은 위치에서 시작해도 놓치지 않도록 별도의 정규식으로 한 번 더 검색합니다.
+        """
+        keywords = keywords or {}
+        literal_categories = {}
+        for category in LITERAL_CATEGORIES:
+            for word in keywords.get(category) or []:
+                literal_categories.setdefault(word, set()).add(category)
+
+        # 같은 위치에서는 가장 긴 키워드 하나만 잡히므로, 그 키워드의 접두어인 키워드의 카테고리도 함께 기록합니다.
+        literals = sorted(literal_categories, key=len, reverse=True)
+        closed_categories = {
+            word: set().union(*(literal_categories[other] for other in literals if word.startswith(other)))
+            for word in literals
+        }
+        group_categories = [frozenset(closed_categories[word]) for word in literals]
+        # 전방 탐색으로 감싸 매 위치에서 검사하므로, 겹치는 키워드도 놓치지 않습니다.
+        literal_pattern = re.compile(
+            '(?=' + '|'.join(f'({re.escape(word)})' for word in literals) + ')'
+        ) if literals else None
+
+        euphonious_pattern = re.compile('|'.join(EUPHONIOUS_PATTERNS)) if EUPHONIOUS_PATTERNS else None
+        all_categories = frozenset().union(*group_categories)
+        if euphonious_pattern is not None:
+            all_categories |= {'euphonious'}
+        return literal_pattern, group_categories, euphonious_pattern, all_categories
+
+    def reload_if_changed(self):
+        """
+        키워드 파일이 수정되었으면 다시 읽어 컴파일합니다. 다시 읽었으면 True를 반환합니다.
+        """
+        mtime = self._source_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        try:
+            keywords = load_keyword_config(self.source_path)
+        except Exception as e:
+            print(f"[경고] 키워드 파일을 다시 읽지 못해 기존 키워드를 유지합니다: {e}")
+            return False
+        compiled = self._compile(keywords)
+        # match()가 이전 키워드와 새 키워드의 정규식을 섞어 쓰지 않도록 한 번에 바꿉니다.
+        self.keywords, self._compiled = keywords or {}, compiled
+        self._mtime = mtime
+        print("키워드 파일 변경을 감지하여 키워드 매처를 다시 컴파일했습니다.")
+        return True
+
+    def match(self, sentence):
+        """
+        문장에 등장하는 카테고리 집합을 반환합니다. ('cushion', 'empathy_patterns', 'euphonious')
+        """
+        literal_pattern, group_categories, euphonious_pattern, all_categories = self._compiled
+        hits = set()
+        if euphonious_pattern is not None and euphonious_pattern.search(sentence):
+            hits.add('euphonious')
+        if literal_pattern is not None:
+            for match in literal_pattern.finditer(sentence):
+                hits |= group_categories[match.lastindex - 1]
+                if hits == all_categories:
+                    break
+        return hits
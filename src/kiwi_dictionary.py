@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+USER_WORD_TAG = 'NNP'
+USER_WORD_SCORE = 0
+
+
+def build_user_dictionary(lexicon, cache_dir=".cache/kiwi"):
+    """
+    감성사전(SentimentLexicon)의 어근 목록을 Kiwi 사용자 사전 파일(형태\\t품사\\t점수)로 한 번만 변환하고 그 경로를 반환합니다.
+    파일 이름에 감성사전 파일 이름(원본 JSON 기준 키)이 들어가므로, 원본이 바뀌지 않았으면 이미 만든 파일을 그대로 사용합니다.
+    """
+    path = Path(cache_dir) / f"user_dict-{lexicon.path.stem}-{USER_WORD_TAG}-{USER_WORD_SCORE}.txt"
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 임시 파일에 쓴 뒤 교체하여, 여러 작업 프로세스가 동시에 만들어도 불완전한 파일을 읽지 않도록 합니다.
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for word in lexicon.words():
+            if word and not any(ch in word for ch in '\t\r\n'):
+                f.write(f"{word}\t{USER_WORD_TAG}\t{USER_WORD_SCORE}\n")
+    os.replace(temp_path, path)
+    return path
+
+
+def add_user_dictionary(kiwi, lexicon, cache_dir=".cache/kiwi"):
+    """
+    캐시된 사용자 사전 파일을 Kiwi에 한 번에 불러옵니다. 추가된 단어 수를 반환합니다.
+    파일을 불러오지 못하면 단어를 하나씩 추가하는 기존 방식으로 대신합니다.
+    """
+    if lexicon is None:
+        return 0
+    path = build_user_dictionary(lexicon, cache_dir)
+    try:
+        return kiwi.load_user_dictionary(str(path))
+    except Exception as e:
+        print(f"[경고] Kiwi 사용자 사전 파일을 불러오지 못해 단어를 하나씩 추가합니다: {e}")
+    added = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.rstrip('\n').split('\t')[0]
+            added += bool(kiwi.add_user_word(word, USER_WORD_TAG, USER_WORD_SCORE))
+    return added
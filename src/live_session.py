@@ -0,0 +1,257 @@
+import heapq
+import itertools
+import time
+import numpy as np
+from src.audio import SAMPLE_RATE, stream_audio
+
+# 채널별 음성 구간 검출(에너지 기반) 기본 설정
+FRAME_SECONDS = 0.02
+ENERGY_THRESHOLD = 0.01     # 프레임 RMS가 이 값 이상이면 말소리로 판단
+MIN_SILENCE_SECONDS = 0.5   # 이 시간 이상 조용하면 발화 구간을 닫음
+MIN_SPEECH_SECONDS = 0.2    # 이보다 짧은 구간은 잡음으로 보고 버림
+
+
+class LiveCallSession:
+    """
+    통화가 진행되는 동안 대본 구간(또는 화자별 채널 오디오)을 조금씩 받아 대화 흐름 지표를 갱신합니다.
+    새 구간 하나마다 O(1)로 평균 응답 지연, 끼어들기 횟수, 발화 비율, 침묵 비율을 갱신하고,
+    snapshot()으로 언제든 현재 값을 꺼낼 수 있습니다. 지표 정의는 MetricsCalculator의 사후 계산과 같습니다.
+
+    오디오 입력은 상담사와 고객이 서로 다른 채널에 녹음된 경우(채널 = 화자)만 지원합니다.
+    모노 녹음은 화자 분리가 끝나야 화자를 알 수 있으므로 대본 구간으로 넣어야 합니다.
+    """
+
+    def __init__(self, session_id=None, channel_speakers=('Agent', 'Customer'), sample_rate=SAMPLE_RATE,
+                 energy_threshold=ENERGY_THRESHOLD, min_silence_seconds=MIN_SILENCE_SECONDS,
+                 min_speech_seconds=MIN_SPEECH_SECONDS):
+        self.session_id = session_id
+        self.channel_speakers = tuple(channel_speakers)
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self.min_silence_seconds = min_silence_seconds
+        self.min_speech_seconds = min_speech_seconds
+
+        self.segment_count = 0
+        self.talk_time = {}
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.interruption_count = 0
+        self.speech_time = 0.0
+        self._speech_intervals = []  # 지금까지 받은 화자 분리 구간의 합집합 (시작 시각 순, 서로 겹치지 않음)
+        self.turn_count = 0
+        self.elapsed = 0.0
+        self._previous_segment = None
+
+        # 채널 오디오 입력 상태
+        self._frame_length = int(FRAME_SECONDS * sample_rate)
+        self._frame_position = 0
+        self._remainder = None
+        self._open_speech = [None] * len(self.channel_speakers)  # 채널별 [시작 시각, 마지막 말소리 시각]
+        # 닫혔지만 더 일찍 시작한 구간이 아직 열려 있어 넘기지 못한 구간 (시작 시각, 순번, 구간)의 힙
+        self._closed_speech = []
+        self._closed_order = itertools.count()
+
+    def add_segment(self, segment):
+        """
+        화자가 정해진 대본 구간({'speaker', 'start_time', 'end_time', ...})을 시간 순서대로 하나 추가합니다.
+        """
+        speaker = segment['speaker']
+        start_time = segment['start_time']
+        end_time = segment['end_time']
+        self.segment_count += 1
+        self.talk_time[speaker] = self.talk_time.get(speaker, 0.0) + (end_time - start_time)
+
+        previous = self._previous_segment
+        if previous is not None and previous['speaker'] == 'Customer' and speaker == 'Agent':
+            latency = start_time - previous['end_time']
+            if latency > 0:
+                self.latency_sum += latency
+                self.latency_count += 1
+            if start_time < previous['end_time']:
+                self.interruption_count += 1
+        self._previous_segment = {'speaker': speaker, 'end_time': end_time}
+        self.advance_to(end_time)
+
+    def add_turn(self, turn):
+        """
+        화자 분리 구간({'start', 'end', 'speaker'})을 하나 추가합니다. 침묵 비율 계산에 쓰입니다.
+        사후 계산과 같이 겹친 발화는 한 번만 더하도록 구간의 합집합을 유지합니다.
+        구간이 끝 시각 순서대로 들어오면 합집합의 끝부분만 고치므로 구간 하나마다 상각 O(1)입니다.
+        """
+        self.turn_count += 1
+        start, end = turn['start'], turn['end']
+        intervals = self._speech_intervals
+        # 새 구간과 겹치는 기존 구간을 끝에서부터 떼어 내 하나로 합칩니다.
+        index = len(intervals)
+        while index > 0 and intervals[index - 1][1] >= start:
+            index -= 1
+        merged_start, merged_end = start, end
+        covered = 0.0
+        kept = []
+        for interval_start, interval_end in intervals[index:]:
+            if interval_start > end:
+                kept.append((interval_start, interval_end))
+                continue
+            covered += interval_end - interval_start
+            merged_start = min(merged_start, interval_start)
+            merged_end = max(merged_end, interval_end)
+        del intervals[index:]
+        intervals.append((merged_start, merged_end))
+        intervals.extend(kept)
+        self.speech_time += (merged_end - merged_start) - covered
+        self.advance_to(end)
+
+    def advance_to(self, seconds):
+        """
+        통화 경과 시간을 갱신합니다. 아무도 말하지 않는 동안에도 침묵 비율이 반영되도록 호출할 수 있습니다.
+        """
+        if seconds > self.elapsed:
+            self.elapsed = seconds
+
+    def add_audio(self, chunk):
+        """
+        화자별 채널 오디오 조각((샘플 수, 채널 수) float32 배열)을 추가합니다.
+        프레임 에너지로 채널마다 발화 구간을 찾고, 닫힌 구간을 시작 시각 순서대로 add_segment()/add_turn()으로 넘깁니다.
+        구간은 끝날 때 닫히므로, 더 일찍 시작한 다른 채널의 구간이 아직 열려 있으면 그 구간이 닫힐 때까지 넘기지 않고 기다립니다.
+        (고객 발화 도중 상담사가 짧게 끼어든 경우 상담사 구간이 먼저 닫히지만, 사후 계산처럼 고객 구간 다음에 넘겨야 끼어들기로 셉니다)
+        반환값은 이번 조각에서 새로 넘긴 구간 목록입니다.
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if chunk.shape[1] != len(self.channel_speakers):
+            raise ValueError(f"채널 수({chunk.shape[1]})가 화자 수({len(self.channel_speakers)})와 다릅니다.")
+        if self._remainder is not None:
+            chunk = np.concatenate([self._remainder, chunk])
+
+        n_frames = len(chunk) // self._frame_length
+        frames = chunk[:n_frames * self._frame_length].reshape(n_frames, self._frame_length, -1)
+        self._remainder = chunk[n_frames * self._frame_length:]
+        voiced = np.sqrt((frames ** 2).mean(axis=1)) >= self.energy_threshold
+
+        frame_seconds = self._frame_length / self.sample_rate
+        for frame_voiced in voiced:
+            frame_start = self._frame_position * frame_seconds
+            self._frame_position += 1
+            frame_end = self._frame_position * frame_seconds
+            for channel, is_voiced in enumerate(frame_voiced):
+                speech = self._open_speech[channel]
+                if is_voiced:
+                    if speech is None:
+                        self._open_speech[channel] = [frame_start, frame_end]
+                    else:
+                        speech[1] = frame_end
+                elif speech is not None and frame_end - speech[1] >= self.min_silence_seconds:
+                    self._open_speech[channel] = None
+                    self._close_speech(channel, speech)
+        self.advance_to(self._frame_position * frame_seconds)
+        return self._flush_closed_speech()
+
+    def finish(self):
+        """
+        오디오 입력이 끝났을 때 열려 있는 발화 구간을 모두 닫습니다.
+        """
+        for channel, speech in enumerate(self._open_speech):
+            if speech is not None:
+                self._close_speech(channel, speech)
+        self._open_speech = [None] * len(self.channel_speakers)
+        return self._flush_closed_speech()
+
+    def _close_speech(self, channel, speech):
+        start_time, end_time = speech
+        if end_time - start_time < self.min_speech_seconds:
+            return
+        segment = {'speaker': self.channel_speakers[channel], 'start_time': start_time, 'end_time': end_time, 'text': ''}
+        heapq.heappush(self._closed_speech, (start_time, next(self._closed_order), segment))
+
+    def _flush_closed_speech(self):
+        """
+        닫힌 구간 중 아직 열려 있는 어떤 구간보다도 먼저 시작한 구간을 시작 시각 순서대로 넘기고 그 목록을 반환합니다.
+        """
+        open_starts = [speech[0] for speech in self._open_speech if speech is not None]
+        flush_before = min(open_starts) if open_starts else float('inf')
+        flushed = []
+        while self._closed_speech and self._closed_speech[0][0] < flush_before:
+            _, _, segment = heapq.heappop(self._closed_speech)
+            self.add_segment(segment)
+            self.add_turn({'start': segment['start_time'], 'end': segment['end_time'], 'speaker': segment['speaker']})
+            flushed.append(segment)
+        return flushed
+
+    def snapshot(self):
+        """
+        현재까지의 대화 흐름 지표를 반환합니다.
+        """
+        silence_time = self.elapsed - self.speech_time
+        agent_talk_time = self.talk_time.get('Agent', 0.0)
+        return {
+            "session_id": self.session_id,
+            "elapsed": self.elapsed,
+            "segment_count": self.segment_count,
+            "avg_response_latency": self.latency_sum / self.latency_count if self.latency_count else 0,
+            "interruption_count": self.interruption_count,
+            "silence_ratio": silence_time / self.elapsed if self.elapsed > 0 and silence_time > 0 else 0,
+            "talk_ratio": self.talk_time.get('Customer', 0.0) / agent_talk_time if agent_talk_time else 0,
+            "talk_time": dict(self.talk_time),
+        }
+
+
+def _wait_until(call_time, started_at, speed, sleep):
+    if speed:
+        delay = started_at + call_time / speed - time.monotonic()
+        if delay > 0:
+            sleep(delay)
+
+
+def replay_transcript(transcript, speaker_turns=None, speed=10.0, snapshot_interval=5.0, session=None, sleep=time.sleep):
+    """
+    저장된 분석 결과(대본, 화자 구간)를 통화 시각에 맞춰 다시 흘려 보내며 스냅샷을 차례로 반환합니다.
+    구간은 끝나는 시점에 도착한 것으로 보고, speed배 빠르게 재생합니다. (speed가 None이나 0이면 기다리지 않음)
+    대본 구간은 add_audio()와 같이 더 일찍 시작한 구간이 모두 끝난 뒤에 대본 순서(시작 시각 순)대로 넘깁니다.
+    snapshot_interval(통화 시각 기준 초)마다 한 번, 그리고 마지막에 한 번 스냅샷을 반환합니다.
+    """
+    session = session or LiveCallSession()
+    events = []
+    released_at = float('-inf')
+    for segment in transcript:
+        released_at = max(released_at, segment['end_time'])
+        events.append((released_at, 0, segment))
+    events += [(turn['end'], 1, turn) for turn in speaker_turns or []]
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    started_at = time.monotonic()
+    next_snapshot = snapshot_interval
+    for event_time, kind, item in events:
+        while next_snapshot <= event_time:
+            _wait_until(next_snapshot, started_at, speed, sleep)
+            session.advance_to(next_snapshot)
+            yield session.snapshot()
+            next_snapshot += snapshot_interval
+        _wait_until(event_time, started_at, speed, sleep)
+        if kind == 0:
+            session.add_segment(item)
+        else:
+            session.add_turn(item)
+    yield session.snapshot()
+
+
+def replay_audio(audio_path, speed=10.0, snapshot_interval=5.0, session=None, block_seconds=0.5, sleep=time.sleep):
+    """
+    화자별 채널로 녹음된 음성 파일을 block_seconds 단위로 흘려 보내며 스냅샷을 차례로 반환합니다.
+    """
+    session = session or LiveCallSession()
+    channels = len(session.channel_speakers)
+    started_at = time.monotonic()
+    received = 0
+    next_snapshot = snapshot_interval
+    for block in stream_audio(audio_path, block_seconds, session.sample_rate, channels=channels):
+        if channels == 1:
+            block = block[:, None]
+        received += len(block)
+        _wait_until(received / session.sample_rate, started_at, speed, sleep)
+        session.add_audio(block)
+        if session.elapsed >= next_snapshot:
+            yield session.snapshot()
+            next_snapshot += snapshot_interval
+    session.finish()
+    yield session.snapshot()
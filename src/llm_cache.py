@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMResponseCache:
+    """
+    LLM 응답을 요청 내용(모델, 지시문, 입력, 파라미터)의 해시로 저장하는 디스크 캐시입니다.
+    SQLite 저장소 앞에 작은 메모리 LRU 계층을 두며, TTL이 지난 항목은 무시하고
+    저장 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+
+    적중 시각(last_access)은 메모리 적중을 포함해 모아 두었다가 저장, 정리 시점이나 touch_batch개가 모였을 때 한 번에 기록합니다.
+    다른 프로세스가 데이터베이스를 잠그고 있으면(sqlite3.OperationalError) 경고만 출력하고 캐시 없이 계속 진행합니다.
+    모든 메서드는 블로킹 I/O이므로 이벤트 루프에서는 run_in_executor로 호출해야 합니다.
+    """
+
+    def __init__(self, path=".cache/llm_responses.sqlite3", ttl_seconds=30 * 24 * 3600,
+                 max_entries=200000, memory_entries=2048, touch_batch=256):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, cache_config):
+        cache_config = dict(cache_config or {})
+        if not cache_config.pop('enabled', True):
+            return None
+        return cls(**cache_config)
+
+    @staticmethod
+    def make_key(request):
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, response, created_at):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _count(self, name, session_stats):
+        self._stats[name] += 1
+        if session_stats is not None:
+            session_stats[name] += 1
+
+    def _touch(self, key, now):
+        self._touched[key] = now
+        if len(self._touched) >= self.touch_batch:
+            self._run_write(self._flush_touched)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _run_write(self, write):
+        """
+        쓰기 작업을 실행하고 커밋합니다. 데이터베이스가 잠겨 있으면 되돌리고 경고만 출력한 뒤 False를 반환합니다.
+        """
+        try:
+            write()
+            self._conn.commit()
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"[경고] LLM 응답 캐시에 기록하지 못했습니다: {e}")
+            try:
+                self._conn.rollback()
+            except sqlite3.OperationalError:
+                pass
+            return False
+
+    def get(self, key, session_stats=None):
+        """
+        저장된 응답을 반환합니다. session_stats가 주어지면 프로세스 전체 통계와 함께 그 세션의 통계에도 적중 수를 셉니다.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and not self._is_expired(cached[1], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self._count('memory_hits', session_stats)
+                return cached[0]
+
+            try:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.OperationalError as e:
+                print(f"[경고] LLM 응답 캐시를 읽지 못했습니다: {e}")
+                row = None
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    self._touched.pop(key, None)
+                    self._run_write(lambda: self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)))
+                self._memory.pop(key, None)
+                self._count('misses', session_stats)
+                return None
+
+            self._remember(key, row[0], row[1])
+            self._touch(key, now)
+            self._count('disk_hits', session_stats)
+            return row[0]
+
+    def set(self, key, response, session_stats=None):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            self._touched.pop(key, None)
+            self._writes_since_prune += 1
+
+            def write():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now)
+                )
+                self._flush_touched()
+                # 삭제 비용을 나누기 위해 일정 횟수마다 한 번씩 오래된 항목을 정리합니다.
+                if self._writes_since_prune >= 100:
+                    self._prune(now)
+
+            if self._run_write(write):
+                self._count('writes', session_stats)
+
+    def _prune(self, now):
+        self._writes_since_prune = 0
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._run_write(self._flush_touched)
+            self._conn.close()
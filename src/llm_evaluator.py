@@ -1,148 +1,290 @@
-import os
-import openai
-from dotenv import load_dotenv
 import re
 import json
+from src.transcript import SegmentTable
 
-class LLMEvaluator:
-    def __init__(self):
-        load_dotenv()
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            self.client = None
-            print("[경고] OPENAI_API_KEY가 설정되지 않았습니다. LLM 기반 평가는 건너뜁니다.")
-        else:
-            self.client = openai.OpenAI(api_key=api_key)
-            
-    def get_conversation_analysis(self, transcript):
-        """
-        대화 전체를 분석하여 주제, 결과, 비속어 사용 여부를 JSON으로 반환합니다.
-        """
-        if not self.client:
-            return {"mid_category": "기타", "result_label": "분석 불가", "profane": 0}
-
-        conversation = "\n".join([f"{seg['speaker']}: {seg['text']}" for seg in transcript])
-
-        system_instructions = (
-            "당신은 고객 상담 내용을 듣고, 대화의 주제, 결과, 고객의 비속어 사용 여부를 정확하게 분석하는 AI입니다."
-        )
-
-        user_input = f"""
-        [상담 대화 내용]
-        {conversation}
-
-        [분석 항목 및 선택 옵션]
-        1.  `mid_category`: 대화의 핵심 주제를 아래 목록에서 하나만 선택해줘.
-            - ["상품 및 서비스 일반", "주문/결제/입금 확인", "취소/반품/교환/환불/AS", "회원 관리", "배송 문의", "이벤트/할인", "콘텐츠", "제휴", "기타"]
-        2.  `result_label`: 상담의 최종 결과를 아래 목록에서 하나만 선택해줘. (궁극적인 해결이 아닌, 상담 자체의 마무리 상태)
-            - ["만족", "미흡", "해결 불가", "추가 상담 필요"]
-        3.  `profane`: 고객이 비속어(욕설, 공격적인 언어)를 사용했는지 여부를 판단해줘. (사용했으면 1, 아니면 0)
-
-        [출력 지시]
-        분석 결과를 반드시 아래의 JSON 형식에 맞춰서 제공해줘.
-        {{
-            "mid_category": "...",
-            "result_label": "...",
-            "profane": ...
-        }}
-        """
+LLM_MODEL = "gpt-4.1-nano"
 
-        try:
-            response = self.client.responses.create(
-                model="gpt-4.1-nano",
-                input=user_input,
-                instructions=system_instructions,
-                text={"format": {"type": "json_object"}},
-                temperature=0
-            )
-            
-            analysis_result = json.loads(response.output[0].content[0].text)
-            return analysis_result
-            
-        except Exception as e:
-            print(f"[LLM 대화분석 오류] API 호출 또는 JSON 파싱에 실패했습니다: {e}")
-            return {"mid_category": "기타", "result_label": "분석 불가", "profane": 0}
-
-    def get_suggestion_score(self, transcript):
-        """
-        OpenAI Responses API를 사용하여 문제 해결 제안 점수를 평가합니다.
-        """
-        if not self.client:
-            return 0.0
-
-        # LLM에게 전달할 대화록을 간단한 텍스트로 변환
-        conversation = "\n".join([f"{seg['speaker']}: {seg['text']}" for seg in transcript])
-
-        # System Prompt (또는 instructions)
-        system_instructions = (
-            "당신은 고객 상담 내용을 분석하고 문제 해결 과정을 평가하는 전문 평가자입니다. "
-            "주어진 상담 대화 내용을 분석하여, 문제 해결 과정이 아래 규칙 중 어디에 해당하는지 판단하고, "
-            "반드시 '1.0', '0.6', '0.2', '0.0' 중 하나의 숫자로만 답변해야 합니다."
-        )
-
-        # User-facing Prompt
-        user_input = f"""
-        [상담 대화 내용]
-        {conversation}
-
-        [평가 규칙]
-        - 1.0점: 최초로 제시한 아이디어로 문제가 해결됨.
-        - 0.6점: 첫 번째 아이디어는 실패했지만, 두 번째로 제시한 아이디어로 해결됨.
-        - 0.2점: 세 번 이상의 아이디어를 제시하여 문제를 해결함.
-        - 0.0점: 대화가 끝날 때까지 문제가 해결되지 못함.
-        """
+# 감정 분석 배치 한 번에 담을 문장들의 대략적인 토큰 예산
+SENTIMENT_BATCH_TOKEN_BUDGET = 1500
+SENTIMENT_LABELS = {'positive': 1, 'neutral': 0, 'negative': -1}
 
+# 대화 분석 요청 한 번에 담을 대화의 대략적인 토큰 예산 (넘으면 구간 요약을 거쳐 평가)
+CONVERSATION_TOKEN_BUDGET = 6000
+# 구간 요약 요청 한 번에 담을 대화 구간의 대략적인 토큰 예산
+SUMMARY_CHUNK_TOKEN_BUDGET = 3000
+SEGMENT_SUMMARY_MAX_TOKENS = 400
+# 요약을 다시 요약하는 최대 단계 수 (매우 긴 통화에서 요약 묶음도 예산을 넘을 때)
+MAX_SUMMARY_LEVELS = 3
+
+DEFAULT_CONVERSATION_ANALYSIS = {"mid_category": "기타", "result_label": "분석 불가", "profane": 0}
+MID_CATEGORIES = [
+    "상품 및 서비스 일반", "주문/결제/입금 확인", "취소/반품/교환/환불/AS", "회원 관리",
+    "배송 문의", "이벤트/할인", "콘텐츠", "제휴", "기타"
+]
+RESULT_LABELS = ["만족", "미흡", "해결 불가", "추가 상담 필요"]
+SUGGESTION_SCORES = (1.0, 0.6, 0.2, 0.0)
+
+def estimate_tokens(text):
+    """
+    토크나이저 없이 토큰 수를 대략 추정합니다. 한글은 글자당 1토큰, 그 외 문자는 4글자당 1토큰으로 계산합니다.
+    """
+    hangul_count = len(re.findall(r'[가-힣]', text))
+    return hangul_count + (len(text) - hangul_count) // 4 + 1
+
+def _parse_polarity(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)) and value in (1, 0, -1):
+        return int(value)
+    if isinstance(value, str):
+        return SENTIMENT_LABELS.get(value.strip().lower())
+    return None
+
+def response_text(response):
+    return response.output[0].content[0].text
+
+def new_usage_stats():
+    """
+    한 세션의 LLM 사용량 집계입니다. cache에는 이 세션의 캐시 적중/실패/저장 수를 셉니다.
+    """
+    return {
+        'calls': 0, 'retries': 0, 'failures': 0, 'input_tokens': 0, 'output_tokens': 0, 'seconds': 0.0,
+        'cache': {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0},
+    }
+
+def record_usage(stats, response, seconds):
+    """
+    API 응답 한 건의 호출 수, 소요 시간, 입력/출력 토큰 수를 누적합니다.
+    """
+    stats['calls'] += 1
+    stats['seconds'] += seconds
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        stats['input_tokens'] += getattr(usage, 'input_tokens', 0) or 0
+        stats['output_tokens'] += getattr(usage, 'output_tokens', 0) or 0
+
+# --- 요청 생성 및 응답 파싱 (AsyncLLMEvaluator에서 사용) ---
+
+def conversation_lines(transcript):
+    """
+    대본(SegmentTable 또는 딕셔너리 목록)을 "화자: 텍스트" 줄 목록으로 한 번만 바꿉니다.
+    """
+    table = SegmentTable.from_data(transcript)
+    return [f"{speaker}: {text}" for speaker, text in zip(table.speaker_names(), table.texts())]
+
+def conversation_tokens(lines):
+    return sum(estimate_tokens(line) + 1 for line in lines)
+
+def needs_summary(lines, token_budget, level):
+    """
+    대화(또는 앞 단계의 요약)가 한 번의 요청 예산을 넘어 구간 요약을 한 단계 더 거쳐야 하는지 여부입니다.
+    """
+    return level < MAX_SUMMARY_LEVELS and len(lines) > 1 and conversation_tokens(lines) > token_budget
+
+def default_session_analysis():
+    return {'conversation_analysis': dict(DEFAULT_CONVERSATION_ANALYSIS), 'suggestions': 0.0}
+
+def build_session_analysis_request(conversation, include_suggestions=True, summarized=False):
+    """
+    대화 전체(긴 통화는 구간 요약)를 한 번에 분석하여 주제, 결과, 비속어 사용 여부와
+    문제 해결 제안 점수를 JSON으로 받는 요청을 만듭니다.
+    """
+    source = "상담 대화 구간별 요약" if summarized else "상담 대화 내용"
+    system_instructions = (
+        "당신은 고객 상담 내용을 분석하여 대화의 주제, 결과, 고객의 비속어 사용 여부를 분류하고 "
+        "문제 해결 과정을 평가하는 전문 평가자입니다."
+    )
+
+    suggestion_item = ""
+    suggestion_field = ""
+    if include_suggestions:
+        suggestion_item = """
+    4.  `suggestions`: 문제 해결 과정이 아래 규칙 중 어디에 해당하는지 판단하여 숫자 하나를 선택해줘.
+        - 1.0: 최초로 제시한 아이디어로 문제가 해결됨.
+        - 0.6: 첫 번째 아이디어는 실패했지만, 두 번째로 제시한 아이디어로 해결됨.
+        - 0.2: 세 번 이상의 아이디어를 제시하여 문제를 해결함.
+        - 0.0: 대화가 끝날 때까지 문제가 해결되지 못함."""
+        suggestion_field = ',\n        "suggestions": ...'
+
+    user_input = f"""
+    [{source}]
+    {conversation}
+
+    [분석 항목 및 선택 옵션]
+    1.  `mid_category`: 대화의 핵심 주제를 아래 목록에서 하나만 선택해줘.
+        - {json.dumps(MID_CATEGORIES, ensure_ascii=False)}
+    2.  `result_label`: 상담의 최종 결과를 아래 목록에서 하나만 선택해줘. (궁극적인 해결이 아닌, 상담 자체의 마무리 상태)
+        - {json.dumps(RESULT_LABELS, ensure_ascii=False)}
+    3.  `profane`: 고객이 비속어(욕설, 공격적인 언어)를 사용했는지 여부를 판단해줘. (사용했으면 1, 아니면 0){suggestion_item}
+
+    [출력 지시]
+    분석 결과를 반드시 아래의 JSON 형식에 맞춰서 제공해줘.
+    {{
+        "mid_category": "...",
+        "result_label": "...",
+        "profane": ...{suggestion_field}
+    }}
+    """
+
+    return {
+        "model": LLM_MODEL,
+        "input": user_input,
+        "instructions": system_instructions,
+        "text": {"format": {"type": "json_object"}},
+        "temperature": 0,
+        "max_output_tokens": 200
+    }
+
+def parse_session_analysis(text, include_suggestions=True):
+    """
+    통합 분석 응답을 {'conversation_analysis': {...}, 'suggestions': 점수}로 바꿉니다.
+    제안 점수가 허용된 값이 아니면 ValueError를 발생시켜 캐시에 저장되지 않도록 합니다.
+    """
+    data = json.loads(text)
+    conversation_analysis = {key: data.get(key, default) for key, default in DEFAULT_CONVERSATION_ANALYSIS.items()}
+    suggestions = 0.0
+    if include_suggestions:
+        suggestions = float(data.get('suggestions'))
+        if suggestions not in SUGGESTION_SCORES:
+            raise ValueError(f"모델이 예상치 못한 제안 점수를 반환했습니다: {data.get('suggestions')}")
+    return {'conversation_analysis': conversation_analysis, 'suggestions': suggestions}
+
+def build_segment_summary_request(lines, part, total, summarized=False):
+    """
+    긴 통화의 한 구간(또는 앞 단계 요약 묶음)을 최종 평가에 필요한 내용만 남겨 요약하는 요청을 만듭니다.
+    """
+    source = "상담 대화 구간별 요약" if summarized else "상담 대화"
+    system_instructions = (
+        "당신은 긴 고객 상담 대화를 구간별로 요약하는 AI입니다. "
+        "요약은 이후 상담 전체의 주제, 결과, 문제 해결 과정을 평가하는 데 쓰입니다."
+    )
+    conversation = "\n".join(lines)
+    user_input = f"""
+    [{source} ({part}/{total}번째 구간)]
+    {conversation}
+
+    [요약 지시]
+    1.  `summary`: 고객의 문의 내용과 문제, 상담사가 제시한 해결 방법(제시한 순서대로)과 각각의 결과,
+        구간이 끝날 때의 상태를 시간 순서대로 간결하게 요약해줘.
+    2.  `profane`: 이 구간에서 고객이 비속어(욕설, 공격적인 언어)를 사용했는지 여부 (사용했으면 1, 아니면 0)
+
+    [출력 지시]
+    반드시 아래의 JSON 형식으로만 답변해줘.
+    {{"summary": "...", "profane": 0}}
+    """
+    return {
+        "model": LLM_MODEL,
+        "input": user_input,
+        "instructions": system_instructions,
+        "text": {"format": {"type": "json_object"}},
+        "temperature": 0,
+        "max_output_tokens": SEGMENT_SUMMARY_MAX_TOKENS
+    }
+
+def parse_segment_summary(text):
+    data = json.loads(text)
+    summary = data.get('summary')
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError(f"모델이 구간 요약을 반환하지 않았습니다: {text}")
+    return {'summary': summary.strip(), 'profane': 1 if data.get('profane') in (1, '1', True) else 0}
+
+def summary_lines(summaries):
+    return [f"[구간 {part}] {summary['summary']}" for part, summary in enumerate(summaries, start=1)]
+
+def build_sentiment_request(text):
+    """
+    한 문장의 감정(Positive, Neutral, Negative)을 분석하는 요청을 만듭니다.
+    """
+    system_instructions = (
+        "당신은 문장의 감정을 분석하는 AI입니다. 문장을 읽고 'Positive', 'Neutral', 'Negative' 중 하나로만 답변해야 합니다."
+    )
+    return {
+        "model": LLM_MODEL,
+        "input": text,
+        "instructions": system_instructions,
+        "temperature": 0,
+        "max_output_tokens": 16
+    }
+
+def parse_sentiment(text):
+    sentiment_text = text.strip().lower()
+    if 'positive' in sentiment_text:
+        return 1
+    elif 'negative' in sentiment_text:
+        return -1
+    return 0
+
+def chunk_sentences(sentences, token_budget):
+    """
+    문장 목록을 토큰 예산을 넘지 않는 묶음으로 나눕니다. 각 묶음은 (원래 인덱스, 문장) 목록입니다.
+    """
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    for index, sentence in enumerate(sentences):
+        sentence_tokens = estimate_tokens(sentence) + 4
+        if current_chunk and current_tokens + sentence_tokens > token_budget:
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_tokens = 0
+        current_chunk.append((index, sentence))
+        current_tokens += sentence_tokens
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def build_sentiment_batch_request(chunk):
+    """
+    번호를 붙인 문장 묶음의 감정을 한 번에 분석하는 요청을 만듭니다.
+    """
+    system_instructions = (
+        "당신은 문장의 감정을 분석하는 AI입니다. 번호가 붙은 각 문장의 감정을 "
+        "Positive는 1, Neutral은 0, Negative는 -1로 판단해야 합니다."
+    )
+    numbered_sentences = "\n".join(f"{number}. {sentence}" for number, (_, sentence) in enumerate(chunk, start=1))
+    user_input = f"""
+    [문장 목록]
+    {numbered_sentences}
+
+    [출력 지시]
+    모든 문장에 대해 아래 JSON 형식으로만 답변해줘. results의 항목 수는 문장 수({len(chunk)})와 같아야 해.
+    {{"results": [{{"id": 1, "sentiment": 1}}, {{"id": 2, "sentiment": 0}}]}}
+    """
+    return {
+        "model": LLM_MODEL,
+        "input": user_input,
+        "instructions": system_instructions,
+        "text": {"format": {"type": "json_object"}},
+        "temperature": 0,
+        "max_output_tokens": 16 * len(chunk) + 32
+    }
+
+def parse_sentiment_batch(text, chunk_size):
+    """
+    배치 응답을 {번호: 점수} 딕셔너리로 바꿉니다. 파싱할 수 없는 항목은 결과에서 빠집니다.
+    """
+    results = json.loads(text).get('results', [])
+    scores = {}
+    for position, item in enumerate(results, start=1):
+        if isinstance(item, dict):
+            number, polarity = item.get('id', position), _parse_polarity(item.get('sentiment'))
+        else:
+            number, polarity = position, _parse_polarity(item)
+        if isinstance(number, int) and 1 <= number <= chunk_size and polarity is not None:
+            scores[number] = polarity
+    return scores
+
+def cached_response(cache, request, parse, cache_stats=None):
+    """
+    캐시에 같은 요청의 응답이 있고 파싱할 수 있으면 (캐시 키, 파싱 결과)를, 아니면 (캐시 키, None)을 반환합니다.
+    """
+    if cache is None:
+        return None, None
+    key = cache.make_key(request)
+    text = cache.get(key, cache_stats)
+    if text is not None:
         try:
-            response = self.client.responses.create(
-                model="gpt-4.1-nano",          # 최신, 비용 효율적인 모델
-                input=user_input,            # 사용자 입력
-                instructions=system_instructions, # 시스템 지시사항
-                temperature=0,               # 일관된 답변을 위해 0으로 설정
-                max_output_tokens=100
-            )
-            
-            full_response_text = response.output[0].content[0].text.strip()
-            
-            match = re.search(r'(\d\.\d)$', full_response_text)
-            if match:
-                return float(match.group(1))
-            else:
-                print(f"[LLM 파싱 오류] 모델이 예상치 못한 답변을 반환했습니다: {full_response_text}")
-                return 0.0
-            
-        except Exception as e:
-            print(f"[LLM 평가 오류] OpenAI API 호출에 실패했습니다: {e}")
-            return 0.0
-        
-    def get_sentiment_score(self, text):
-        """
-        LLM을 사용하여 한 문장의 감정을 분석하고 점수를 반환합니다.
-        - Positive: 1, Neutral: 0, Negative: -1
-        """
-        if not self.client:
-            return 0 # 클라이언트가 없으면 0점 반환
-
-        system_instructions = (
-            "당신은 문장의 감정을 분석하는 AI입니다. 문장을 읽고 'Positive', 'Neutral', 'Negative' 중 하나로만 답변해야 합니다."
-        )
-        
-        try:
-            response = self.client.responses.create(
-                model="gpt-4.1-nano",
-                input=text,
-                instructions=system_instructions,
-                temperature=0,
-                max_output_tokens=16
-            )
-            
-            sentiment_text = response.output[0].content[0].text.strip().lower()
-
-            if 'positive' in sentiment_text:
-                return 1
-            elif 'negative' in sentiment_text:
-                return -1
-            else:
-                return 0
-        except Exception as e:
-            print(f"[LLM 감정분석 오류] API 호출에 실패했습니다: {e}")
-            return 0 # 오류 발생 시 중립으로 처리
\ No newline at end of file
+            return key, parse(text)
+        except Exception:
+            pass
+    return key, None
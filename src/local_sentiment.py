@@ -0,0 +1,141 @@
+import json
+import math
+
+DEFAULT_SENTIMENT_CONFIG = {
+    'mode': 'tiered',               # "tiered": 로컬 점수의 확신도가 낮은 문장만 LLM, "local": LLM 없이 로컬만, "llm": 모든 문장 LLM
+    'escalation_threshold': 0.6,    # 확신도가 이 값보다 낮은 문장을 LLM으로 보냄
+    'neutral_confidence': 0.75,     # 감성 형태소가 하나도 없는 문장을 중립으로 볼 확신도
+    'classifier_path': None,        # 형태소 선형 분류기 가중치(JSON), 지정하면 감성사전 대신 사용
+}
+
+PREDICATE_TAGS = ('VA', 'VV', 'XSA', 'XSV')
+ROOT_TAGS = ('NNG', 'XR')
+# 감성 형태소의 극성을 뒤집는 부정 표현 (안, 못, -지 않다, -지 못하다)
+NEGATION_TOKENS = {('안', 'MAG'), ('못', 'MAG'), ('않', 'VX'), ('못하', 'VX')}
+
+
+def lexicon_stem(token):
+    """
+    감성사전 어근 형식에 맞춰, 용언(형용사/동사/파생 접미사)은 '다'를 붙인 형태로 바꿉니다.
+    """
+    return token.form + '다' if token.tag in PREDICATE_TAGS else token.form
+
+
+class LinearSentimentClassifier:
+    """
+    형태소(형태/품사) 단위 가중치의 선형 분류기입니다. 별도 라이브러리 없이 JSON 가중치 파일로 불러옵니다.
+    파일 형식: {"labels": [-1, 0, 1], "bias": [b, b, b], "weights": {"답답/VA": [w, w, w], ...}}
+    """
+
+    def __init__(self, labels, bias, weights):
+        self.labels = [int(label) for label in labels]
+        self.bias = [float(value) for value in bias]
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['labels'], data['bias'], data['weights'])
+
+    def predict(self, tokens):
+        """
+        (점수, 확률)을 반환합니다. 확률은 소프트맥스로 구한 가장 높은 클래스의 확률입니다.
+        """
+        logits = list(self.bias)
+        for token in tokens:
+            weights = self.weights.get(f"{token.form}/{token.tag}")
+            if weights:
+                logits = [logit + weight for logit, weight in zip(logits, weights)]
+        top = max(logits)
+        exps = [math.exp(logit - top) for logit in logits]
+        best = max(range(len(exps)), key=exps.__getitem__)
+        return self.labels[best], exps[best] / sum(exps)
+
+
+class LocalSentimentScorer:
+    """
+    LLM을 부르지 않고 CPU에서 문장 감정(-1, 0, 1)과 확신도(0~1)를 계산합니다.
+
+    감성사전 방식은 문장의 감성 형태소 극성(-2~2)을 긍정/부정으로 나누어 더하고,
+    한쪽으로 치우친 정도(margin)와 가장 강한 쪽의 세기로 확신도를 정합니다.
+    감성 형태소가 없으면 neutral_confidence로 중립, 부정 표현이 있으면 극성을 뒤집고 확신도를 절반으로 낮춥니다.
+    분류기가 있으면 분류기의 예측과 확률을 그대로 사용합니다.
+    """
+
+    def __init__(self, lexicon, kiwi, neutral_confidence=0.75, classifier=None):
+        self.lexicon = lexicon
+        self.kiwi = kiwi
+        self.neutral_confidence = neutral_confidence
+        self.classifier = classifier
+
+    @classmethod
+    def from_config(cls, sentiment_config, lexicon, kiwi):
+        classifier_path = sentiment_config.get('classifier_path')
+        classifier = LinearSentimentClassifier.load(classifier_path) if classifier_path else None
+        return cls(lexicon, kiwi, sentiment_config['neutral_confidence'], classifier)
+
+    def score_tokens(self, tokens):
+        if self.classifier is not None:
+            return self.classifier.predict(tokens)
+        if self.lexicon is None:
+            # 감성사전이 없으면 판단할 근거가 없으므로 확신도 0으로 돌려 모두 LLM에 맡깁니다.
+            return 0, 0.0
+
+        positive = negative = 0
+        negated = False
+        skip_suffix = False
+        for index, token in enumerate(tokens):
+            if (token.form, token.tag) in NEGATION_TOKENS:
+                negated = True
+                continue
+            if skip_suffix:
+                # 앞 어근과 합쳐 '-하다' 형태로 이미 찾은 접미사입니다.
+                skip_suffix = False
+                continue
+            polarity = self.lexicon.get(lexicon_stem(token))
+            if not polarity and token.tag in ROOT_TAGS and index + 1 < len(tokens):
+                # '답답(XR) + 하(XSA)'처럼 나뉜 어근은 '답답하다'로 한 번 더 찾습니다.
+                suffix = tokens[index + 1]
+                if suffix.form == '하' and suffix.tag in ('XSA', 'XSV'):
+                    polarity = self.lexicon.get(token.form + '하다')
+                    skip_suffix = bool(polarity)
+            if polarity:
+                if polarity > 0:
+                    positive += polarity
+                else:
+                    negative -= polarity
+        total = positive + negative
+        if total == 0:
+            return 0, self.neutral_confidence
+
+        margin = abs(positive - negative) / total
+        strength = min(1.0, max(positive, negative) / 2)
+        confidence = margin * (0.5 + 0.5 * strength)
+        score = (positive > negative) - (positive < negative)
+        if negated:
+            score, confidence = -score, confidence * 0.5
+        return score, confidence
+
+    def score(self, sentences, sentence_tokens=None):
+        """
+        문장 목록의 (점수, 확신도) 목록을 반환합니다. 토큰이 없으면 Kiwi 배치 분석으로 한 번에 분석합니다.
+        """
+        if not sentences:
+            return []
+        if sentence_tokens is None:
+            sentence_tokens = self.kiwi.tokenize(sentences)
+        return [self.score_tokens(tokens) for tokens in sentence_tokens]
+
+
+def select_escalations(local_scores, mode, threshold):
+    """
+    LLM으로 보낼 문장 번호 목록을 반환합니다.
+    """
+    if mode == 'llm':
+        return list(range(len(local_scores)))
+    if mode == 'local':
+        return []
+    if mode == 'tiered':
+        return [index for index, (_, confidence) in enumerate(local_scores) if confidence < threshold]
+    raise ValueError(f"알 수 없는 감정 분석 방식입니다: {mode} ('tiered', 'local', 'llm')")
@@ -1,80 +1,151 @@
-import json
 import re
-import kss
 import numpy as np
-from kiwipiepy import Kiwi
-from src.llm_evaluator import LLMEvaluator
+from src.async_llm_evaluator import AsyncLLMEvaluator
+from src.kiwi_dictionary import add_user_dictionary
+from src.senti_lexicon import SentimentLexicon
+from src.keyword_matcher import KeywordMatcher
+from src.instrumentation import StageRecorder
+from src.transcript import SegmentTable, TurnTable
+from src.flow_metrics import DEFAULT_FLOW_CONFIG, compute_flow_metrics
+from src.segmentation import create_segmenter
+from src.local_sentiment import DEFAULT_SENTIMENT_CONFIG, LocalSentimentScorer, lexicon_stem, select_escalations
+
+HONORIFIC_ENDING = re.compile(r'(습니다|ㅂ니다|세요|셔요|까요\?)$')
+ROOT_TAGS = ('NNG', 'XR')
+SENTI_LEXICON_PATH = 'data/SentiWord_info.json'
 
 class MetricsCalculator:
     kiwi = None
-    senti_dict = None
+    senti_lexicon = None
     llm_evaluator = None
 
-    def __init__(self, keywords):
-        self.keywords = keywords
+    def __init__(self, keywords, keyword_path=None, kiwi_num_workers=None, llm_config=None,
+                 kiwi_dict_cache=".cache/kiwi", lexicon_cache=".cache/lexicon", flow_config=None,
+                 segmentation_config=None, sentiment_config=None):
+        self.keyword_matcher = KeywordMatcher(keywords, source_path=keyword_path)
+        self.flow_config = {**DEFAULT_FLOW_CONFIG, **(flow_config or {})}
+
+        # 감성사전은 Kiwi 사용자 사전의 원본이기도 하므로 먼저 엽니다.
+        if MetricsCalculator.senti_lexicon is None:
+            MetricsCalculator.senti_lexicon = self._load_knu_senti_lexicon(lexicon_cache)
         
         if MetricsCalculator.kiwi is None:
             print("KiwiPy 형태소 분석기 초기화 중...")
-            MetricsCalculator.kiwi = Kiwi()
-            for word in self._get_senti_words():
-                MetricsCalculator.kiwi.add_user_word(word, 'NNP', 0)
+            # kiwipiepy는 모델 로딩이 무거우므로 실제로 필요할 때 가져옵니다.
+            from kiwipiepy import Kiwi
+            MetricsCalculator.kiwi = Kiwi(num_workers=kiwi_num_workers)
+            # 감성사전 어근은 미리 변환해 둔 사용자 사전 파일로 한 번에 추가합니다.
+            add_user_dictionary(MetricsCalculator.kiwi, MetricsCalculator.senti_lexicon, kiwi_dict_cache)
             print("KiwiPy 초기화 및 사용자 사전 추가 완료.")
 
-        if MetricsCalculator.senti_dict is None:
-            MetricsCalculator.senti_dict = self._load_knu_senti_lexicon()
+        # 문장 분리 방식 (기본은 Kiwi 기반의 빠른 방식, kss는 설정에서 선택)
+        self.segmenter = create_segmenter(segmentation_config, self.kiwi)
+
+        # 고객 감정은 감성사전 기반 로컬 점수를 먼저 매기고, 확신도가 낮은 문장만 LLM으로 보냅니다.
+        self.sentiment_config = {**DEFAULT_SENTIMENT_CONFIG, **(sentiment_config or {})}
+        self.sentiment_scorer = LocalSentimentScorer.from_config(self.sentiment_config, self.senti_lexicon, self.kiwi)
         
         if MetricsCalculator.llm_evaluator is None:
             print("LLM 평가기 초기화 중...")
-            MetricsCalculator.llm_evaluator = LLMEvaluator()
+            MetricsCalculator.llm_evaluator = AsyncLLMEvaluator.from_config(llm_config)
 
-        self.euphonious_patterns = [
-            re.compile(p) for p in [
-                r'인 것 같습니다', r'ㄹ 것 같습니다', r'일 듯합니다', r'ㄹ지도 모릅니다',
-                r'하기는 어렵습니다', r'ㄹ 수 있을까요\??', r'해 주시겠어요\??',
-                r'드릴까요\??', r'해드릴까요\??', r'부탁드립니다'
-            ]
-        ]
+    @property
+    def keywords(self):
+        return self.keyword_matcher.keywords
     
-    def _get_senti_words(self):
-        try:
-            with open('data/SentiWord_info.json', 'r', encoding='utf-8') as f:
-                senti_data = json.load(f)
-            return [item['word_root'] for item in senti_data]
-        except:
-            return []
-
-    def _load_knu_senti_lexicon(self):
-        senti_dict = {}
-        try:
-            with open('data/SentiWord_info.json', 'r', encoding='utf-8') as f:
-                senti_data = json.load(f)
-            for item in senti_data:
-                word = item['word_root']
-                polarity = int(item['polarity'])
-                senti_dict[word] = polarity
-            print("KNU 감성사전 로드 완료.")
-            return senti_dict
-        except FileNotFoundError:
-            print("[경고] 'data/SentiWord_info.json' 파일을 찾을 수 없습니다.")
-            return {}
+    def _load_knu_senti_lexicon(self, cache_dir):
+        """
+        KNU 감성사전을 바이너리 파일로 한 번 변환해 두고 메모리 매핑으로 엽니다. 원본 파일이 없으면 None을 반환합니다.
+        """
+        lexicon = SentimentLexicon.from_source(SENTI_LEXICON_PATH, cache_dir)
+        if lexicon is None:
+            print(f"[경고] '{SENTI_LEXICON_PATH}' 파일을 찾을 수 없습니다.")
+            return None
+        print(f"KNU 감성사전 로드 완료. ({len(lexicon)}개 어근)")
+        return lexicon
             
-    def calculate_all_metrics(self, transcript_with_timings, raw_speaker_turns, total_duration, session_id):
-        agent_words, agent_sentences = self._extract_agent_data(transcript_with_timings)
-        customer_sentences = self._extract_customer_sentences(transcript_with_timings)
+    def calculate_all_metrics(self, transcript_with_timings, raw_speaker_turns, total_duration, session_id,
+                              recorder=None):
+        """
+        recorder(StageRecorder)가 주어지면 하위 단계의 소요 시간과 문장/형태소 수를 'metrics.' 접두사로 기록합니다.
+        대본과 화자 구간은 표(SegmentTable, TurnTable) 또는 딕셔너리 목록 모두 받습니다.
+        """
+        if recorder is None:
+            recorder = StageRecorder(session_id)
+        transcript_with_timings = SegmentTable.from_data(transcript_with_timings)
+        raw_speaker_turns = TurnTable.from_data(raw_speaker_turns)
+        self.keyword_matcher.reload_if_changed()
+        with recorder.stage('metrics.sentence_split'):
+            agent_words, agent_sentences, agent_sentence_tokens = self._extract_agent_data(transcript_with_timings)
+            customer_sentences, customer_sentence_tokens = self._split_customer_sentences(transcript_with_timings)
+        recorder.add_counts({
+            'agent_words': len(agent_words),
+            'agent_sentences': len(agent_sentences),
+            'customer_sentences': len(customer_sentences),
+        })
         
         if not agent_words:
             return {"error": "상담사 발화가 없습니다."}
 
+        # --- 고객 감정 로컬 점수 (확신도가 낮은 문장만 아래 LLM 평가로 넘김) ---
+        with recorder.stage('metrics.local_sentiment'):
+            local_sentiment = self._score_local_sentiment(customer_sentences, customer_sentence_tokens)
+            escalated = self._select_sentiment_escalations(local_sentiment)
+        escalation_rate = len(escalated) / len(customer_sentences) if customer_sentences else 0
+        recorder.add_counts({
+            'sentiment_local': len(customer_sentences) - len(escalated),
+            'sentiment_escalated': len(escalated),
+        })
+
+        # --- LLM 기반 평가 시작 (대화 분석, 문제 해결력, 고객 감정을 백그라운드에서 동시에 실행) ---
+        print(f"LLM 기반 평가 시작 (대화 분석, 문제 해결력, 고객 감정 {len(escalated)}/{len(customer_sentences)}문장)...")
+        total_sentence_count = len(agent_sentences)
+        llm_future = self.llm_evaluator.submit_session(
+            transcript_with_timings,
+            [customer_sentences[index] for index in escalated],
+            include_suggestions=total_sentence_count > 0
+        )
+
         # --- 대화 흐름 및 응대 태도 지표 계산 ---
-        avg_latency = self._calculate_avg_response_latency(transcript_with_timings)
-        interruption_count = self._calculate_interruption_count(transcript_with_timings)
-        silence_ratio = self._calculate_silence_ratio(raw_speaker_turns, total_duration)
-        talk_ratio = self._calculate_talk_ratio(transcript_with_timings)
-        
+        with recorder.stage('metrics.flow'):
+            flow_metrics = self._calculate_flow_metrics(transcript_with_timings, raw_speaker_turns, total_duration)
+
+        # --- 규칙 기반 상담 태도 지표 계산 (LLM 평가와 겹쳐서 실행) ---
+        # 상담사 문장은 한 번만 형태소 분석하고, 그 결과를 모든 형태소 기반 지표가 함께 사용합니다.
+        # 문장 분리 단계에서 이미 토큰을 얻었으면(fast 방식) 다시 분석하지 않습니다.
+        with recorder.stage('metrics.morph_analysis'):
+            if agent_sentence_tokens is None:
+                agent_sentence_tokens = self._analyze_sentences(agent_sentences)
+        with recorder.stage('metrics.keyword_match'):
+            agent_sentence_hits = [self.keyword_matcher.match(sent) for sent in agent_sentences]
+        with recorder.stage('metrics.token_features'):
+            token_counts = self._count_token_features(agent_sentences, agent_sentence_tokens, agent_sentence_hits)
+        positive_morph_count = token_counts['positive']
+        negative_morph_count = token_counts['negative']
+        total_morph_count = token_counts['morphemes']
+        honorific_sentence_count = token_counts['honorific']
+        empathy_sentence_count = token_counts['empathy']
+        apology_sentence_count = token_counts['apology']
+        euphonious_sentence_count = token_counts['euphonious']
+        recorder.count('agent_morphemes', total_morph_count)
+
+        # 규칙 기반 지표를 모두 계산한 뒤에도 LLM 평가가 끝나지 않았다면 남은 대기 시간을 따로 기록합니다.
+        with recorder.stage('metrics.llm_wait'):
+            llm_results = llm_future.result()
+        llm_usage = dict(llm_results['usage'])
+        llm_cache_stats = llm_usage.pop('cache')
+        recorder.add_counts(llm_usage, prefix='llm_')
+        if self.llm_evaluator.cache is not None:
+            recorder.add_counts(dict(llm_cache_stats, hits=llm_cache_stats['memory_hits'] + llm_cache_stats['disk_hits']),
+                                prefix='llm_cache_')
+        conversation_analysis = llm_results['conversation_analysis']
+        suggestions = llm_results['suggestions']
+        customer_sentiment_scores = [score for score, _ in local_sentiment]
+        for index, score in zip(escalated, llm_results['customer_sentiment_scores']):
+            customer_sentiment_scores[index] = score
+        print(f"LLM 기반 평가 완료. (문제 해결력 점수: {suggestions}, 감정 분석 LLM 비율: {escalation_rate:.0%})")
+
         # --- 고객 감정 추세 분석 ---
-        print("LLM 기반 고객 감정 추세 분석 시작...")
-        customer_sentiment_scores = [self.llm_evaluator.get_sentiment_score(sent) for sent in customer_sentences]
-        
         sentiment_early = 0
         sentiment_late = 0
         if len(customer_sentiment_scores) >= 3:
@@ -89,13 +160,7 @@ class MetricsCalculator:
         
         sentiment_trend = sentiment_late - sentiment_early
         print(f"고객 감정 추세 분석 완료. (초반: {sentiment_early:.2f}, 후반: {sentiment_late:.2f})")
-        
-        # --- LLM 기반 대화 전체 내용 분석 ---
-        print("LLM 기반 대화 전체 내용 분석 시작...")
-        conversation_analysis = self.llm_evaluator.get_conversation_analysis(transcript_with_timings)
-        print("LLM 기반 대화 전체 내용 분석 완료.")
 
-        total_sentence_count = len(agent_sentences)
         if total_sentence_count == 0:
             # 모든 지표를 포함하여 반환
             return {
@@ -107,22 +172,10 @@ class MetricsCalculator:
                 "euphonious_word_ratio": 0, "empathy_ratio": 0, "apology_ratio": 0,
                 "suggestions": 0.0, "customer_sentiment_early": float(sentiment_early),
                 "customer_sentiment_late": float(sentiment_late), "customer_sentiment_trend": float(sentiment_trend),
-                "avg_response_latency": avg_latency, "interruption_count": interruption_count,
-                "silence_ratio": silence_ratio, "talk_ratio": talk_ratio
+                "sentiment_escalation_rate": escalation_rate,
+                **flow_metrics
             }
 
-        # --- 규칙 기반 상담 태도 지표 계산 ---
-        positive_morph_count, negative_morph_count, total_morph_count = self._count_sentiment_morphemes(agent_words)
-        honorific_sentence_count = self._count_honorific_sentences(agent_sentences)
-        euphonious_sentence_count = self._count_euphonious_sentences(agent_sentences)
-        empathy_sentence_count = self._count_empathy_sentences(agent_sentences)
-        apology_sentence_count = self._count_apology_sentences(agent_sentences)
-        
-        # --- LLM 기반 문제 해결력 평가 ---
-        print("LLM 기반 문제 해결력 평가 시작...")
-        suggestions = self.llm_evaluator.get_suggestion_score(transcript_with_timings)
-        print(f"LLM 기반 문제 해결력 평가 완료. (점수: {suggestions})")
-
         # --- 최종 결과 구성 ---
         final_metrics = {
             "session_id": session_id,
@@ -139,148 +192,98 @@ class MetricsCalculator:
             "customer_sentiment_early": float(sentiment_early),
             "customer_sentiment_late": float(sentiment_late),
             "customer_sentiment_trend": float(sentiment_trend),
-            "avg_response_latency": avg_latency,
-            "interruption_count": interruption_count,
-            "silence_ratio": silence_ratio,
-            "talk_ratio": talk_ratio
+            "sentiment_escalation_rate": escalation_rate,
+            **flow_metrics
         }
         return final_metrics
 
     def _extract_agent_data(self, transcript):
-        agent_turns = [seg for seg in transcript if seg.get('speaker') == 'Agent']
+        """
+        상담사의 (단어 목록, 문장 목록, 문장별 토큰 목록 또는 None)을 반환합니다.
+        """
+        transcript = SegmentTable.from_data(transcript)
+        agent_turns = transcript.texts_of('Agent')
         if not agent_turns:
-            return [], []
-        agent_full_text = ' '.join([turn['text'] for turn in agent_turns])
-        agent_words = agent_full_text.split()
-        agent_sentences = kss.split_sentences(agent_full_text)
-        return agent_words, agent_sentences
+            return [], [], None
+        agent_words = ' '.join(agent_turns).split()
+        agent_sentences, agent_sentence_tokens = self.segmenter.split(transcript, 'Agent')
+        return agent_words, agent_sentences, agent_sentence_tokens
 
-    def _extract_customer_sentences(self, transcript):
-        customer_turns = [seg for seg in transcript if seg.get('speaker') == 'Customer']
-        if not customer_turns:
-            return []
-        customer_full_text = ' '.join([turn['text'] for turn in customer_turns])
-        return kss.split_sentences(customer_full_text)
+    def _split_customer_sentences(self, transcript):
+        """
+        고객의 (문장 목록, 문장별 토큰 목록 또는 None)을 반환합니다. LLM만 쓰는 방식이면 토큰을 만들지 않습니다.
+        """
+        with_tokens = self.sentiment_config['mode'] != 'llm'
+        return self.segmenter.split(transcript, 'Customer', with_tokens=with_tokens)
 
-    def _count_sentiment_morphemes(self, words):
-        if not self.senti_dict or not self.kiwi:
-            return 0, 0, 0
-        positive_count = 0
-        negative_count = 0
-        total_morph_count = 0
-        full_text = " ".join(words)
-        result = self.kiwi.tokenize(full_text)
-        for token in result:
-            total_morph_count += 1
-            if token.tag in ['VA', 'VV', 'XSA', 'XSV']:
-                stem = token.form + '다'
-            else:
-                stem = token.form
-            if stem in self.senti_dict:
-                polarity = self.senti_dict[stem]
-                if polarity > 0:
-                    positive_count += 1
-                elif polarity < 0:
-                    negative_count += 1
-        return positive_count, negative_count, total_morph_count
+    def _score_local_sentiment(self, sentences, sentence_tokens=None):
+        """
+        고객 문장별 (로컬 감정 점수, 확신도) 목록을 반환합니다. 모든 문장을 LLM에 보내는 방식이면 계산하지 않습니다.
+        """
+        if self.sentiment_config['mode'] == 'llm':
+            return [(0, 0.0)] * len(sentences)
+        return self.sentiment_scorer.score(sentences, sentence_tokens)
 
-    def _count_honorific_sentences(self, sentences):
-        count = 0
-        honorific_ending = re.compile(r'(습니다|ㅂ니다|세요|셔요|까요\?)$')
-        for sent in sentences:
-            if honorific_ending.search(sent):
-                count += 1
-                continue
-            tokens = self.kiwi.tokenize(sent)
-            for token in tokens:
-                if token.tag == 'EP' and token.form == '시':
-                    count += 1
-                    break
-        return count
+    def _select_sentiment_escalations(self, local_sentiment):
+        """
+        LLM으로 다시 평가할 고객 문장 번호 목록입니다. LLM을 쓸 수 없으면(API 키 없음) 로컬 점수를 그대로 씁니다.
+        """
+        if not self.llm_evaluator.available:
+            return []
+        return select_escalations(
+            local_sentiment, self.sentiment_config['mode'], self.sentiment_config['escalation_threshold']
+        )
 
-    def _count_euphonious_sentences(self, sentences):
-        count = 0
-        cushion_words = self.keywords.get('cushion', [])
-        for sent in sentences:
-            found = False
-            for word in cushion_words:
-                if word in sent:
-                    count += 1
-                    found = True
-                    break
-            if found:
-                continue
-            for pattern in self.euphonious_patterns:
-                if pattern.search(sent):
-                    count += 1
-                    break
-        return count
+    def _analyze_sentences(self, sentences):
+        """
+        문장 목록 전체를 Kiwi 배치 분석(다중 스레드)으로 한 번에 형태소 분석합니다.
+        반환값은 문장별 토큰 목록입니다.
+        """
+        if not sentences:
+            return []
+        return list(self.kiwi.tokenize(sentences))
 
-    def _count_empathy_sentences(self, sentences):
-        count = 0
-        empathy_roots = self.keywords.get('empathy_roots', [])
-        empathy_patterns = self.keywords.get('empathy_patterns', [])
-        for sent in sentences:
-            found_by_pattern = False
-            for pattern in empathy_patterns:
-                if pattern in sent:
-                    count += 1
-                    found_by_pattern = True
-                    break
-            if found_by_pattern:
-                continue
-            tokens = self.kiwi.tokenize(sent)
-            for token in tokens:
-                if token.form in empathy_roots and token.tag in ['NNG', 'XR']:
-                    count += 1
-                    break
-        return count
+    def _count_token_features(self, sentences, sentence_tokens, sentence_hits):
+        """
+        문장별 토큰과 키워드 매칭 결과를 한 번만 순회하면서 감성 형태소, 존댓말, 완곡, 공감, 사과 지표를 함께 계산합니다.
+        """
+        counts = {'positive': 0, 'negative': 0, 'morphemes': 0, 'honorific': 0,
+                  'euphonious': 0, 'empathy': 0, 'apology': 0}
+        senti_lexicon = self.senti_lexicon
+        lookup_polarity = senti_lexicon.get if senti_lexicon else (lambda stem: None)
+        empathy_roots = set(self.keywords.get('empathy_roots', []))
+        apology_roots = set(self.keywords.get('apology_roots', []))
 
-    def _count_apology_sentences(self, sentences):
-        count = 0
-        apology_roots = self.keywords.get('apology_roots', [])
-        for sent in sentences:
-            tokens = self.kiwi.tokenize(sent)
+        for sent, tokens, hits in zip(sentences, sentence_tokens, sentence_hits):
+            is_honorific = HONORIFIC_ENDING.search(sent) is not None
+            is_empathy = 'empathy_patterns' in hits
+            is_apology = False
             for token in tokens:
-                if token.form in apology_roots and token.tag in ['NNG', 'XR']:
-                    count += 1
-                    break
-        return count
-
-    def _calculate_avg_response_latency(self, transcript):
-        latencies = []
-        for i in range(1, len(transcript)):
-            if transcript[i-1]['speaker'] == 'Customer' and transcript[i]['speaker'] == 'Agent':
-                latency = transcript[i]['start_time'] - transcript[i-1]['end_time']
-                if latency > 0:
-                    latencies.append(latency)
-        return np.mean(latencies) if latencies else 0
-
-    def _calculate_interruption_count(self, transcript):
-        interruptions = 0
-        for i in range(1, len(transcript)):
-            if transcript[i-1]['speaker'] == 'Customer' and transcript[i]['speaker'] == 'Agent':
-                if transcript[i]['start_time'] < transcript[i-1]['end_time']:
-                    interruptions += 1
-        return interruptions
+                counts['morphemes'] += 1
+                polarity = lookup_polarity(lexicon_stem(token))
+                if polarity:
+                    if polarity > 0:
+                        counts['positive'] += 1
+                    elif polarity < 0:
+                        counts['negative'] += 1
+                if token.tag == 'EP' and token.form == '시':
+                    is_honorific = True
+                elif token.tag in ROOT_TAGS:
+                    if token.form in empathy_roots:
+                        is_empathy = True
+                    if token.form in apology_roots:
+                        is_apology = True
+            counts['honorific'] += is_honorific
+            counts['euphonious'] += 'cushion' in hits or 'euphonious' in hits
+            counts['empathy'] += is_empathy
+            counts['apology'] += is_apology
 
-    def _calculate_silence_ratio(self, speaker_turns, total_duration):
-        if total_duration == 0:
-            return 0
-        total_speech_time = sum(turn['end'] - turn['start'] for turn in speaker_turns)
-        silence_time = total_duration - total_speech_time
-        return silence_time / total_duration if silence_time > 0 else 0
+        if not senti_lexicon:
+            counts['positive'] = counts['negative'] = counts['morphemes'] = 0
+        return counts
 
-    def _calculate_talk_ratio(self, transcript):
-        customer_talk_time = 0
-        agent_talk_time = 0
-        for seg in transcript:
-            duration = seg['end_time'] - seg['start_time']
-            if seg['speaker'] == 'Customer':
-                customer_talk_time += duration
-            elif seg['speaker'] == 'Agent':
-                agent_talk_time += duration
-        if agent_talk_time == 0:
-            return 0
-        
-        return customer_talk_time / agent_talk_time
\ No newline at end of file
+    def _calculate_flow_metrics(self, transcript, speaker_turns, total_duration):
+        """
+        평균 응답 속도, 가로채기 횟수, 침묵/겹침 비율, 발화 비율과 구간별 시계열(timeline)을 한 번에 계산합니다.
+        """
+        return compute_flow_metrics(transcript, speaker_turns, total_duration, self.flow_config['window_seconds'])
@@ -0,0 +1,140 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+
+# int8 기준 대략적인 모델 상주 메모리(MB). 메모리 예산 계산에만 사용합니다.
+WHISPER_MEMORY_ESTIMATES_MB = {
+    'tiny': 100,
+    'base': 200,
+    'small': 500,
+    'medium': 1500,
+    'large-v2': 3000,
+    'large-v3': 3000,
+}
+DEFAULT_MEMORY_ESTIMATE_MB = 1500
+
+
+def _available_memory_mb(device):
+    """
+    현재 장치에서 사용 가능한 메모리(MB)를 반환합니다. 확인할 수 없으면 None을 반환합니다.
+    """
+    try:
+        if device == 'cuda':
+            import torch
+            free_bytes, _ = torch.cuda.mem_get_info()
+            return free_bytes / (1024 * 1024)
+        available_kb = _meminfo_available_kb()
+        if available_kb is not None:
+            return available_kb / 1024
+        pages = os.sysconf('SC_AVPHYS_PAGES')
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        return pages * page_size / (1024 * 1024)
+    except (ValueError, OSError, RuntimeError, AttributeError, ImportError):
+        return None
+
+
+def _meminfo_available_kb():
+    """
+    /proc/meminfo의 MemAvailable(KB)을 반환합니다. /proc가 없는 환경(Linux 외)에서는 None을 반환합니다.
+    SC_AVPHYS_PAGES는 MemFree에 해당하여 회수 가능한 페이지 캐시를 사용 중으로 보므로,
+    캐시가 가득 찬 서버에서는 모델을 로드할 때마다 상주 모델을 모두 해제하게 됩니다.
+    """
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class WhisperModelManager:
+    """
+    faster-whisper 모델을 프로세스에 상주시켜 호출마다 다시 로드하지 않도록 관리합니다.
+    여러 크기의 모델을 동시에 보관할 수 있으며, 개수 제한이나 메모리 예산을 넘거나
+    장치 메모리가 부족할 때만 가장 오래 사용하지 않은 모델(LRU)부터 해제합니다.
+    """
+
+    def __init__(self, device, compute_type="int8", max_models=2, memory_budget_mb=None):
+        self.device = str(device)
+        self.compute_type = compute_type
+        self.max_models = max(1, int(max_models))
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, device, model_config):
+        cache_config = model_config.get('whisper_cache', {}) or {}
+        return cls(
+            device,
+            compute_type=cache_config.get('compute_type', 'int8'),
+            max_models=cache_config.get('max_models', 2),
+            memory_budget_mb=cache_config.get('memory_budget_mb'),
+        )
+
+    @staticmethod
+    def estimate_memory_mb(size):
+        return WHISPER_MEMORY_ESTIMATES_MB.get(size, DEFAULT_MEMORY_ESTIMATE_MB)
+
+    @property
+    def loaded_sizes(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def _resident_memory_mb(self):
+        return sum(self.estimate_memory_mb(size) for size in self._models)
+
+    def _needs_eviction(self, size):
+        if len(self._models) >= self.max_models:
+            return True
+        required_mb = self.estimate_memory_mb(size)
+        if self.memory_budget_mb and self._resident_memory_mb() + required_mb > self.memory_budget_mb:
+            return True
+        available_mb = _available_memory_mb(self.device)
+        if available_mb is not None and available_mb < required_mb:
+            return True
+        return False
+
+    def get(self, size):
+        """
+        요청한 크기의 모델을 반환합니다. 이미 로드된 모델은 그대로 재사용합니다.
+        """
+        with self._lock:
+            if size in self._models:
+                self._models.move_to_end(size)
+                return self._models[size]
+
+            while self._models and self._needs_eviction(size):
+                evicted_size, _ = self._models.popitem(last=False)
+                print(f"[모델 관리] 메모리 확보를 위해 Whisper '{evicted_size}' 모델을 해제합니다.")
+                self._release_memory()
+
+            from faster_whisper import WhisperModel
+            print(f"[모델 관리] Whisper '{size}' 모델 로드 중... (장치: {self.device}, {self.compute_type})")
+            model = WhisperModel(size, device=self.device, compute_type=self.compute_type)
+            self._models[size] = model
+            return model
+
+    def preload(self, sizes):
+        for size in sizes:
+            self.get(size)
+
+    def unload(self, size=None):
+        """
+        지정한 모델(지정하지 않으면 전체)을 명시적으로 해제합니다.
+        """
+        with self._lock:
+            if size is None:
+                self._models.clear()
+            else:
+                self._models.pop(size, None)
+            self._release_memory()
+
+    def _release_memory(self):
+        gc.collect()
+        if self.device == 'cuda':
+            import torch
+            torch.cuda.empty_cache()
@@ -1,14 +1,11 @@
-import torch
-import librosa
-import gc
 from dotenv import load_dotenv
+import hashlib
 import os
-import logging
 import time
 import re
-from collections import Counter
-from multiprocessing import Process, Queue, set_start_method
+from multiprocessing import set_start_method
 import random
+import numpy as np
 
 # --- CUDA 멀티프로세싱 오류 해결 ---
 # 'spawn' 시작 방식을 설정하여 CUDA 초기화 충돌을 방지합니다.
@@ -19,204 +16,532 @@ try:
 except RuntimeError:
     pass
 
-from simple_diarizer.diarizer import Diarizer
-from src.utils import load_model_config, load_keyword_config
+from src.utils import load_model_config, load_keyword_config, KEYWORDS_PATH
 from src.metrics_calculator import MetricsCalculator
+from src.model_manager import WhisperModelManager
+from src.diarization_worker import DiarizationWorkerPool
+from src.audio import (
+    SAMPLE_RATE, SharedWaveform, SpooledWaveform, decode_audio, stream_audio, probe_duration, find_silence_cut
+)
+from src.artifact_store import ArtifactStore, fingerprint_file
+from src.instrumentation import Instrumentation
+from src.stt_batcher import WhisperBatcher
+from src.transcript import ROLE_LABELS, UNKNOWN_ID, SegmentTable, TurnTable, WordTable
 
-def run_diarization_in_process(audio_path, result_queue):
-    logging.basicConfig(level=logging.WARNING)
-    try:
-        print("[1/4] 화자 분리 (simple_diarizer)")
-        diarizer = Diarizer(
-            embed_model='xvec',
-            cluster_method='sc',
-            window=0.7,
-            period=0.35
-        )
-        segments = diarizer.diarize(audio_path, num_speakers=2)
-
-        turns = [
-            {'start': seg['start'], 'end': seg['end'], 'speaker': f"SPEAKER_{seg['label']:02d}"}
-            for seg in segments
-        ]
-        result_queue.put(turns)
-    except Exception as e:
-        result_queue.put(e)
+DEFAULT_STT_CONFIG = {
+    'mode': 'full',
+    'window_seconds': 30,
+    'overlap_seconds': 2,
+    'cut_search_seconds': 5,
+    'block_seconds': 5,
+    'spool_dir': None,
+}
 
 class VoiceAnalysisPipeline:
-    def __init__(self):
+    def __init__(self, max_concurrent_runs=1):
+        """
+        max_concurrent_runs는 이 파이프라인으로 동시에 실행할 run() 호출 수입니다. (서버의 동시 요청 수)
+        """
+        # torch는 가져오는 데 수 초가 걸리므로 모듈이 아니라 파이프라인을 만들 때 가져옵니다.
+        import torch
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"사용할 하드웨어: {self.device}")
 
         self.model_config = load_model_config()
         self.keyword_config = load_keyword_config()
-        self.metrics_calculator = MetricsCalculator(self.keyword_config)
+        self.stt_config = {**DEFAULT_STT_CONFIG, **(self.model_config.get('stt') or {})}
+
+        # 화자 분리 작업 프로세스를 먼저 띄워, 그쪽의 모델 로딩이 아래 Kiwi/Whisper 초기화와 겹치도록 합니다.
+        # 작업 프로세스는 한 번에 한 건씩 처리하므로 동시에 실행할 run() 수만큼 띄웁니다. (diarization.workers로 지정 가능)
+        self.diarization_worker = DiarizationWorkerPool(self.model_config.get('diarization'), size=max_concurrent_runs)
+        self.diarization_worker.start(wait=False)
+
+        self.metrics_calculator = MetricsCalculator(
+            self.keyword_config,
+            keyword_path=KEYWORDS_PATH,
+            kiwi_num_workers=self.model_config.get('kiwi', {}).get('num_workers'),
+            llm_config=self.model_config.get('llm'),
+            kiwi_dict_cache=self.model_config.get('kiwi', {}).get('user_dict_cache', '.cache/kiwi'),
+            lexicon_cache=self.model_config.get('lexicon', {}).get('cache_dir', '.cache/lexicon'),
+            flow_config=self.model_config.get('flow_metrics'),
+            segmentation_config=self.model_config.get('segmentation'),
+            sentiment_config=self.model_config.get('sentiment')
+        )
+
+        # Whisper 모델은 한 번만 로드하여 모든 run() 호출에서 재사용합니다.
+        self.model_manager = WhisperModelManager.from_config(self.device, self.model_config)
+        preload_sizes = self.model_config.get('whisper_cache', {}).get('preload') or [self.model_config['whisper']]
+        self.model_manager.preload(preload_sizes)
+        # 동시 요청의 STT 구간을 모아 배치로 인식하는 큐 (기본 모델 크기에만 적용, 설정에서 켠 경우에만)
+        self.stt_batcher = WhisperBatcher.from_config(
+            self.model_manager, self.model_config['whisper'], self.stt_config.get('batching')
+        )
+
+        # 화자 분리 모델을 상주 작업 프로세스에 한 번만 로드해 둡니다.
+        self.diarization_worker.wait_until_ready()
+
+        # 단계별 결과 저장소 (음성 지문 + 단계 설정 기준)
+        self.artifact_store = ArtifactStore.from_config(self.model_config.get('artifacts'))
+
+        # 단계별 시간/메모리/처리 건수 계측 (JSON, Prometheus, 프로파일 내보내기)
+        self.instrumentation = Instrumentation.from_config(self.model_config.get('instrumentation'))
 
         load_dotenv()
         self.hf_token = os.getenv("HUGGING_FACE_TOKEN")
 
+    def close(self):
+        if self.stt_batcher is not None:
+            self.stt_batcher.close()
+        self.diarization_worker.close()
+        self.model_manager.unload()
+        self.instrumentation.close()
+
     def _preprocess_text(self, text):
         text = re.sub(r'[^가-힣a-zA-Z0-9\s]', '', text)
         text = re.sub(r'\s+', ' ', text).strip()
         return text
 
-    def _run_stt(self, waveform):
-        from faster_whisper import WhisperModel
+    def _uses_batcher(self, model_size):
+        return self.stt_batcher is not None and (model_size or self.model_config['whisper']) == self.stt_batcher.model_size
+
+    def _run_stt(self, waveform, model_size=None):
+        """
+        파형 전체를 인식하여 단어 구간 표(WordTable)를 반환합니다.
+        """
+        starts, ends, texts = [], [], []
+        if self._uses_batcher(model_size):
+            print("[2/4] 음성 인식(STT) 시작 (배치 큐)")
+            for word in self.stt_batcher.transcribe(waveform):
+                clean_text = self._preprocess_text(word['word'])
+                if clean_text:
+                    starts.append(word['start'])
+                    ends.append(word['end'])
+                    texts.append(clean_text)
+            return WordTable.from_columns(starts, ends, texts)
+
         print("[2/4] 음성 인식(STT) 시작")
-        stt_model = WhisperModel(self.model_config['whisper'], device=str(self.device), compute_type="int8")
-        
+        stt_model = self.model_manager.get(model_size or self.model_config['whisper'])
+
         segments, _ = stt_model.transcribe(waveform, word_timestamps=True)
         
-        words = []
         for segment in segments:
             if segment.words:
                 for word in segment.words:
                     clean_text = self._preprocess_text(word.word)
                     if clean_text:
-                        words.append({'start': word.start, 'end': word.end, 'text': clean_text})
+                        starts.append(word.start)
+                        ends.append(word.end)
+                        texts.append(clean_text)
+        return WordTable.from_columns(starts, ends, texts)
+
+    def _iter_stt_windows(self, blocks, model_size=None, stream_info=None):
+        """
+        파형 블록(stream_audio 또는 SpooledWaveform.blocks)을 구간(window_seconds) 단위로 모아 인식하여 구간마다 단어 표(WordTable)를 반환합니다.
+        메모리에는 한 구간 분량의 파형만 유지되므로 녹음 길이와 관계없이 사용량이 일정합니다.
+        단어는 구간마다 열 형식으로 바로 묶어, 단어별 파이썬 객체를 통화 끝까지 들고 있지 않습니다.
+
+        구간은 끝부분 cut_search_seconds 안에서 VAD로 찾은 무음 지점에서 자릅니다.
+        경계에 걸친 단어가 잘리지 않도록 자른 지점 뒤로 overlap_seconds만큼 더 인식하고,
+        다음 구간도 자른 지점보다 overlap_seconds 앞에서 시작합니다. 겹친 부분의 단어는
+        중간 지점이 자른 지점 앞이면 앞 구간, 뒤면 뒤 구간에서만 반환하여 중복되지 않습니다.
+        stream_info 딕셔너리가 주어지면 읽은 전체 샘플 수('samples')를 기록합니다.
+        """
+        print("[2/4] 음성 인식(STT) 시작 (스트리밍)")
+        stt_model = self.model_manager.get(model_size or self.model_config['whisper'])
+        window = int(self.stt_config['window_seconds'] * SAMPLE_RATE)
+        overlap = int(self.stt_config['overlap_seconds'] * SAMPLE_RATE)
+        search = int(self.stt_config['cut_search_seconds'] * SAMPLE_RATE)
+        if window <= search + overlap:
+            raise ValueError("stt.window_seconds는 cut_search_seconds + overlap_seconds보다 커야 합니다.")
+        if stream_info is None:
+            stream_info = {}
+        stream_info['samples'] = 0
+
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_start = 0  # buffer[0]의 절대 샘플 위치
+        emit_from = 0     # 이 위치(절대 샘플) 이전의 단어는 이미 반환됨
+        exhausted = False
+        try:
+            while True:
+                pending_blocks = [buffer]
+                pending_length = len(buffer)
+                while not exhausted and pending_length < window:
+                    block = next(blocks, None)
+                    if block is None:
+                        exhausted = True
+                    else:
+                        pending_blocks.append(block)
+                        pending_length += len(block)
+                        stream_info['samples'] += len(block)
+                buffer = np.concatenate(pending_blocks) if len(pending_blocks) > 1 else buffer
+
+                if exhausted:
+                    cut = end = len(buffer)
+                else:
+                    cut = find_silence_cut(buffer, window, search)
+                    end = min(len(buffer), cut + overlap)
+
+                if end > 0:
+                    starts, ends, texts = [], [], []
+                    offset = buffer_start / SAMPLE_RATE
+                    emit_until = (buffer_start + cut) / SAMPLE_RATE
+                    emit_after = emit_from / SAMPLE_RATE
+                    segments, _ = stt_model.transcribe(buffer[:end], word_timestamps=True)
+                    for segment in segments:
+                        for word in segment.words or ():
+                            word_start, word_end = word.start + offset, word.end + offset
+                            word_mid_point = word_start + (word_end - word_start) / 2
+                            if word_mid_point < emit_after or (not exhausted and word_mid_point >= emit_until):
+                                continue
+                            clean_text = self._preprocess_text(word.word)
+                            if clean_text:
+                                starts.append(word_start)
+                                ends.append(word_end)
+                                texts.append(clean_text)
+                    yield WordTable.from_columns(starts, ends, texts)
+
+                if exhausted:
+                    break
+                emit_from = buffer_start + cut
+                next_start = max(cut - overlap, 0)
+                buffer = buffer[next_start:].copy()
+                buffer_start += next_start
+        finally:
+            if hasattr(blocks, 'close'):
+                blocks.close()
+
+    def _stage_configs(self, whisper_size):
+        """
+        단계별 결과를 재사용해도 되는지 판단하는 기준이 되는 설정들입니다.
+        """
+        diarization_config = {
+            key: self.diarization_worker.config[key]
+            for key in ('embed_model', 'cluster_method', 'window', 'period', 'num_speakers')
+        }
+        stt_config = {
+            'whisper': whisper_size or self.model_config['whisper'],
+            'compute_type': self.model_manager.compute_type,
+            'sample_rate': SAMPLE_RATE
+        }
+        if self.stt_config['mode'] == 'streaming':
+            # 구간 경계가 인식 결과에 영향을 주므로 스트리밍 설정도 기준에 포함합니다.
+            stt_config['streaming'] = {
+                key: self.stt_config[key] for key in ('window_seconds', 'overlap_seconds', 'cut_search_seconds')
+            }
+        elif self._uses_batcher(whisper_size):
+            # 배치 인식은 VAD 구간 단위로 고정 언어로 인식하므로 결과가 달라질 수 있습니다.
+            stt_config['batched'] = {
+                'language': self.stt_batcher.language, 'chunk_seconds': self.stt_batcher.chunk_seconds
+            }
+        transcript_config = {'diarization': diarization_config, 'stt': stt_config}
+        return {
+            'audio': {'sample_rate': SAMPLE_RATE},
+            'diarization': diarization_config,
+            'stt': stt_config,
+            'merge': transcript_config,
+            'postprocess': transcript_config
+        }
+
+    def _run_audio_stages(self, audio_path, need_diarization, need_stt, whisper_size, recorder, waveform=None):
+        """
+        오디오를 한 번 디코딩한 뒤, 필요한 단계(화자 분리, STT)만 동시에 실행합니다.
+        waveform이 주어지면(입력 단계에서 이미 디코딩한 경우) 디코딩을 건너뜁니다.
+        (오디오 길이, 화자 구간 표 또는 None, 단어 구간 표 또는 None)을 반환합니다.
+        """
+        # 0. 오디오 디코딩 (한 번만 수행하고 화자 분리와 STT가 같은 버퍼를 공유)
+        with recorder.stage('decode'):
+            shared_audio = SharedWaveform(decode_audio(audio_path) if waveform is None else waveform)
+        total_duration = shared_audio.duration
+        print(f"오디오 디코딩 완료. (소요 시간: {recorder.durations()['decode']:.2f}초)")
+
+        speaker_turns = None
+        word_segments = None
+        # 1~2. 화자 분리와 음성 인식(STT)을 동시에 진행
+        # 화자 분리는 상주 작업 프로세스에서, STT는 현재 프로세스에서 실행되어 두 단계가 겹쳐집니다.
+        with shared_audio:
+            parallel_start_time = time.time()
+            diarization_job = self.diarization_worker.submit_shared(shared_audio.handle) if need_diarization else None
+
+            if need_stt:
+                try:
+                    with recorder.stage('stt'):
+                        word_segments = self._run_stt(shared_audio.array, whisper_size)
+                except Exception:
+                    if diarization_job is not None:
+                        self.diarization_worker.discard(diarization_job)
+                    raise
+                print(f"음성 인식(STT) 완료. (소요 시간: {recorder.durations()['stt']:.2f}초)")
+
+            if diarization_job is not None:
+                with recorder.stage('diarization_wait'):
+                    diarization_result = self.diarization_worker.result(diarization_job)
+                speaker_turns = TurnTable.from_dicts(diarization_result['turns'])
+                recorder.record_time('diarization', diarization_result['elapsed'])
+                recorder.record_time('diarization_stt_wall', time.time() - parallel_start_time)
+                durations = recorder.durations()
+                print(f"화자 분리 완료. (소요 시간: {durations['diarization']:.2f}초, "
+                      f"STT 이후 대기: {durations['diarization_wait']:.2f}초)")
+
+        return total_duration, speaker_turns, word_segments
+
+    def _run_streaming_stages(self, audio_path, need_diarization, need_stt, whisper_size, recorder):
+        """
+        스트리밍 모드에서 필요한 단계(화자 분리, STT)만 실행합니다.
+        (오디오 길이, 화자 구간 표 또는 None, 단어 구간 표 또는 None)을 반환합니다.
+
+        STT만 필요하면 ffmpeg 블록을 바로 구간 단위로 인식합니다.
+        화자 분리가 필요하면 블록 단위로 디코딩한 파형을 임시 파일(SpooledWaveform)에 기록하고,
+        작업 프로세스와 STT가 이 파일을 메모리 매핑으로 읽으며 동시에 진행합니다.
+        어느 경우에도 메모리에 파일 전체 파형을 올리지 않습니다. (임시 파일은 초당 약 64KB의 디스크를 사용합니다)
+
+        메모리 상한은 파형에만 적용됩니다. 화자 구간은 STT와 동시에 도는 화자 분리가 끝나야 나오므로
+        단어를 구간별로 화자에 배정하며 합칠 수 없고, 단어 표는 통화 끝까지 모은 뒤 결과 종합 단계에서 한 번에 합칩니다.
+        단어 표는 구간별 열 형식(시각 배열과 텍스트 버퍼)이고 결과 대본(SegmentTable)이 같은 텍스트 버퍼를 그대로 쓰므로,
+        녹음 길이에 비례해 늘어나는 것은 결과로 돌려주는 대본 크기(단어당 수십 바이트) 정도입니다.
+        """
+        block_seconds = self.stt_config['block_seconds']
+        if not need_diarization:
+            if not need_stt:
+                return probe_duration(audio_path), None, None
+            stream_info = {}
+            with recorder.stage('stt'):
+                word_segments = WordTable.concat(list(self._iter_stt_windows(
+                    stream_audio(audio_path, block_seconds), whisper_size, stream_info
+                )))
+            print(f"음성 인식(STT) 완료. (소요 시간: {recorder.durations()['stt']:.2f}초)")
+            return stream_info['samples'] / SAMPLE_RATE, None, word_segments
 
-        del stt_model
-        gc.collect()
-        torch.cuda.empty_cache()
-        return words
+        with recorder.stage('decode'):
+            spooled_audio = SpooledWaveform(audio_path, block_seconds, dir=self.stt_config['spool_dir'])
+        print(f"오디오 디코딩 완료. (소요 시간: {recorder.durations()['decode']:.2f}초)")
 
-    def run(self, audio_path):
+        word_segments = None
+        with spooled_audio:
+            parallel_start_time = time.time()
+            diarization_job = self.diarization_worker.submit_spooled(spooled_audio.handle)
+            if need_stt:
+                try:
+                    with recorder.stage('stt'):
+                        word_segments = WordTable.concat(list(self._iter_stt_windows(
+                            spooled_audio.blocks(block_seconds), whisper_size
+                        )))
+                except Exception:
+                    self.diarization_worker.discard(diarization_job)
+                    raise
+                print(f"음성 인식(STT) 완료. (소요 시간: {recorder.durations()['stt']:.2f}초)")
+
+            with recorder.stage('diarization_wait'):
+                diarization_result = self.diarization_worker.result(diarization_job)
+            speaker_turns = TurnTable.from_dicts(diarization_result['turns'])
+            recorder.record_time('diarization', diarization_result['elapsed'])
+            recorder.record_time('diarization_stt_wall', time.time() - parallel_start_time)
+            durations = recorder.durations()
+            print(f"화자 분리 완료. (소요 시간: {durations['diarization']:.2f}초, "
+                  f"STT 이후 대기: {durations.get('diarization_wait', 0.0):.2f}초)")
+            return spooled_audio.duration, speaker_turns, word_segments
+
+    def run(self, audio_path, whisper_size=None, waveform=None, fingerprint=None):
+        """
+        음성 파일을 분석합니다. 입력 단계(src.ingest)에서 이미 디코딩한 파형이나 계산한 지문이 있으면
+        waveform, fingerprint로 넘겨 다시 계산하지 않습니다. waveform만 있고 audio_path가 None이어도 됩니다.
+        """
+        if audio_path is None and waveform is None:
+            raise ValueError("audio_path와 waveform 중 하나는 지정해야 합니다.")
         session_id = f"{int(time.time())}{random.randint(100, 999)}"
         print(f"새로운 분석 세션을 시작합니다. (ID: {session_id})")
 
-        total_start_time = time.time()
-        processing_times = {}
+        recorder = self.instrumentation.new_recorder(session_id)
+        with recorder.stage('total'):
+            final_results = self._run_session(audio_path, whisper_size, session_id, recorder, waveform, fingerprint)
 
-        # 1. 화자 분리
-        diarization_start_time = time.time()
-        result_queue = Queue()
-        diarization_process = Process(target=run_diarization_in_process, args=(audio_path, result_queue))
-        diarization_process.start()
-        speaker_turns = result_queue.get()
-        diarization_process.join()
+        # processing_times는 기존 응답 형식(문자열)을 유지하고, 숫자 계측 결과는 instrumentation에 담습니다.
+        processing_times = {
+            name: f"{seconds:.2f}s" for name, seconds in recorder.durations().items() if '.' not in name
+        }
+        self.instrumentation.publish(recorder)
+        return {"processing_times": processing_times, **final_results, "instrumentation": recorder.report()}
 
-        if isinstance(speaker_turns, Exception):
-            raise speaker_turns
-        
-        processing_times['diarization'] = time.time() - diarization_start_time
-        print(f"화자 분리 완료. (소요 시간: {processing_times['diarization']:.2f}초)")
-
-        # 2. 음성 인식 (STT)
-        stt_start_time = time.time()
-        audio_waveform, sr = librosa.load(audio_path, sr=16000, mono=True)
-        total_duration = len(audio_waveform) / sr
-        word_segments = self._run_stt(audio_waveform)
-        processing_times['stt'] = time.time() - stt_start_time
-        print(f"음성 인식(STT) 완료. (소요 시간: {processing_times['stt']:.2f}초)")
-        
-        # 3. 결과 종합
-        merge_start_time = time.time()
-        structured_transcript = self._merge_results(speaker_turns, word_segments)
-        processing_times['merge'] = time.time() - merge_start_time
-        print(f"결과 종합 완료. (소요 시간: {processing_times['merge']:.2f}초)")
-
-        # 4. 후처리
-        postprocess_start_time = time.time()
-        final_transcript = self._postprocess_transcript(structured_transcript)
-        processing_times['post_processing'] = time.time() - postprocess_start_time
-        print(f"후처리 완료. (소요 시간: {processing_times['post_processing']:.2f}초)")
+    def _run_session(self, audio_path, whisper_size, session_id, recorder, waveform=None, fingerprint=None):
+        # 저장된 단계 결과가 있으면 마지막으로 유효한 단계부터 이어서 진행합니다.
+        if self.artifact_store is None:
+            fingerprint = None
+        elif fingerprint is None:
+            if audio_path is None:
+                # 메모리 입력은 파일이 없으므로 디코딩된 파형으로 지문을 만듭니다.
+                fingerprint = hashlib.sha256(np.ascontiguousarray(waveform).tobytes()).hexdigest()
+            else:
+                with recorder.stage('fingerprint'):
+                    fingerprint = fingerprint_file(audio_path)
+        stage_configs = self._stage_configs(whisper_size)
+        restored_stages = []
+
+        def load_stage(stage, table_type=None):
+            if fingerprint is None:
+                return None
+            data = self.artifact_store.load(fingerprint, stage, stage_configs[stage])
+            if data is None:
+                return None
+            restored_stages.append(stage)
+            return table_type.from_data(data) if table_type is not None else data
+
+        def save_stage(stage, data):
+            if fingerprint is not None:
+                # 표는 열 단위(to_columns)로 저장합니다. 이전의 딕셔너리 목록 형식도 from_data()로 그대로 읽습니다.
+                if hasattr(data, 'to_columns'):
+                    data = data.to_columns()
+                self.artifact_store.save(fingerprint, stage, stage_configs[stage], data)
+
+        audio_info = load_stage('audio')
+        speaker_turns = load_stage('diarization', TurnTable)
+        final_transcript = load_stage('postprocess', SegmentTable)
+        structured_transcript = load_stage('merge', SegmentTable) if final_transcript is None else None
+        word_segments = load_stage('stt', WordTable) \
+            if final_transcript is None and structured_transcript is None else None
+        if restored_stages:
+            print(f"저장된 단계 결과를 재사용합니다: {', '.join(restored_stages)}")
+
+        need_diarization = speaker_turns is None
+        need_stt = final_transcript is None and structured_transcript is None and word_segments is None
+        # 이미 디코딩된 파형이 있으면 스트리밍으로 다시 디코딩할 이유가 없으므로 전체 모드로 처리합니다.
+        streaming = self.stt_config['mode'] == 'streaming' and waveform is None
+        if audio_info is None or need_diarization or need_stt:
+            run_stages = self._run_streaming_stages if streaming else self._run_audio_stages
+            stage_args = () if streaming else (waveform,)
+            total_duration, new_turns, new_words = run_stages(
+                audio_path, need_diarization, need_stt, whisper_size, recorder, *stage_args
+            )
+            audio_info = {'duration': total_duration}
+            save_stage('audio', audio_info)
+            if need_diarization:
+                speaker_turns = new_turns
+                save_stage('diarization', speaker_turns)
+            if need_stt:
+                word_segments = new_words
+                save_stage('stt', word_segments)
+
+        if final_transcript is None:
+            # 3. 결과 종합
+            if structured_transcript is None:
+                with recorder.stage('merge'):
+                    structured_transcript = self._merge_results(speaker_turns, word_segments)
+                print(f"결과 종합 완료. (소요 시간: {recorder.durations()['merge']:.2f}초)")
+                save_stage('merge', structured_transcript)
+
+            # 4. 후처리
+            with recorder.stage('post_processing'):
+                final_transcript = self._postprocess_transcript(structured_transcript)
+            print(f"후처리 완료. (소요 시간: {recorder.durations()['post_processing']:.2f}초)")
+            save_stage('postprocess', final_transcript)
+
+        total_duration = audio_info['duration']
+
+        recorder.add_counts({
+            'audio_seconds': total_duration,
+            'speaker_turns': len(speaker_turns),
+            'transcript_segments': len(final_transcript),
+            'words': final_transcript.word_count(),
+        })
 
         # 5. 지표 계산
-        metrics_start_time = time.time()
-        final_metrics = self.metrics_calculator.calculate_all_metrics(
-            final_transcript, 
-            speaker_turns, 
-            total_duration,
-            session_id
-        )
-        processing_times['metrics_calculation'] = time.time() - metrics_start_time
-        print(f"지표 계산 완료. (소요 시간: {processing_times['metrics_calculation']:.2f}초)")
+        with recorder.stage('metrics_calculation'):
+            final_metrics = self.metrics_calculator.calculate_all_metrics(
+                final_transcript, 
+                speaker_turns, 
+                total_duration,
+                session_id,
+                recorder=recorder
+            )
+        print(f"지표 계산 완료. (소요 시간: {recorder.durations()['metrics_calculation']:.2f}초)")
+
+        processing_info = {'restored_stages': restored_stages}
+        # LLM 사용량과 캐시 적중 수는 지표 계산 단계가 이 세션의 요청만 세어 기록해 둡니다.
+        llm_cache_stats = {
+            name[len('llm_cache_'):]: value for name, value in recorder.counters.items() if name.startswith('llm_cache_')
+        }
+        if llm_cache_stats:
+            processing_info['llm_cache'] = llm_cache_stats
 
-        processing_times['total'] = time.time() - total_start_time
-        
         final_results = {
-            "processing_times": {k: f"{v:.2f}s" for k, v in processing_times.items()},
-            "transcript": final_transcript,
+            "processing_info": processing_info,
+            "transcript": final_transcript.to_dicts(),
             "metrics": final_metrics
         }
         
         return final_results
 
     def _merge_results(self, speaker_turns, word_segments):
+        """
+        단어마다 중간 지점을 포함하는 화자 구간을 찾아 화자를 붙이고, 같은 화자의 연속된 단어(간격 1초 미만)를
+        하나의 대본 구간으로 묶어 SegmentTable로 반환합니다. 입력은 표 또는 딕셔너리 목록 모두 받습니다.
+        """
         print("[3/4] 결과 종합 시작")
-        if not word_segments: return []
-
-        for word in word_segments:
-            word['speaker'] = 'UNKNOWN'
-            word_mid_point = word['start'] + (word['end'] - word['start']) / 2
-            for turn in speaker_turns:
-                if word_mid_point >= turn['start'] and word_mid_point <= turn['end']:
-                    word['speaker'] = turn['speaker']
-                    break
-        
-        merged_transcript = []
-        if not word_segments:
-            return merged_transcript
-            
-        current_segment = {
-            'text': word_segments[0]['text'], 
-            'speaker': word_segments[0]['speaker'],
-            'start_time': word_segments[0]['start'],
-            'end_time': word_segments[0]['end']
-        }
+        words = WordTable.from_data(word_segments)
+        turns = TurnTable.from_data(speaker_turns)
+        n_words = len(words)
+        if not n_words:
+            return SegmentTable.empty(turns.labels)
 
-        for i in range(1, len(word_segments)):
-            word = word_segments[i]
-            if word['speaker'] == current_segment['speaker'] and \
-               word['start'] - word_segments[i-1]['end'] < 1.0:
-                current_segment['text'] += ' ' + word['text']
-                current_segment['end_time'] = word['end']
-            else:
-                merged_transcript.append(current_segment)
-                current_segment = {
-                    'text': word['text'], 
-                    'speaker': word['speaker'],
-                    'start_time': word['start'],
-                    'end_time': word['end']
-                }
-        merged_transcript.append(current_segment)
-        
-        return merged_transcript
+        # 화자 구간을 시작 시각 순으로 정렬하고 끝 시각의 누적 최댓값을 구해 둡니다.
+        # 단어 중간 지점을 포함하는 첫 구간은, 시작 시각이 중간 지점 이하인 구간들 중
+        # 누적 최대 끝 시각이 처음으로 중간 지점 이상이 되는 구간이므로 모든 단어를 이진 탐색 두 번으로 찾을 수 있습니다.
+        order = np.argsort(turns.starts, kind='stable')
+        turn_starts = turns.starts[order]
+        max_turn_ends = np.maximum.accumulate(turns.ends[order]) if len(order) else turns.ends
+        word_mid_points = words.starts + (words.ends - words.starts) / 2
+        last_started = np.searchsorted(turn_starts, word_mid_points, side='right') - 1
+        first_covering = np.searchsorted(max_turn_ends, word_mid_points, side='left')
+        covered = first_covering <= last_started
+        word_speakers = np.full(n_words, UNKNOWN_ID, dtype=np.int16)
+        word_speakers[covered] = turns.speakers[order][first_covering[covered]]
+
+        # 화자가 바뀌거나 앞 단어와 1초 이상 떨어진 단어에서 새 구간을 시작합니다.
+        breaks = np.flatnonzero(
+            (word_speakers[1:] != word_speakers[:-1]) | (words.starts[1:] - words.ends[:-1] >= 1.0)
+        ) + 1
+        firsts = np.concatenate(([0], breaks))
+        bounds = np.append(firsts, n_words)
+        # 구간 텍스트는 단어 텍스트 열의 연속 범위이므로 버퍼를 공유하고 위치만 고릅니다.
+        return SegmentTable(
+            words.starts[firsts], words.ends[bounds[1:] - 1], word_speakers[firsts], turns.labels,
+            words.buffer, words.offsets[bounds]
+        )
 
     def _postprocess_transcript(self, transcript):
+        """
+        화자를 알 수 없는 구간을 앞(첫 구간이면 뒤) 구간의 화자로 채우고, 같은 화자의 연속 구간을 합친 뒤
+        구간 수가 가장 많은 화자를 상담사(Agent), 나머지를 고객(Customer)으로 바꿉니다.
+        """
         print("[후처리] 대본 정리 시작")
-        if not transcript: return []
+        transcript = SegmentTable.from_data(transcript)
+        n_segments = len(transcript)
+        if not n_segments:
+            return SegmentTable.empty(ROLE_LABELS)
 
-        for i, segment in enumerate(transcript):
-            if segment['speaker'] == 'UNKNOWN':
-                if i > 0:
-                    segment['speaker'] = transcript[i-1]['speaker']
-                else:
-                    for next_segment in transcript[i+1:]:
-                        if next_segment['speaker'] != 'UNKNOWN':
-                            segment['speaker'] = next_segment['speaker']
-                            break
-
-        remerged_transcript = []
-        if transcript:
-            remerged_transcript.append(transcript[0])
-            for segment in transcript[1:]:
-                if segment['speaker'] == remerged_transcript[-1]['speaker']:
-                    remerged_transcript[-1]['text'] += ' ' + segment['text']
-                    remerged_transcript[-1]['end_time'] = segment['end_time']
-                else:
-                    remerged_transcript.append(segment)
-        
-        speaker_counts = Counter(seg['speaker'] for seg in remerged_transcript)
-        
-        if len(speaker_counts) > 0:
-            agent_label = speaker_counts.most_common(1)[0][0]
-            
-            for seg in remerged_transcript:
-                if seg['speaker'] == agent_label:
-                    seg['speaker'] = 'Agent'
-                else:
-                    seg['speaker'] = 'Customer'
+        speakers = transcript.speakers
+        known = speakers != UNKNOWN_ID
+        if known.any() and not known.all():
+            sources = np.maximum.accumulate(np.where(known, np.arange(n_segments), -1))
+            sources[sources < 0] = np.argmax(known)
+            speakers = speakers[sources]
+
+        firsts = np.concatenate(([0], np.flatnonzero(speakers[1:] != speakers[:-1]) + 1))
+        bounds = np.append(firsts, n_segments)
+        remerged_speakers = speakers[firsts]
+
+        # 구간 수가 같으면 먼저 나온 화자를 상담사로 봅니다.
+        labels, first_seen, counts = np.unique(remerged_speakers, return_index=True, return_counts=True)
+        agent_label = labels[max(range(len(labels)), key=lambda i: (counts[i], -first_seen[i]))]
+        roles = np.where(remerged_speakers == agent_label, 0, 1)
+
+        # 합쳐지면서 사라진 구간 경계(쉼)는 문장 분리에 쓰도록 남겨 둡니다.
+        merged_away = np.ones(n_segments, dtype=bool)
+        merged_away[firsts] = False
+        pauses = transcript.offsets[:-1][merged_away]
+        if transcript.pauses is not None:
+            pauses = np.union1d(pauses, transcript.pauses)
 
         print("[후처리] 대본 정리 완료")
-        return remerged_transcript
\ No newline at end of file
+        return SegmentTable(
+            transcript.starts[firsts], transcript.ends[bounds[1:] - 1], roles, ROLE_LABELS,
+            transcript.buffer, transcript.offsets[bounds], pauses=pauses
+        )
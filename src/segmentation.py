@@ -0,0 +1,73 @@
+from abc import ABC, abstractmethod
+
+from src.transcript import SegmentTable
+
+DEFAULT_SEGMENTATION_CONFIG = {
+    'backend': 'fast',  # "fast": 구간/쉼 경계 + Kiwi 문장 분리, "kss": 화자별 전체 텍스트에 kss (느리지만 정확)
+}
+
+
+class SentenceSegmenter(ABC):
+    """
+    대본에서 한 화자의 문장 목록을 뽑는 문장 분리 방식의 공통 인터페이스입니다.
+    split()은 (문장 목록, 문장별 Kiwi 토큰 목록 또는 None)을 반환합니다.
+    토큰을 함께 돌려주는 방식이면 지표 계산에서 형태소 분석을 다시 하지 않습니다.
+    split()을 구현하지 않은 하위 클래스는 객체를 만들 때 TypeError가 발생합니다.
+    """
+    name = None
+
+    @abstractmethod
+    def split(self, transcript, speaker, with_tokens=True):
+        """
+        transcript에서 speaker의 문장 목록과 문장별 토큰 목록(또는 None)을 반환합니다.
+        """
+
+
+class KssSegmenter(SentenceSegmenter):
+    """
+    화자의 모든 구간을 하나의 문자열로 이어 붙여 kss로 나눕니다. (기존 방식, 긴 통화에서는 느림)
+    """
+    name = 'kss'
+
+    def split(self, transcript, speaker, with_tokens=True):
+        import kss
+        turns = SegmentTable.from_data(transcript).texts_of(speaker)
+        if not turns:
+            return [], None
+        return kss.split_sentences(' '.join(turns)), None
+
+
+class KiwiSegmenter(SentenceSegmenter):
+    """
+    대본에 이미 있는 화자 전환과 쉼 경계로 먼저 나눈 조각들을 Kiwi 배치 분석(다중 스레드)으로 문장 분리합니다.
+    문장 분리와 형태소 분석이 한 번의 분석으로 끝나므로 문장별 토큰도 함께 반환합니다.
+    """
+    name = 'fast'
+
+    def __init__(self, kiwi):
+        self.kiwi = kiwi
+
+    def split(self, transcript, speaker, with_tokens=True):
+        pieces = SegmentTable.from_data(transcript).pieces_of(speaker)
+        sentences = []
+        sentence_tokens = [] if with_tokens else None
+        if not pieces:
+            return sentences, sentence_tokens
+        for piece_sentences in self.kiwi.split_into_sents(pieces, return_tokens=with_tokens):
+            for sentence in piece_sentences:
+                sentences.append(sentence.text)
+                if with_tokens:
+                    sentence_tokens.append(sentence.tokens)
+        return sentences, sentence_tokens
+
+
+def create_segmenter(segmentation_config, kiwi):
+    """
+    설정의 backend 이름에 맞는 문장 분리 방식을 만듭니다.
+    """
+    backend = {**DEFAULT_SEGMENTATION_CONFIG, **(segmentation_config or {})}['backend']
+    if backend == KiwiSegmenter.name:
+        return KiwiSegmenter(kiwi)
+    if backend == KssSegmenter.name:
+        return KssSegmenter()
+    raise ValueError(f"알 수 없는 문장 분리 방식입니다: {backend} ('fast' 또는 'kss')")
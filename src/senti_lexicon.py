@@ -0,0 +1,130 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from pathlib import Path
+
+# 파일 구조: 헤더 | 단어 시작 위치(uint32, 단어 수 + 1개) | 극성(int8, 단어 수) | UTF-8 단어 바이트열
+# 단어는 UTF-8 바이트 순으로 정렬되어 있어 이진 탐색으로 찾습니다. 캐시 파일은 만든 기계에서만 쓰므로 바이트 순서는 기계 기준입니다.
+MAGIC = b'KNUL'
+VERSION = 1
+HEADER = struct.Struct('=4sIII')  # 매직, 버전, 단어 수, 바이트열 길이
+
+
+def _source_key(source_path):
+    stat = os.stat(source_path)
+    payload = f"{os.path.abspath(source_path)}:{stat.st_size}:{stat.st_mtime_ns}:{VERSION}:{sys.byteorder}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def compile_lexicon(source_path, output_path):
+    """
+    KNU 감성사전(JSON)을 정렬된 문자열 테이블과 int8 극성 배열로 이루어진 바이너리 파일로 변환합니다.
+    같은 어근이 여러 번 나오면 마지막 값을 사용합니다.
+    """
+    with open(source_path, 'r', encoding='utf-8') as f:
+        senti_data = json.load(f)
+    polarities = {}
+    for item in senti_data:
+        polarities[item['word_root'].encode('utf-8')] = int(item['polarity'])
+
+    words = sorted(polarities)
+    offsets = array('I', [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    polarity_values = array('b', (polarities[word] for word in words))
+    blob = b''.join(words)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # 임시 파일에 쓴 뒤 교체하여, 다른 프로세스가 쓰다 만 파일을 매핑하지 않도록 합니다.
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(words), len(blob)))
+        f.write(offsets.tobytes())
+        f.write(polarity_values.tobytes())
+        f.write(blob)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class SentimentLexicon:
+    """
+    compile_lexicon()으로 만든 감성사전 파일을 메모리 매핑하여, 딕셔너리를 만들지 않고 이진 탐색으로 극성을 찾습니다.
+    파일은 읽기 전용으로 매핑되므로 여러 작업 프로세스가 운영체제의 페이지 캐시를 함께 사용합니다.
+    자주 나오는 형태소는 작은 LRU 캐시로 다시 찾지 않습니다.
+    """
+
+    def __init__(self, path, cache_size=4096):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, blob_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"감성사전 파일 형식이 올바르지 않습니다: {self.path}")
+        self._count = count
+        offsets_start = HEADER.size
+        polarity_start = offsets_start + (count + 1) * 4
+        self._blob_start = polarity_start + count
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[offsets_start:polarity_start].cast('I')
+        self._polarities = self._view[polarity_start:self._blob_start].cast('b')
+        self.get = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @classmethod
+    def from_source(cls, source_path, cache_dir=".cache/lexicon"):
+        """
+        원본 JSON이 바뀌지 않았으면 이미 변환한 파일을 열고, 아니면 한 번 변환한 뒤 엽니다. 원본이 없으면 None을 반환합니다.
+        """
+        try:
+            key = _source_key(source_path)
+        except OSError:
+            return None
+        path = Path(cache_dir) / f"senti-{key}.bin"
+        if not path.exists():
+            compile_lexicon(source_path, path)
+        return cls(path)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def _word_at(self, index):
+        start = self._blob_start + self._offsets[index]
+        end = self._blob_start + self._offsets[index + 1]
+        return self._mmap[start:end]
+
+    def _lookup(self, word):
+        """
+        단어의 극성(-2 ~ 2)을 반환하고, 사전에 없으면 None을 반환합니다.
+        """
+        key = word.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._word_at(middle)
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return self._polarities[middle]
+        return None
+
+    def words(self):
+        for index in range(self._count):
+            yield self._word_at(index).decode('utf-8')
+
+    def close(self):
+        self.get.cache_clear()
+        self._offsets.release()
+        self._polarities.release()
+        self._view.release()
+        self._mmap.close()
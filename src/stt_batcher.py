@@ -0,0 +1,189 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE, speech_chunks
+
+# Whisper가 한 번에 인식하는 창 길이(초)입니다. 배치의 각 구간은 이 길이의 칸 하나씩을 차지합니다.
+WHISPER_WINDOW_SECONDS = 30
+
+DEFAULT_BATCHING_CONFIG = {
+    'enabled': False,
+    'max_batch_size': 8,     # 한 번의 배치 인식에 넣을 최대 구간 수
+    'max_wait_ms': 20,       # 첫 구간이 들어온 뒤 배치를 채우려고 기다릴 최대 시간
+    'language': 'ko',        # 여러 요청의 구간이 섞이므로 언어를 고정합니다.
+    'chunk_seconds': 30,
+}
+
+
+class WhisperBatcher:
+    """
+    동시에 들어온 여러 분석 요청의 VAD 구간을 하나의 큐에 모아 faster-whisper 배치 인식(BatchedInferencePipeline)으로 처리합니다.
+    전용 스레드가 첫 구간을 받은 뒤 max_wait_ms 동안 또는 max_batch_size개가 찰 때까지 구간을 더 모아 한 번에 인식하고,
+    결과 단어를 각 요청의 원래 시각으로 되돌려 돌려줍니다.
+    """
+
+    def __init__(self, model_manager, model_size, max_batch_size=8, max_wait_ms=20, language='ko', chunk_seconds=30):
+        self.model_manager = model_manager
+        self.model_size = model_size
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000
+        self.language = language
+        # 구간이 Whisper 창보다 길면 다른 구간과 칸을 나눠 쓰게 되므로 창 길이로 제한합니다.
+        self.chunk_seconds = min(chunk_seconds, WHISPER_WINDOW_SECONDS)
+        self._queue = queue.Queue()
+        self._pipeline = None
+        self._pipeline_model = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'batches': 0, 'chunks': 0, 'requests': 0, 'inference_seconds': 0.0, 'queue_wait_seconds': 0.0}
+        self._thread = threading.Thread(target=self._loop, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, model_manager, model_size, batching_config):
+        batching_config = {**DEFAULT_BATCHING_CONFIG, **(batching_config or {})}
+        if not batching_config.pop('enabled'):
+            return None
+        return cls(model_manager, model_size, **batching_config)
+
+    def transcribe(self, waveform):
+        """
+        파형 하나를 VAD 구간으로 나누어 배치 큐에 넣고, 모든 구간의 인식이 끝나면 단어 목록을 시각 순으로 반환합니다.
+        각 단어는 {'start', 'end', 'word'} 딕셔너리이며 시각은 원래 파형 기준(초)입니다.
+        """
+        chunks = speech_chunks(waveform, self.chunk_seconds)
+        with self._stats_lock:
+            self._stats['requests'] += 1
+        futures = []
+        for start, end in chunks:
+            future = Future()
+            self._queue.put({
+                'audio': waveform[start:end],
+                'offset': start / SAMPLE_RATE,
+                'future': future,
+                'queued_at': time.perf_counter(),
+            })
+            futures.append(future)
+        words = []
+        for future in futures:
+            words.extend(future.result())
+        return words
+
+    def _get_pipeline(self):
+        from faster_whisper import BatchedInferencePipeline
+        model = self.model_manager.get(self.model_size)
+        # 모델 관리자가 메모리 부족으로 모델을 다시 로드했으면 배치 파이프라인도 새로 만듭니다.
+        if self._pipeline is None or self._pipeline_model is not model:
+            self._pipeline = BatchedInferencePipeline(model=model)
+            self._pipeline_model = model
+        return self._pipeline
+
+    def _collect_batch(self):
+        items = [self._queue.get()]
+        if items[0] is None:
+            return None
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _loop(self):
+        while True:
+            items = self._collect_batch()
+            if items is None:
+                return
+            started_at = time.perf_counter()
+            try:
+                results = self._infer(items)
+            except Exception as e:
+                for item in items:
+                    item['future'].set_exception(e)
+                continue
+            finally:
+                with self._stats_lock:
+                    self._stats['batches'] += 1
+                    self._stats['chunks'] += len(items)
+                    self._stats['inference_seconds'] += time.perf_counter() - started_at
+                    self._stats['queue_wait_seconds'] += sum(started_at - item['queued_at'] for item in items)
+            for item, words in zip(items, results):
+                item['future'].set_result(words)
+
+    def _infer(self, items):
+        """
+        구간마다 Whisper 창 길이(30초)의 칸을 하나씩 주고, 남는 부분은 0으로 채워 이어 붙인 뒤 한 번의 배치 인식으로 처리합니다.
+        BatchedInferencePipeline은 clip_timestamps의 인접 구간을 창 길이까지 합쳐(collect_chunks) 한 창으로 인식하므로,
+        칸을 창 길이로 맞추지 않으면 서로 다른 요청의 구간이 한 창, 한 세그먼트로 섞여 다른 요청의 대본에 들어갈 수 있습니다.
+        (Whisper는 짧은 입력도 30초로 채워 인식하므로 0으로 채운 칸이 인식 비용을 늘리지 않습니다)
+        단어는 세그먼트가 아니라 단어 자신의 중간 시각이 속한 칸의 요청에 배정하고, 칸 시작을 빼고 요청의 오프셋을 더해 되돌립니다.
+        """
+        pipeline = self._get_pipeline()
+        window = WHISPER_WINDOW_SECONDS * SAMPLE_RATE
+        audio = np.zeros(len(items) * window, dtype=np.float32)
+        clip_timestamps = []
+        for index, item in enumerate(items):
+            start = index * window
+            audio[start:start + len(item['audio'])] = item['audio'][:window]
+            clip_timestamps.append({'start': start, 'end': start + window})
+        segments, _ = pipeline.transcribe(
+            audio,
+            language=self.language,
+            clip_timestamps=clip_timestamps,
+            chunk_length=WHISPER_WINDOW_SECONDS,
+            batch_size=len(items),
+            word_timestamps=True,
+            vad_filter=False,
+        )
+
+        results = [[] for _ in items]
+        for segment in segments:
+            for word in segment.words or ():
+                index = min(max(int((word.start + word.end) / 2 // WHISPER_WINDOW_SECONDS), 0), len(items) - 1)
+                shift = items[index]['offset'] - index * WHISPER_WINDOW_SECONDS
+                results[index].append({'start': word.start + shift, 'end': word.end + shift, 'word': word.word})
+        return results
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        누적 배치 수, 구간 수, 평균 배치 채움 비율(구간 수 / max_batch_size), 현재 큐 길이 등을 반환합니다.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self.queue_depth()
+        stats['max_batch_size'] = self.max_batch_size
+        stats['batch_fill_ratio'] = (
+            stats['chunks'] / (stats['batches'] * self.max_batch_size) if stats['batches'] else 0.0
+        )
+        return stats
+
+    def to_prometheus(self, prefix="feple"):
+        stats = self.stats()
+        lines = []
+        for name, kind, value, description in (
+            ('stt_batch_queue_depth', 'gauge', stats['queue_depth'], "배치 인식을 기다리는 구간 수"),
+            ('stt_batches_total', 'counter', stats['batches'], "실행한 배치 인식 횟수"),
+            ('stt_batch_chunks_total', 'counter', stats['chunks'], "배치 인식으로 처리한 구간 수"),
+            ('stt_batch_requests_total', 'counter', stats['requests'], "배치 인식을 사용한 요청 수"),
+            ('stt_batch_fill_ratio', 'gauge', stats['batch_fill_ratio'], "평균 배치 채움 비율"),
+            ('stt_batch_inference_seconds_total', 'counter', stats['inference_seconds'], "배치 인식 누적 시간(초)"),
+            ('stt_batch_queue_wait_seconds_total', 'counter', stats['queue_wait_seconds'], "구간별 큐 대기 누적 시간(초)"),
+        ):
+            lines += [f"# HELP {prefix}_{name} {description}", f"# TYPE {prefix}_{name} {kind}", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
@@ -0,0 +1,269 @@
+import numpy as np
+
+UNKNOWN_SPEAKER = 'UNKNOWN'
+UNKNOWN_ID = -1
+ROLE_LABELS = ('Agent', 'Customer')
+
+# 텍스트 열은 모든 항목을 공백 하나로 이어 붙인 문자열(buffer)과 항목별 시작 위치(offsets, 항목 수 + 1개)로 보관합니다.
+# i번째 항목은 buffer[offsets[i]:offsets[i + 1] - 1]이고, 연속한 항목 a..b-1을 공백으로 이은 문자열은
+# buffer[offsets[a]:offsets[b] - 1] 한 번의 슬라이스로 얻을 수 있어, 구간을 합칠 때 문자열을 다시 이어 붙이지 않습니다.
+
+
+def pack_texts(texts):
+    """
+    문자열 목록을 (buffer, offsets)로 바꿉니다.
+    """
+    texts = list(texts)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    if texts:
+        np.cumsum(np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts)), out=offsets[1:])
+    return ' '.join(texts), offsets
+
+
+def encode_speakers(speakers, labels=None):
+    """
+    화자 이름 목록을 (int16 화자 번호 배열, 이름 목록)으로 바꿉니다. 'UNKNOWN'은 UNKNOWN_ID(-1)가 됩니다.
+    labels가 주어지면 그 순서를 먼저 사용하고, 처음 보는 이름은 나온 순서대로 뒤에 붙입니다.
+    """
+    labels = list(labels or [])
+    index = {label: i for i, label in enumerate(labels)}
+    index[UNKNOWN_SPEAKER] = UNKNOWN_ID
+    ids = []
+    for speaker in speakers:
+        speaker_id = index.get(speaker)
+        if speaker_id is None:
+            speaker_id = index[speaker] = len(labels)
+            labels.append(speaker)
+        ids.append(speaker_id)
+    return np.asarray(ids, dtype=np.int16), labels
+
+
+def _float_array(values):
+    return np.asarray(values, dtype=np.float64).reshape(-1)
+
+
+class _TextColumn:
+    """
+    buffer/offsets 텍스트 열을 가진 표의 공통 메서드입니다.
+    """
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, index):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def texts(self):
+        offsets = self.offsets.tolist()
+        return [self.buffer[start:end - 1] for start, end in zip(offsets, offsets[1:])]
+
+    def word_count(self):
+        return len(self.buffer.split())
+
+
+class WordTable(_TextColumn):
+    """
+    STT 단어 구간 표입니다. starts/ends는 float64 배열(초), 단어는 buffer/offsets 텍스트 열로 보관합니다.
+    """
+
+    def __init__(self, starts, ends, buffer, offsets):
+        self.starts = _float_array(starts)
+        self.ends = _float_array(ends)
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_columns(cls, starts, ends, texts):
+        return cls(starts, ends, *pack_texts(texts))
+
+    @classmethod
+    def from_dicts(cls, words):
+        """
+        {'start', 'end', 'text'} 딕셔너리의 목록이나 생성기로 표를 만듭니다.
+        """
+        starts, ends, texts = [], [], []
+        for word in words:
+            starts.append(word['start'])
+            ends.append(word['end'])
+            texts.append(word['text'])
+        return cls.from_columns(starts, ends, texts)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        표, to_columns() 결과, 또는 딕셔너리 목록(이전 형식의 저장 결과)을 표로 바꿉니다.
+        """
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, dict):
+            return cls.from_columns(data['start'], data['end'], data['text'])
+        return cls.from_dicts(data or ())
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        시각 순서대로 주어진 표들을 하나로 이어 붙입니다. 텍스트 버퍼는 공백 하나로 잇고 위치만 옮깁니다.
+        """
+        tables = [table for table in tables if len(table)]
+        if not tables:
+            return cls.from_columns([], [], [])
+        shifts = np.cumsum([0] + [table.offsets[-1] for table in tables[:-1]])
+        offsets = np.concatenate(
+            [table.offsets[:-1] + shift for table, shift in zip(tables, shifts)] + [[tables[-1].offsets[-1] + shifts[-1]]]
+        ).astype(np.int64)
+        return cls(
+            np.concatenate([table.starts for table in tables]), np.concatenate([table.ends for table in tables]),
+            ' '.join(table.buffer for table in tables), offsets
+        )
+
+    def to_columns(self):
+        return {'start': self.starts.tolist(), 'end': self.ends.tolist(), 'text': self.texts()}
+
+    def to_dicts(self):
+        return [
+            {'start': start, 'end': end, 'text': text}
+            for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts())
+        ]
+
+
+class TurnTable:
+    """
+    화자 분리 구간 표입니다. starts/ends는 float64 배열(초), speakers는 labels를 가리키는 int16 번호 배열입니다.
+    """
+
+    def __init__(self, starts, ends, speakers, labels):
+        self.starts = _float_array(starts)
+        self.ends = _float_array(ends)
+        self.speakers = np.asarray(speakers, dtype=np.int16).reshape(-1)
+        self.labels = list(labels)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_dicts(cls, turns):
+        """
+        {'start', 'end', 'speaker'} 딕셔너리 목록으로 표를 만듭니다.
+        """
+        turns = list(turns or ())
+        speakers, labels = encode_speakers(turn['speaker'] for turn in turns)
+        return cls([turn['start'] for turn in turns], [turn['end'] for turn in turns], speakers, labels)
+
+    @classmethod
+    def from_data(cls, data):
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, dict):
+            return cls(data['start'], data['end'], data['speaker'], data['labels'])
+        return cls.from_dicts(data)
+
+    def to_columns(self):
+        return {
+            'start': self.starts.tolist(), 'end': self.ends.tolist(),
+            'speaker': self.speakers.tolist(), 'labels': list(self.labels)
+        }
+
+    def to_dicts(self):
+        return [
+            {'start': start, 'end': end, 'speaker': self.labels[speaker] if speaker >= 0 else UNKNOWN_SPEAKER}
+            for start, end, speaker in zip(self.starts.tolist(), self.ends.tolist(), self.speakers.tolist())
+        ]
+
+
+class SegmentTable(_TextColumn):
+    """
+    대본 구간 표입니다. 결과 종합과 후처리, 대화 흐름 지표가 이 표를 그대로 사용하고,
+    응답과 LLM 요청을 만들 때만 to_dicts()로 기존 형식({'text', 'speaker', 'start_time', 'end_time'})으로 바꿉니다.
+    speakers는 labels를 가리키는 int16 번호 배열이며 UNKNOWN_ID(-1)는 화자를 알 수 없는 구간입니다.
+    pauses는 후처리에서 같은 화자의 구간을 합칠 때 사라진 경계(주로 1초 이상의 쉼)의 버퍼 위치 배열로,
+    문장 분리에 쓰입니다. (없으면 None)
+    """
+
+    def __init__(self, starts, ends, speakers, labels, buffer, offsets, pauses=None):
+        self.starts = _float_array(starts)
+        self.ends = _float_array(ends)
+        self.speakers = np.asarray(speakers, dtype=np.int16).reshape(-1)
+        self.labels = list(labels)
+        self.buffer = buffer
+        self.offsets = offsets
+        self.pauses = np.asarray(pauses, dtype=np.int64) if pauses is not None else None
+
+    @classmethod
+    def empty(cls, labels=()):
+        return cls([], [], [], labels, '', np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_dicts(cls, segments):
+        segments = list(segments or ())
+        speakers, labels = encode_speakers(segment['speaker'] for segment in segments)
+        return cls(
+            [segment['start_time'] for segment in segments], [segment['end_time'] for segment in segments],
+            speakers, labels, *pack_texts(segment['text'] for segment in segments)
+        )
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        표, to_columns() 결과, 또는 딕셔너리 목록(이전 형식의 저장 결과, 외부 호출)을 표로 바꿉니다.
+        """
+        if isinstance(data, cls):
+            return data
+        if isinstance(data, dict):
+            # 구간 텍스트는 버퍼의 연속 범위이므로 다시 이어 붙인 버퍼에서도 쉼 위치가 그대로 유지됩니다.
+            return cls(data['start_time'], data['end_time'], data['speaker'], data['labels'], *pack_texts(data['text']),
+                       pauses=data.get('pauses'))
+        return cls.from_dicts(data)
+
+    def speaker_id(self, label):
+        """
+        화자 이름의 번호를 반환합니다. 표에 없는 이름이면 어떤 구간과도 같지 않은 값(-2)을 반환합니다.
+        """
+        if label == UNKNOWN_SPEAKER:
+            return UNKNOWN_ID
+        return self.labels.index(label) if label in self.labels else -2
+
+    def texts_of(self, label):
+        """
+        해당 화자 구간의 텍스트 목록을 대본 순서대로 반환합니다.
+        """
+        offsets = self.offsets
+        return [
+            self.buffer[offsets[i]:offsets[i + 1] - 1]
+            for i in np.flatnonzero(self.speakers == self.speaker_id(label)).tolist()
+        ]
+
+    def pieces_of(self, label):
+        """
+        해당 화자 구간의 텍스트를 쉼 경계에서 나눈 조각 목록을 대본 순서대로 반환합니다. 쉼 정보가 없으면 구간 텍스트 그대로입니다.
+        """
+        if self.pauses is None or not len(self.pauses):
+            return self.texts_of(label)
+        pauses = self.pauses
+        offsets = self.offsets
+        pieces = []
+        for i in np.flatnonzero(self.speakers == self.speaker_id(label)).tolist():
+            start, end = int(offsets[i]), int(offsets[i + 1]) - 1
+            cuts = pauses[np.searchsorted(pauses, start, side='right'):np.searchsorted(pauses, end)].tolist()
+            for piece_start, piece_end in zip([start] + cuts, [cut - 1 for cut in cuts] + [end]):
+                pieces.append(self.buffer[piece_start:piece_end])
+        return pieces
+
+    def speaker_names(self):
+        return [self.labels[speaker] if speaker >= 0 else UNKNOWN_SPEAKER for speaker in self.speakers.tolist()]
+
+    def to_columns(self):
+        columns = {
+            'start_time': self.starts.tolist(), 'end_time': self.ends.tolist(),
+            'speaker': self.speakers.tolist(), 'labels': list(self.labels), 'text': self.texts()
+        }
+        if self.pauses is not None:
+            columns['pauses'] = self.pauses.tolist()
+        return columns
+
+    def to_dicts(self):
+        return [
+            {'text': text, 'speaker': speaker, 'start_time': start, 'end_time': end}
+            for text, speaker, start, end in zip(
+                self.texts(), self.speaker_names(), self.starts.tolist(), self.ends.tolist()
+            )
+        ]
@@ -2,11 +2,12 @@ import yaml
 from pathlib import Path
 
 CONFIG_PATH = Path("configs")
+KEYWORDS_PATH = CONFIG_PATH / "keywords.yaml"
 
 def load_model_config():
     with open(CONFIG_PATH / "models.yaml", 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
-def load_keyword_config():
-    with open(CONFIG_PATH / "keywords.yaml", 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
\ No newline at end of file
+def load_keyword_config(path=KEYWORDS_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
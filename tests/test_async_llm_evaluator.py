@@ -0,0 +1,158 @@
+"""
+AsyncLLMEvaluator._complete를 로컬 OpenAI 호환 가짜 서버(base_url)에 연결해 재시도, 요청별 제한 시간, 동시 실행 수 제한을 확인합니다.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('openai')
+
+from src.async_llm_evaluator import AsyncLLMEvaluator
+from src.llm_evaluator import new_usage_stats
+
+
+def response_body(text):
+    return {
+        'id': 'resp_stub', 'object': 'response', 'created_at': 0, 'model': 'stub', 'status': 'completed',
+        'output': [{
+            'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'status': 'completed',
+            'content': [{'type': 'output_text', 'text': text, 'annotations': []}],
+        }],
+        'usage': {
+            'input_tokens': 3, 'output_tokens': 2, 'total_tokens': 5,
+            'input_tokens_details': {'cached_tokens': 0}, 'output_tokens_details': {'reasoning_tokens': 0},
+        },
+    }
+
+
+class StubServer:
+    """
+    /v1/responses 요청에 statuses 목록의 상태 코드를 차례로 돌려주고(목록이 끝나면 200), 응답마다 delay초를 기다립니다.
+    동시에 처리 중인 요청 수의 최댓값(max_in_flight)을 기록합니다.
+    """
+
+    def __init__(self, statuses=(), delay=0.0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                try:
+                    time.sleep(stub.delay)
+                    body = response_body('ok') if status == 200 else {'error': {'message': 'stub', 'type': 'stub'}}
+                    data = json.dumps(body).encode('utf-8')
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_evaluator(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    created = []
+
+    def make(stub, **kwargs):
+        kwargs = {'max_retries': 3, 'backoff_base': 0.01, 'backoff_max': 0.05, 'timeout': 5, **kwargs}
+        evaluator = AsyncLLMEvaluator(base_url=stub.base_url, **kwargs)
+        created.append((evaluator, stub))
+        return evaluator
+
+    yield make
+    for evaluator, stub in created:
+        evaluator.close()
+        stub.close()
+
+
+def complete(evaluator, usage, count=1):
+    async def run():
+        return await asyncio.gather(*(
+            evaluator._complete({'model': 'stub', 'input': f'request {index}'}, lambda text: text, usage)
+            for index in range(count)
+        ))
+    return asyncio.run_coroutine_threadsafe(run(), evaluator._loop).result(timeout=30)
+
+
+def test_retries_rate_limit_and_server_errors_then_succeeds(make_evaluator):
+    stub = StubServer(statuses=[429, 500])
+    evaluator = make_evaluator(stub)
+    usage = new_usage_stats()
+
+    assert complete(evaluator, usage) == ['ok']
+    assert stub.requests == 3
+    assert (usage['calls'], usage['retries'], usage['failures']) == (1, 2, 0)
+    assert (usage['input_tokens'], usage['output_tokens']) == (3, 2)
+
+
+def test_gives_up_after_max_retries(make_evaluator):
+    import openai
+
+    stub = StubServer(statuses=[500] * 10)
+    evaluator = make_evaluator(stub, max_retries=2)
+    usage = new_usage_stats()
+
+    with pytest.raises(openai.InternalServerError):
+        complete(evaluator, usage)
+    assert stub.requests == 3
+    assert (usage['calls'], usage['retries'], usage['failures']) == (0, 2, 1)
+
+
+def test_each_call_is_bounded_by_timeout(make_evaluator):
+    stub = StubServer(delay=2.0)
+    evaluator = make_evaluator(stub, timeout=0.3, max_retries=1)
+    usage = new_usage_stats()
+
+    started_at = time.perf_counter()
+    with pytest.raises(Exception) as error:
+        complete(evaluator, usage)
+    assert isinstance(error.value, evaluator._retryable_errors)
+    assert time.perf_counter() - started_at < 1.5
+    assert (usage['retries'], usage['failures']) == (1, 1)
+
+
+def test_semaphore_caps_requests_in_flight(make_evaluator):
+    stub = StubServer(delay=0.2)
+    evaluator = make_evaluator(stub, max_concurrency=2)
+    usage = new_usage_stats()
+
+    assert complete(evaluator, usage, count=6) == ['ok'] * 6
+    assert stub.requests == 6
+    assert stub.max_in_flight == 2
+    assert usage['calls'] == 6
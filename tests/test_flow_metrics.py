@@ -0,0 +1,238 @@
+"""
+compute_flow_metrics의 대화 흐름 지표가 기존(기준 커밋) MetricsCalculator의 구간별 반복문과 같은지 확인합니다.
+침묵 비율은 화자 분리 구간이 겹치지 않을 때는 기존 합계 방식과, 겹칠 때는 정렬 후 병합한 합집합과 비교합니다.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from src.flow_metrics import compute_flow_metrics
+
+
+def baseline_avg_response_latency(transcript):
+    """
+    기준 커밋의 _calculate_avg_response_latency를 그대로 옮긴 구현입니다.
+    """
+    latencies = []
+    for i in range(1, len(transcript)):
+        if transcript[i-1]['speaker'] == 'Customer' and transcript[i]['speaker'] == 'Agent':
+            latency = transcript[i]['start_time'] - transcript[i-1]['end_time']
+            if latency > 0:
+                latencies.append(latency)
+    return np.mean(latencies) if latencies else 0
+
+
+def baseline_interruption_count(transcript):
+    """
+    기준 커밋의 _calculate_interruption_count를 그대로 옮긴 구현입니다.
+    """
+    interruptions = 0
+    for i in range(1, len(transcript)):
+        if transcript[i-1]['speaker'] == 'Customer' and transcript[i]['speaker'] == 'Agent':
+            if transcript[i]['start_time'] < transcript[i-1]['end_time']:
+                interruptions += 1
+    return interruptions
+
+
+def baseline_silence_ratio(speaker_turns, total_duration):
+    """
+    기준 커밋의 _calculate_silence_ratio를 그대로 옮긴 구현입니다. (구간 길이의 단순 합이라 겹친 발화를 두 번 셉니다)
+    """
+    if total_duration == 0:
+        return 0
+    total_speech_time = sum(turn['end'] - turn['start'] for turn in speaker_turns)
+    silence_time = total_duration - total_speech_time
+    return silence_time / total_duration if silence_time > 0 else 0
+
+
+def baseline_talk_ratio(transcript):
+    """
+    기준 커밋의 _calculate_talk_ratio를 그대로 옮긴 구현입니다.
+    """
+    customer_talk_time = 0
+    agent_talk_time = 0
+    for seg in transcript:
+        duration = seg['end_time'] - seg['start_time']
+        if seg['speaker'] == 'Customer':
+            customer_talk_time += duration
+        elif seg['speaker'] == 'Agent':
+            agent_talk_time += duration
+    if agent_talk_time == 0:
+        return 0
+    return customer_talk_time / agent_talk_time
+
+
+def merged_intervals(speaker_turns, lower, upper):
+    """
+    화자 분리 구간을 [lower, upper]로 자르고 시작 시각 순으로 정렬해 겹치는 구간을 합칩니다.
+    """
+    merged = []
+    for start, end in sorted((max(turn['start'], lower), min(turn['end'], upper)) for turn in speaker_turns):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def union_length(speaker_turns, lower, upper):
+    return sum(end - start for start, end in merged_intervals(speaker_turns, lower, upper))
+
+
+def overlap_length(speaker_turns, lower, upper):
+    """
+    모든 경계점 사이의 작은 구간마다 덮고 있는 구간 수를 직접 세어 두 구간 이상이 겹친 시간을 구합니다.
+    """
+    points = sorted({lower, upper} | {turn['start'] for turn in speaker_turns} | {turn['end'] for turn in speaker_turns})
+    points = [point for point in points if lower <= point <= upper]
+    total = 0.0
+    for left, right in zip(points, points[1:]):
+        mid = (left + right) / 2
+        if sum(turn['start'] <= mid < turn['end'] for turn in speaker_turns) >= 2:
+            total += right - left
+    return total
+
+
+def random_transcript(rng, count):
+    """
+    시작 시각 순의 대본 구간입니다. 침묵, 끼어들기(앞 구간 안에 포함되는 경우 포함), 같은 화자의 연속 발화, UNKNOWN 화자를 섞습니다.
+    """
+    transcript = []
+    time = rng.uniform(0, 3)
+    for _ in range(count):
+        length = rng.uniform(0.2, 10)
+        speaker = rng.choice(['Agent', 'Customer', 'Agent', 'Customer', 'UNKNOWN'])
+        transcript.append({'speaker': speaker, 'start_time': round(time, 2), 'end_time': round(time + length, 2), 'text': ''})
+        time = max(time + rng.choice([rng.uniform(-length, 0), rng.uniform(0, 0.5), rng.uniform(1, 6)]), time)
+    return transcript
+
+
+def random_turns(rng, count, duration, overlapping):
+    """
+    시작 시각 순의 화자 분리 구간입니다. overlapping이면 구간끼리 겹치거나 포함되고 통화 길이 밖으로 나갈 수 있습니다.
+    아니면 서로 떨어진 구간만 [0, duration] 안에 만듭니다.
+    """
+    if overlapping:
+        turns = []
+        for _ in range(count):
+            start = round(rng.uniform(-2, duration), 2)
+            length = rng.choice([0.0, rng.uniform(0.1, 2), rng.uniform(2, 20)])
+            turns.append({'start': start, 'end': round(start + length, 2), 'speaker': rng.choice(['SPEAKER_00', 'SPEAKER_01'])})
+        return sorted(turns, key=lambda turn: turn['start'])
+    points = sorted(round(rng.uniform(0, duration), 2) for _ in range(2 * count))
+    return [
+        {'start': start, 'end': end, 'speaker': rng.choice(['SPEAKER_00', 'SPEAKER_01'])}
+        for start, end in zip(points[::2], points[1::2])
+    ]
+
+
+def random_call(rng, overlapping):
+    transcript = random_transcript(rng, rng.randint(0, 80))
+    duration = round(max([segment['end_time'] for segment in transcript] + [0]) + rng.uniform(-5, 10), 2)
+    duration = rng.choice([max(duration, 0.0), max(duration, 0.0), 0.0])
+    speaker_turns = random_turns(rng, rng.randint(0, 60), max(duration, 1.0), overlapping)
+    return transcript, speaker_turns, duration
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_transcript_metrics_match_baseline(seed):
+    rng = random.Random(seed)
+    transcript, speaker_turns, duration = random_call(rng, overlapping=True)
+    metrics = compute_flow_metrics(transcript, speaker_turns, duration)
+    assert metrics['avg_response_latency'] == pytest.approx(baseline_avg_response_latency(transcript))
+    assert metrics['interruption_count'] == baseline_interruption_count(transcript)
+    assert metrics['talk_ratio'] == pytest.approx(baseline_talk_ratio(transcript))
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_silence_ratio_matches_baseline_without_overlap(seed):
+    rng = random.Random(seed)
+    transcript, speaker_turns, duration = random_call(rng, overlapping=False)
+    metrics = compute_flow_metrics(transcript, speaker_turns, duration)
+    assert metrics['silence_ratio'] == pytest.approx(baseline_silence_ratio(speaker_turns, duration), abs=1e-9)
+    assert metrics['overlap_ratio'] == 0
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_silence_and_overlap_ratio_on_overlapping_turns(seed):
+    rng = random.Random(seed)
+    transcript, speaker_turns, duration = random_call(rng, overlapping=True)
+    metrics = compute_flow_metrics(transcript, speaker_turns, duration)
+    if duration <= 0:
+        assert (metrics['silence_ratio'], metrics['overlap_ratio']) == (0, 0)
+        return
+    silence = duration - union_length(speaker_turns, 0.0, duration)
+    assert metrics['silence_ratio'] == pytest.approx(silence / duration if silence > 0 else 0, abs=1e-9)
+    assert metrics['overlap_ratio'] == pytest.approx(overlap_length(speaker_turns, 0.0, duration) / duration, abs=1e-9)
+    assert 0 <= metrics['silence_ratio'] <= 1
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_timeline_matches_per_window_loops(seed):
+    rng = random.Random(seed)
+    transcript, speaker_turns, duration = random_call(rng, overlapping=True)
+    window_seconds = rng.choice([5, 30, 60])
+    timeline = compute_flow_metrics(transcript, speaker_turns, duration, window_seconds=window_seconds).get('timeline')
+    if duration <= 0:
+        assert timeline is None
+        return
+
+    starts = [index * window_seconds for index in range(int(np.ceil(duration / window_seconds)))]
+    assert timeline['start'] == pytest.approx(starts)
+    for index, lower in enumerate(starts):
+        upper = min(lower + window_seconds, duration)
+        last = index == len(starts) - 1
+
+        def talk(speaker):
+            return sum(
+                max(min(segment['end_time'], upper) - max(segment['start_time'], lower), 0.0)
+                for segment in transcript if segment['speaker'] == speaker
+            )
+
+        latencies, interruptions = [], 0
+        for previous, segment in zip(transcript, transcript[1:]):
+            start = segment['start_time']
+            if previous['speaker'] != 'Customer' or segment['speaker'] != 'Agent':
+                continue
+            # 응답은 상담사 구간이 시작한 구간에 셉니다. (통화 길이 밖은 처음/마지막 구간)
+            if not ((lower <= start or index == 0) and (start < lower + window_seconds or last)):
+                continue
+            if start > previous['end_time']:
+                latencies.append(start - previous['end_time'])
+            if start < previous['end_time']:
+                interruptions += 1
+
+        agent_talk = talk('Agent')
+        assert timeline['talk_ratio'][index] == pytest.approx(talk('Customer') / agent_talk if agent_talk > 0 else 0.0)
+        assert timeline['silence_ratio'][index] == pytest.approx(
+            1 - union_length(speaker_turns, lower, upper) / (upper - lower), abs=1e-9
+        )
+        assert timeline['avg_response_latency'][index] == pytest.approx(np.mean(latencies) if latencies else 0.0)
+        assert timeline['interruption_count'][index] == interruptions
+
+
+def test_overlapping_turns_are_counted_once_in_silence_ratio():
+    speaker_turns = [
+        {'start': 0.0, 'end': 6.0, 'speaker': 'SPEAKER_00'},
+        {'start': 2.0, 'end': 4.0, 'speaker': 'SPEAKER_01'},
+        {'start': 5.0, 'end': 8.0, 'speaker': 'SPEAKER_01'},
+    ]
+    metrics = compute_flow_metrics([], speaker_turns, 10.0)
+    # 단순 합(11초)이면 침묵이 없다고 보지만, 실제 발화 합집합은 0~8초입니다.
+    assert baseline_silence_ratio(speaker_turns, 10.0) == 0
+    assert metrics['silence_ratio'] == pytest.approx(0.2)
+    assert metrics['overlap_ratio'] == pytest.approx(0.3)
+
+
+def test_talk_ratio_counts_overlapping_segments_of_each_speaker():
+    transcript = [
+        {'speaker': 'Agent', 'start_time': 0.0, 'end_time': 4.0, 'text': ''},
+        {'speaker': 'Customer', 'start_time': 1.0, 'end_time': 7.0, 'text': ''},
+        {'speaker': 'Agent', 'start_time': 2.0, 'end_time': 3.0, 'text': ''},
+    ]
+    metrics = compute_flow_metrics(transcript, [], 8.0)
+    assert metrics['talk_ratio'] == pytest.approx(baseline_talk_ratio(transcript)) == pytest.approx(6.0 / 5.0)
+    assert metrics['interruption_count'] == baseline_interruption_count(transcript) == 1
@@ -0,0 +1,135 @@
+"""
+KeywordMatcher로 센 완곡 표현/공감 표현 문장 수가 기존(기준 커밋) 문장별 부분 문자열/정규식 검사와 같은지 확인합니다.
+"""
+import os
+import random
+import re
+import threading
+
+import pytest
+
+pytest.importorskip('yaml')
+
+from src.keyword_matcher import EUPHONIOUS_PATTERNS, KeywordMatcher
+from src.utils import KEYWORDS_PATH, load_keyword_config
+
+BASELINE_EUPHONIOUS_PATTERNS = [re.compile(pattern) for pattern in EUPHONIOUS_PATTERNS]
+
+# 서로의 접두어이거나 완곡 표현 정규식과 같은 위치에서 시작하는 키워드를 일부러 섞습니다.
+OVERLAPPING_KEYWORDS = {
+    'cushion': ['부탁', '혹시', '혹시나', '양해 부탁드립니다', '실례지만', '해 주시'],
+    'empathy_patterns': ['부탁드립니다만', '그러셨군요', '그러셨', '저런', '힘드셨죠'],
+}
+FILLERS = ['고객님', '네', '확인해 보겠습니다', '잠시만요', ' ', '요금이', '다시', '말씀해']
+
+
+def baseline_count_euphonious(keywords, sentences):
+    """
+    기준 커밋의 _count_euphonious_sentences를 그대로 옮긴 구현입니다.
+    """
+    count = 0
+    cushion_words = keywords.get('cushion', [])
+    for sent in sentences:
+        found = False
+        for word in cushion_words:
+            if word in sent:
+                count += 1
+                found = True
+                break
+        if found:
+            continue
+        for pattern in BASELINE_EUPHONIOUS_PATTERNS:
+            if pattern.search(sent):
+                count += 1
+                break
+    return count
+
+
+def baseline_count_empathy_patterns(keywords, sentences):
+    """
+    기준 커밋의 _count_empathy_sentences 중 문자열 패턴으로 찾는 부분입니다. (어근 검사는 형태소 분석 결과를 쓰므로 제외)
+    """
+    return sum(any(pattern in sent for pattern in keywords.get('empathy_patterns', [])) for sent in sentences)
+
+
+def count(matcher, sentences):
+    hits = [matcher.match(sent) for sent in sentences]
+    euphonious = sum('cushion' in sentence_hits or 'euphonious' in sentence_hits for sentence_hits in hits)
+    empathy = sum('empathy_patterns' in sentence_hits for sentence_hits in hits)
+    return euphonious, empathy
+
+
+def random_sentences(rng, keywords, count):
+    fragments = FILLERS + [word for words in keywords.values() for word in words] + [
+        '인 것 같습니다', '부탁드립니다', '해 주시겠어요?', '드릴까요', '해드릴까요?', '하기는 어렵습니다', '일 듯합니다'
+    ]
+    return [''.join(rng.choice(fragments) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_overlapping_keyword_counts_match_baseline(seed):
+    rng = random.Random(seed)
+    sentences = random_sentences(rng, OVERLAPPING_KEYWORDS, 50)
+    matcher = KeywordMatcher(OVERLAPPING_KEYWORDS)
+    assert count(matcher, sentences) == (
+        baseline_count_euphonious(OVERLAPPING_KEYWORDS, sentences),
+        baseline_count_empathy_patterns(OVERLAPPING_KEYWORDS, sentences),
+    )
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_repository_keyword_counts_match_baseline(seed):
+    keywords = load_keyword_config(KEYWORDS_PATH)
+    rng = random.Random(seed)
+    sentences = random_sentences(rng, {key: keywords[key] for key in ('cushion', 'empathy_patterns')}, 50)
+    assert count(KeywordMatcher(keywords), sentences) == (
+        baseline_count_euphonious(keywords, sentences), baseline_count_empathy_patterns(keywords, sentences)
+    )
+
+
+def test_euphonious_pattern_starting_at_a_literal_keyword_is_found():
+    matcher = KeywordMatcher({'empathy_patterns': ['부탁']})
+    assert matcher.match('잘 부탁드립니다') == {'empathy_patterns', 'euphonious'}
+
+
+def write_keywords(path, cushion, mtime_ns):
+    path.write_text('cushion:\n' + ''.join(f'  - "{word}"\n' for word in cushion), encoding='utf-8')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hot_reload_swaps_keywords_atomically(tmp_path):
+    path = tmp_path / 'keywords.yaml'
+    old_words = [f'옛말{index}' for index in range(30)]
+    new_words = [f'새말{index}' for index in range(30)]
+    write_keywords(path, old_words, 1_000_000_000)
+    matcher = KeywordMatcher(load_keyword_config(path), source_path=str(path))
+    sentence = ' '.join(old_words + new_words)
+
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        # 바꾸는 도중의 매처는 옛 키워드나 새 키워드 중 한쪽과 완전히 일치해야 합니다. (섞이면 IndexError나 잘못된 카테고리)
+        try:
+            while not stop.is_set():
+                assert matcher.match(sentence) == {'cushion'}
+                assert matcher.match('없음') == set()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for step in range(40):
+        words = new_words[:step % 30 + 1] if step % 2 else old_words[:30 - step % 30]
+        write_keywords(path, words, 1_000_000_000 * (step + 2))
+        assert matcher.reload_if_changed()
+        assert set(matcher.keywords['cushion']) == set(words)
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert not errors
+    assert not matcher.reload_if_changed()
+    assert matcher.match('새말0') == {'cushion'}
+    assert matcher.match('옛말0') == set()
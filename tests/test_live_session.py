@@ -0,0 +1,72 @@
+"""
+LiveCallSession에 저장된 대본을 다시 흘려 보냈을 때(replay_transcript) 마지막 스냅샷이 사후 계산(compute_flow_metrics)과 같은지 확인합니다.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from src.flow_metrics import compute_flow_metrics
+from src.live_session import LiveCallSession, replay_transcript
+
+METRIC_NAMES = ('avg_response_latency', 'interruption_count', 'silence_ratio', 'talk_ratio')
+
+
+def random_call(rng, count):
+    """
+    시작 시각 순의 대본 구간과 화자 분리 구간입니다. 구간 사이에 침묵이 있거나,
+    고객 발화 도중 상담사가 끼어들거나(앞 구간 안에 포함되는 경우 포함), 같은 화자가 이어 말할 수 있습니다.
+    """
+    transcript = []
+    time = rng.uniform(0, 3)
+    for _ in range(count):
+        length = rng.uniform(0.3, 12)
+        speaker = rng.choice(['Agent', 'Customer'])
+        transcript.append({'speaker': speaker, 'start_time': round(time, 2), 'end_time': round(time + length, 2), 'text': ''})
+        time += rng.choice([rng.uniform(-length, 0), rng.uniform(0, 0.5), rng.uniform(1, 6)])
+        time = max(time, transcript[-1]['start_time'])
+    speaker_turns = [
+        {'start': segment['start_time'], 'end': segment['end_time'], 'speaker': segment['speaker']}
+        for segment in transcript
+    ]
+    return transcript, speaker_turns
+
+
+def final_snapshot(transcript, speaker_turns):
+    return list(replay_transcript(transcript, speaker_turns, speed=None, snapshot_interval=7.0))[-1]
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_replay_matches_post_hoc_metrics(seed):
+    rng = random.Random(seed)
+    transcript, speaker_turns = random_call(rng, rng.randint(1, 60))
+    snapshot = final_snapshot(transcript, speaker_turns)
+    expected = compute_flow_metrics(transcript, speaker_turns, snapshot['elapsed'], window_seconds=0)
+    for name in METRIC_NAMES:
+        assert snapshot[name] == pytest.approx(expected[name]), name
+
+
+def test_replayed_interruption_inside_customer_segment_is_counted():
+    transcript = [
+        {'speaker': 'Customer', 'start_time': 0.0, 'end_time': 10.0, 'text': ''},
+        {'speaker': 'Agent', 'start_time': 3.0, 'end_time': 4.0, 'text': ''},
+    ]
+    snapshot = final_snapshot(transcript, [])
+    assert snapshot['interruption_count'] == 1
+    assert snapshot['interruption_count'] == compute_flow_metrics(transcript, [], 10.0, window_seconds=0)['interruption_count']
+
+
+def test_audio_interruption_is_added_after_the_earlier_customer_segment():
+    sample_rate = 16000
+    audio = np.zeros((12 * sample_rate, 2), dtype=np.float32)
+    audio[0:10 * sample_rate, 1] = 0.5            # 고객 채널: 0~10초
+    audio[3 * sample_rate:4 * sample_rate, 0] = 0.5  # 상담사 채널: 3~4초
+    session = LiveCallSession(sample_rate=sample_rate)
+
+    added = []
+    for start in range(0, len(audio), sample_rate // 2):
+        added += session.add_audio(audio[start:start + sample_rate // 2])
+    added += session.finish()
+
+    assert [segment['speaker'] for segment in added] == ['Customer', 'Agent']
+    assert session.snapshot()['interruption_count'] == 1
@@ -0,0 +1,222 @@
+"""
+LLMResponseCache의 get/set/정리(TTL, LRU) 결과가 같은 규칙을 딕셔너리로 옮긴 기준 구현과 같은지, 데이터베이스를 닫았다가 다시 열어도 유지되는지 확인합니다.
+"""
+import random
+import sqlite3
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+import src.llm_cache
+from src.llm_cache import LLMResponseCache
+
+PRUNE_EVERY = 100
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def tick(self, seconds=1.0):
+        self.now += seconds
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(src.llm_cache, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+class BaselineCache:
+    """
+    디스크 행(rows)과 메모리 LRU를 딕셔너리로 두고, 적중 시각을 곧바로 기록하는 기준 구현입니다.
+    """
+
+    def __init__(self, ttl_seconds, max_entries, memory_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.rows = {}
+        self.memory = OrderedDict()
+        self.writes_since_prune = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def reopen(self):
+        # 메모리 계층, 정리 주기 카운터와 통계는 프로세스(인스턴스)마다 새로 시작합니다.
+        self.memory.clear()
+        self.writes_since_prune = 0
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    def expired(self, created_at, now):
+        return now - created_at > self.ttl_seconds
+
+    def remember(self, key, response, created_at):
+        self.memory[key] = (response, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key, now):
+        cached = self.memory.get(key)
+        if cached is not None and not self.expired(cached[1], now):
+            self.memory.move_to_end(key)
+            if key in self.rows:
+                self.rows[key][2] = now
+            self.stats['memory_hits'] += 1
+            return cached[0]
+        row = self.rows.get(key)
+        if row is None or self.expired(row[1], now):
+            self.rows.pop(key, None)
+            self.memory.pop(key, None)
+            self.stats['misses'] += 1
+            return None
+        self.remember(key, row[0], row[1])
+        row[2] = now
+        self.stats['disk_hits'] += 1
+        return row[0]
+
+    def set(self, key, response, now):
+        self.remember(key, response, now)
+        self.rows[key] = [response, now, now]
+        self.writes_since_prune += 1
+        if self.writes_since_prune >= PRUNE_EVERY:
+            self.writes_since_prune = 0
+            self.rows = {key: row for key, row in self.rows.items() if row[1] >= now - self.ttl_seconds}
+            by_access = sorted(self.rows, key=lambda key: self.rows[key][2])
+            for key in by_access[:max(len(self.rows) - self.max_entries, 0)]:
+                del self.rows[key]
+
+
+def stored_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {key: [response, created_at, last_access] for key, response, created_at, last_access in conn.execute(
+            "SELECT key, response, created_at, last_access FROM responses"
+        )}
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_get_set_evict_across_reopen_matches_baseline(seed, tmp_path, clock):
+    rng = random.Random(seed)
+    path = str(tmp_path / 'cache.sqlite3')
+    options = {
+        'ttl_seconds': rng.choice([40, 300, 5000]),
+        'max_entries': rng.randint(5, 40),
+        'memory_entries': rng.randint(1, 10),
+    }
+    touch_batch = rng.choice([1, 3, 256])
+    keys = [f'key{index}' for index in range(rng.randint(10, 80))]
+    baseline = BaselineCache(**options)
+    cache = LLMResponseCache(path, touch_batch=touch_batch, **options)
+
+    for step in range(1500):
+        now = clock.tick(rng.choice([0.5, 1.0, 3.0]))
+        key = rng.choice(keys)
+        if rng.random() < 0.35:
+            response = f'{key}@{step}'
+            cache.set(key, response)
+            baseline.set(key, response, now)
+        else:
+            assert cache.get(key) == baseline.get(key, now), step
+        if rng.random() < 0.01:
+            cache.close()
+            assert stored_rows(path) == baseline.rows, step
+            cache = LLMResponseCache(path, touch_batch=touch_batch, **options)
+            baseline.reopen()
+
+    stats = cache.stats()
+    cache.close()
+    assert stored_rows(path) == baseline.rows
+    assert {name: stats[name] for name in baseline.stats} == baseline.stats
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_session_stats_match_baseline_without_reopen(seed, tmp_path, clock):
+    rng = random.Random(seed)
+    options = {'ttl_seconds': 200, 'max_entries': 20, 'memory_entries': 4}
+    baseline = BaselineCache(**options)
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), touch_batch=5, **options)
+    session_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+    for step in range(600):
+        now = clock.tick()
+        key = f'key{rng.randint(0, 30)}'
+        if rng.random() < 0.4:
+            cache.set(key, str(step), session_stats)
+            baseline.set(key, str(step), now)
+        else:
+            cache.get(key, session_stats)
+            baseline.get(key, now)
+
+    cache.close()
+    assert {name: session_stats[name] for name in baseline.stats} == baseline.stats
+    assert {name: cache.stats()[name] for name in baseline.stats} == baseline.stats
+
+
+def test_memory_hit_keeps_an_entry_alive_after_reopen(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    options = {'ttl_seconds': None, 'max_entries': 150, 'memory_entries': 1000, 'touch_batch': 1000}
+    cache = LLMResponseCache(path, **options)
+    for index in range(PRUNE_EVERY):
+        clock.tick()
+        cache.set(f'key{index}', str(index))
+    clock.tick()
+    assert cache.get('key0') == '0'  # 메모리 적중: 적중 시각은 닫을 때 기록됩니다.
+    assert cache.stats()['memory_hits'] == 1
+    cache.close()
+
+    cache = LLMResponseCache(path, **options)
+    for index in range(PRUNE_EVERY, 2 * PRUNE_EVERY):
+        clock.tick()
+        cache.set(f'key{index}', str(index))
+    cache.close()
+
+    rows = stored_rows(path)
+    assert len(rows) == 150
+    assert 'key0' in rows
+    assert not any(f'key{index}' in rows for index in range(1, 51))
+
+    cache = LLMResponseCache(path, **options)
+    assert cache.get('key0') == '0'
+    assert cache.get('key1') is None
+    assert cache.stats() == {'memory_hits': 0, 'disk_hits': 1, 'misses': 1, 'writes': 0, 'hits': 1}
+    cache.close()
+
+
+def test_expired_entry_is_deleted_after_reopen(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = LLMResponseCache(path, ttl_seconds=60)
+    cache.set('key', 'value')
+    cache.close()
+
+    clock.tick(61)
+    cache = LLMResponseCache(path, ttl_seconds=60)
+    assert cache.get('key') is None
+    assert cache.stats()['misses'] == 1
+    cache.close()
+    assert stored_rows(path) == {}
+
+
+def test_locked_database_warns_instead_of_raising(tmp_path, clock, capsys):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = LLMResponseCache(path)
+    cache._conn.execute("PRAGMA busy_timeout = 0")
+    locker = sqlite3.connect(path, timeout=0)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.set('key', 'value')
+        assert cache.get('key') == 'value'  # 메모리 계층에는 남습니다.
+        assert cache.stats()['writes'] == 0
+    finally:
+        locker.rollback()
+        locker.close()
+    assert '[경고] LLM 응답 캐시에 기록하지 못했습니다' in capsys.readouterr().out
+
+    cache.set('key', 'value')
+    cache.close()
+    assert stored_rows(path)['key'][0] == 'value'
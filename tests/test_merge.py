@@ -0,0 +1,116 @@
+"""
+_merge_results의 이진 탐색 화자 배정이 기존(기준 커밋) 단어별 선형 탐색과 같은 결과를 내는지 확인합니다.
+"""
+import random
+
+import pytest
+
+from src.pipeline import VoiceAnalysisPipeline
+
+
+def baseline_merge(speaker_turns, word_segments):
+    """
+    기준 커밋의 _merge_results를 그대로 옮긴 구현입니다. (단어마다 모든 화자 구간을 앞에서부터 확인)
+    """
+    word_segments = [dict(word) for word in word_segments]
+    for word in word_segments:
+        word['speaker'] = 'UNKNOWN'
+        word_mid_point = word['start'] + (word['end'] - word['start']) / 2
+        for turn in speaker_turns:
+            if word_mid_point >= turn['start'] and word_mid_point <= turn['end']:
+                word['speaker'] = turn['speaker']
+                break
+
+    merged_transcript = []
+    if not word_segments:
+        return merged_transcript
+
+    current_segment = {
+        'text': word_segments[0]['text'],
+        'speaker': word_segments[0]['speaker'],
+        'start_time': word_segments[0]['start'],
+        'end_time': word_segments[0]['end']
+    }
+    for i in range(1, len(word_segments)):
+        word = word_segments[i]
+        if word['speaker'] == current_segment['speaker'] and \
+           word['start'] - word_segments[i-1]['end'] < 1.0:
+            current_segment['text'] += ' ' + word['text']
+            current_segment['end_time'] = word['end']
+        else:
+            merged_transcript.append(current_segment)
+            current_segment = {
+                'text': word['text'],
+                'speaker': word['speaker'],
+                'start_time': word['start'],
+                'end_time': word['end']
+            }
+    merged_transcript.append(current_segment)
+    return merged_transcript
+
+
+def random_turns(rng, count, duration):
+    """
+    시작 시각 순으로 정렬된 화자 구간입니다. 구간끼리 겹치거나, 사이에 빈 시간이 있거나, 다른 구간 안에 포함될 수 있습니다.
+    """
+    turns = []
+    for _ in range(count):
+        start = round(rng.uniform(0, duration), 2)
+        length = rng.choice([0.0, rng.uniform(0.1, 2), rng.uniform(2, 15)])
+        speaker = rng.choice(['SPEAKER_00', 'SPEAKER_01', 'SPEAKER_02'])
+        turns.append({'start': start, 'end': round(start + length, 2), 'speaker': speaker})
+    turns.sort(key=lambda turn: turn['start'])
+    return turns
+
+
+def random_words(rng, count, duration):
+    """
+    시간 순 단어 구간입니다. 통화 앞뒤 범위를 벗어나 어떤 화자 구간에도 속하지 않는 단어와 1초 이상의 간격도 섞습니다.
+    """
+    words = []
+    time = -rng.uniform(0, 3)
+    for index in range(count):
+        time += rng.choice([0.0, rng.uniform(0, 0.5), rng.uniform(1.0, 4.0)])
+        length = rng.uniform(0.05, 0.8)
+        words.append({'start': round(time, 2), 'end': round(time + length, 2), 'text': f"w{index}"})
+        time += length
+    return words
+
+
+def merge(speaker_turns, word_segments):
+    return VoiceAnalysisPipeline._merge_results(None, speaker_turns, word_segments).to_dicts()
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_merge_matches_baseline(seed):
+    rng = random.Random(seed)
+    duration = rng.uniform(5, 120)
+    turns = random_turns(rng, rng.randint(0, 40), duration)
+    words = random_words(rng, rng.randint(1, 200), duration)
+    assert merge(turns, words) == baseline_merge(turns, words)
+
+
+def test_overlapping_turns_use_first_covering_turn():
+    turns = [
+        {'start': 0.0, 'end': 10.0, 'speaker': 'SPEAKER_00'},
+        {'start': 2.0, 'end': 4.0, 'speaker': 'SPEAKER_01'},
+        {'start': 9.0, 'end': 14.0, 'speaker': 'SPEAKER_01'},
+    ]
+    words = [
+        {'start': 2.5, 'end': 3.0, 'text': '안녕하세요'},
+        {'start': 9.5, 'end': 9.9, 'text': '네'},
+        {'start': 12.0, 'end': 12.4, 'text': '감사합니다'},
+    ]
+    assert [segment['speaker'] for segment in merge(turns, words)] == ['SPEAKER_00', 'SPEAKER_00', 'SPEAKER_01']
+    assert merge(turns, words) == baseline_merge(turns, words)
+
+
+def test_words_outside_every_turn_are_unknown():
+    turns = [{'start': 5.0, 'end': 6.0, 'speaker': 'SPEAKER_00'}]
+    words = [
+        {'start': 0.0, 'end': 0.5, 'text': '앞'},
+        {'start': 5.2, 'end': 5.6, 'text': '안'},
+        {'start': 7.0, 'end': 7.5, 'text': '뒤'},
+    ]
+    assert [segment['speaker'] for segment in merge(turns, words)] == ['UNKNOWN', 'SPEAKER_00', 'UNKNOWN']
+    assert merge([], words) == baseline_merge([], words)
@@ -0,0 +1,70 @@
+"""
+WhisperBatcher가 여러 요청의 구간을 한 배치로 인식해도 단어가 다른 요청의 결과로 섞이지 않는지 확인합니다.
+faster-whisper 대신, BatchedInferencePipeline처럼 인접 clip을 창 길이까지 합쳐(collect_chunks) 한 세그먼트로 인식하는 가짜 파이프라인을 씁니다.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.audio import SAMPLE_RATE
+from src.stt_batcher import WhisperBatcher
+
+
+class FakeBatchedPipeline:
+    """
+    clip_timestamps를 앞에서부터 chunk_length 이하로 합쳐 창을 만들고, 창마다 세그먼트 하나를 반환합니다.
+    0이 아닌 샘플 1초마다 그 값(요청 번호)을 텍스트로 하는 단어를 만듭니다.
+    """
+
+    def transcribe(self, audio, clip_timestamps, chunk_length=30, **kwargs):
+        max_samples = chunk_length * SAMPLE_RATE
+        windows = []
+        for clip in clip_timestamps:
+            if windows and windows[-1][1] - windows[-1][0] + clip['end'] - clip['start'] <= max_samples:
+                windows[-1][1] = clip['end']
+            else:
+                windows.append([clip['start'], clip['end']])
+
+        segments = []
+        for start, end in windows:
+            words = []
+            for second in range(start // SAMPLE_RATE, -(-end // SAMPLE_RATE)):
+                block = audio[second * SAMPLE_RATE:(second + 1) * SAMPLE_RATE]
+                if block.any():
+                    words.append(SimpleNamespace(start=second + 0.1, end=second + 0.9, word=str(int(block.max()))))
+            segments.append(SimpleNamespace(start=start / SAMPLE_RATE, end=end / SAMPLE_RATE, words=words))
+        return segments, None
+
+
+@pytest.fixture
+def batcher():
+    batcher = WhisperBatcher(model_manager=None, model_size='small')
+    batcher._get_pipeline = FakeBatchedPipeline
+    yield batcher
+    batcher.close()
+
+
+def item(request_number, seconds, offset):
+    return {'audio': np.full(int(seconds * SAMPLE_RATE), request_number, dtype=np.float32), 'offset': offset}
+
+
+def test_short_items_from_two_requests_do_not_share_words(batcher):
+    items = [item(1, 3, offset=10.0), item(2, 4, offset=100.0)]
+    results = batcher._infer(items)
+
+    assert [word['word'] for word in results[0]] == ['1'] * 3
+    assert [word['word'] for word in results[1]] == ['2'] * 4
+    assert [round(word['start'], 2) for word in results[0]] == [10.1, 11.1, 12.1]
+    assert [round(word['start'], 2) for word in results[1]] == [100.1, 101.1, 102.1, 103.1]
+
+
+def test_full_batch_keeps_every_item_separate(batcher):
+    lengths = [1, 29, 30, 2, 5, 12, 0.5, 30]
+    items = [item(index + 1, seconds, offset=index * 1000.0) for index, seconds in enumerate(lengths)]
+    results = batcher._infer(items)
+
+    for index, (seconds, words) in enumerate(zip(lengths, results)):
+        assert {word['word'] for word in words} == {str(index + 1)}
+        assert len(words) == int(np.ceil(seconds))
+        assert all(index * 1000.0 <= word['start'] < index * 1000.0 + seconds for word in words)